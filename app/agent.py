@@ -1,32 +1,95 @@
 ﻿"""LangGraph workflow definition for the Promtior Bionic Agent.
 
-Graph:  START -> retrieve -> generate -> END
+Graph:  START -> cache_lookup -> retrieve -> generate -> cache_store -> END
+                   (hit) -> END
+
+The cache nodes are only wired in when Config.ANSWER_CACHE_ENABLED is set.
+Nodes with an async twin are registered as RunnableLambda(sync, afunc=async):
+.invoke/.stream run the sync functions, .ainvoke/.astream (LangServe) await
+the async ones on the event loop.
+
+``agent_runnable`` is what LangServe serves: it streams {"answer": delta}
+chunks from the graph's custom stream, so /agent/stream emits tokens as the
+LLM produces them, while /agent/invoke adds the deltas back into the full
+{"answer": ...}.
 
 Uses separate InputState / OutputState so LangServe only requires
 {"question": "..."} from the client and only returns {"answer": "..."}.
 """
 
+from collections.abc import AsyncIterator, Iterator
+from langchain_core.runnables import (
+    AddableDict, Runnable, RunnableConfig, RunnableGenerator, RunnableLambda,
+)
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
-from app.nodes import AgentState, InputState, OutputState, retrieve_node, generate_node
-from app.config import logger
+from app.nodes import (
+    AgentState, InputState, OutputState,
+    acache_lookup_node, aretrieve_node, agenerate_node,
+    cache_lookup_node, cache_store_node, retrieve_node, generate_node,
+)
+from app.config import Config, logger
+
+
+def _route_after_cache(state: AgentState) -> str:
+    """Finish on a cache hit, otherwise run the RAG steps."""
+    return END if state.get("answer") else "retrieve"
+
+
+def _node(func, afunc, async_nodes: bool):
+    """Node action: ``func`` alone, or paired with its async twin."""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__) if async_nodes else func
+
 
+def create_agent(async_nodes: bool = True) -> CompiledStateGraph:
+    """Build and compile the RAG agent graph (with optional answer cache).
 
-def create_agent() -> CompiledStateGraph:
-    """Build and compile the two-step RAG agent graph."""
+    Args:
+        async_nodes: Register the async node variants.  False builds the
+            sync-only graph (async callers then run nodes in a threadpool);
+            kept for the load-test comparison.
+    """
     logger.info("Building Promtior Bionic Agent graph")
     workflow = StateGraph(AgentState, input=InputState, output=OutputState)
 
-    workflow.add_node("retrieve", retrieve_node)
-    workflow.add_node("generate", generate_node)
-
-    workflow.set_entry_point("retrieve")
+    workflow.add_node("retrieve", _node(retrieve_node, aretrieve_node, async_nodes))
+    workflow.add_node("generate", _node(generate_node, agenerate_node, async_nodes))
     workflow.add_edge("retrieve", "generate")
-    workflow.add_edge("generate", END)
+
+    if Config.ANSWER_CACHE_ENABLED:
+        workflow.add_node("cache_lookup", _node(cache_lookup_node, acache_lookup_node, async_nodes))
+        workflow.add_node("cache_store", cache_store_node)
+        workflow.set_entry_point("cache_lookup")
+        workflow.add_conditional_edges("cache_lookup", _route_after_cache, ["retrieve", END])
+        workflow.add_edge("generate", "cache_store")
+        workflow.add_edge("cache_store", END)
+    else:
+        workflow.set_entry_point("retrieve")
+        workflow.add_edge("generate", END)
 
     compiled = workflow.compile()
     logger.info("Agent graph compiled successfully")
     return compiled
 
 
-agent_executor = create_agent()
\ No newline at end of file
+def _stream_answer(inputs: Iterator[InputState], config: RunnableConfig) -> Iterator[AddableDict]:
+    """Yield answer deltas for each input (sync path)."""
+    for state in inputs:
+        for delta in agent_executor.stream(state, config, stream_mode="custom"):
+            yield AddableDict(delta)
+
+
+async def _astream_answer(
+    inputs: AsyncIterator[InputState], config: RunnableConfig
+) -> AsyncIterator[AddableDict]:
+    """Yield answer deltas for each input (async path used by LangServe)."""
+    async for state in inputs:
+        async for delta in agent_executor.astream(state, config, stream_mode="custom"):
+            yield AddableDict(delta)
+
+
+agent_executor = create_agent()
+
+agent_runnable: Runnable = RunnableGenerator(
+    _stream_answer, _astream_answer, name="PromtiorBionicAgent",
+).with_types(input_type=InputState, output_type=OutputState)
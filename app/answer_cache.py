@@ -0,0 +1,176 @@
+"""Semantic answer cache in front of the RAG graph.
+
+Two lookup tiers, checked by the ``cache_lookup`` node before retrieval:
+
+  1. exact match on the normalized question (no embedding call at all);
+  2. cosine similarity between the question embedding and the embeddings
+     of cached questions, accepted above Config.ANSWER_CACHE_THRESHOLD.
+
+Questions looked up without an embedder (keyword queries, which retrieval
+serves without embedding) only use and populate the exact tier.
+
+Entries expire after Config.ANSWER_CACHE_TTL_SECONDS, the cache is bounded
+to Config.ANSWER_CACHE_MAX_SIZE entries (LRU eviction), and everything is
+dropped when the FAISS index on disk changes (re-ingestion).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+
+import numpy as np
+from app.config import Config, logger
+
+
+def normalize_question(question: str) -> str:
+    """Cache key ignoring case, extra whitespace and trailing punctuation."""
+    return " ".join(question.casefold().split()).rstrip("?!. ")
+
+
+def index_version(index_path: str = Config.INDEX_PATH) -> str:
+    """Cheap fingerprint of the persisted FAISS index (mtime + size)."""
+    try:
+        stat = os.stat(os.path.join(index_path, "index.faiss"))
+    except FileNotFoundError:
+        return "missing"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class AnswerCache:
+    """Thread-safe exact + embedding-similarity cache with TTL and LRU bound."""
+
+    def __init__(
+        self,
+        threshold: float = Config.ANSWER_CACHE_THRESHOLD,
+        ttl_seconds: float = Config.ANSWER_CACHE_TTL_SECONDS,
+        max_size: int = Config.ANSWER_CACHE_MAX_SIZE,
+        version: Callable[[], str] = index_version,
+    ) -> None:
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._version = version
+        self._current_version = version()
+        # key -> (answer, unit question vector or None (exact only), stored_at)
+        self._entries: OrderedDict[str, tuple[str, np.ndarray | None, float]] = OrderedDict()
+        # question vectors computed on a miss, reused when the answer is stored
+        self._pending: OrderedDict[str, np.ndarray | None] = OrderedDict()
+        self._matrix: np.ndarray | None = None
+        self._keys: list[str] = []
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _check_version(self) -> None:
+        version = self._version()
+        if version != self._current_version:
+            logger.info("ANSWER CACHE - index changed, dropping %d entries", len(self._entries))
+            self._current_version = version
+            self._entries.clear()
+            self._pending.clear()
+            self._matrix = None
+
+    def _expire(self, now: float) -> None:
+        expired = [k for k, (_, _, t) in self._entries.items() if now - t > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _lookup_exact(self, key: str) -> str | None:
+        with self._lock:
+            self._check_version()
+            self._expire(time.monotonic())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._entries[key][0]
+        return None
+
+    def _lookup_similar(self, key: str, embedding: list[float] | None) -> str | None:
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+
+        with self._lock:
+            if vector is not None and self._matrix is None:
+                self._keys = [k for k, entry in self._entries.items() if entry[1] is not None]
+                self._matrix = np.stack([self._entries[k][1] for k in self._keys]) \
+                    if self._keys else np.empty((0, len(vector)), dtype=np.float32)
+            if vector is not None and self._keys:
+                scores = self._matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    match = self._keys[best]
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    logger.info("ANSWER CACHE - semantic hit (%.3f): %s", scores[best], match)
+                    return self._entries[match][0]
+
+            self.misses += 1
+            self._pending[key] = vector
+            while len(self._pending) > self.max_size:
+                self._pending.popitem(last=False)
+        return None
+
+    def lookup(
+        self, question: str, embed: Callable[[str], list[float]] | None
+    ) -> str | None:
+        """Return a cached answer for ``question`` or None.
+
+        ``embed`` is only called when there is no exact match; without it
+        only the exact tier is checked.
+        """
+        key = normalize_question(question)
+        answer = self._lookup_exact(key)
+        if answer is not None:
+            return answer
+        return self._lookup_similar(key, embed(question) if embed else None)
+
+    async def alookup(
+        self, question: str, aembed: Callable[[str], Awaitable[list[float]]] | None
+    ) -> str | None:
+        """Async ``lookup``: awaits ``aembed`` instead of blocking on the API."""
+        key = normalize_question(question)
+        answer = self._lookup_exact(key)
+        if answer is not None:
+            return answer
+        return self._lookup_similar(key, await aembed(question) if aembed else None)
+
+    def store(self, question: str, answer: str) -> None:
+        """Cache ``answer``; only questions that went through ``lookup`` are kept."""
+        key = normalize_question(question)
+        with self._lock:
+            if key not in self._pending:
+                return
+            vector = self._pending.pop(key)
+            self._entries[key] = (answer, vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def stats(self) -> dict[str, int | float]:
+        """Hit/miss counters and hit rate, for the metrics endpoint."""
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            hits = self.exact_hits + self.semantic_hits
+            return {
+                "size": len(self._entries),
+                "lookups": lookups,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache:
+    """Factory: one answer cache per process."""
+    return AnswerCache()
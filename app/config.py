@@ -1,16 +1,18 @@
 ﻿"""Centralized configuration, validation, and resource factories.
 
-Design: Factory Pattern with @lru_cache singletons for LLM, Embeddings,
-and Retriever. Each resource is created once and reused across requests.
+Design: Factory Pattern with @lru_cache singletons for LLM, Embeddings
+(plus the cached query-embedding wrapper), Tokenizers, and Retriever.
+Each resource is created once and reused across requests.
 """
 
 import os
 import logging
 from functools import lru_cache
+import tiktoken
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 
 load_dotenv()
 
@@ -19,6 +21,14 @@ logging.basicConfig(
     format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
 )
 logger = logging.getLogger("PromtiorAgent")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Vector size each embedding model returns when no ``dimensions`` is requested
+NATIVE_EMBEDDING_DIMENSIONS: dict[str, int] = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
 
 
 class Config:
@@ -27,15 +37,120 @@ class Config:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "").strip()
     MODEL_NAME: str = "gpt-4o-mini"
     EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # text-embedding-3 models return shortened (Matryoshka) vectors on request:
+    # 256 / 512 / 1024 trade a little recall for a smaller, faster index.
+    # None = the model's native size (older models reject ``dimensions``)
+    EMBEDDING_DIMENSIONS: int | None = None
     INDEX_PATH: str = "faiss_index"
     RETRIEVER_K: int = 5
+    # Hybrid retrieval: BM25 (bm25.npz) + dense, fused with reciprocal rank
+    # fusion over the top HYBRID_CANDIDATES of each; queries of at most
+    # KEYWORD_ONLY_MAX_TERMS indexed words (no stopwords) skip the embedding
+    HYBRID_SEARCH: bool = True
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+    KEYWORD_ONLY_MAX_TERMS: int = 3
+    # Diversity: "mmr" picks the RETRIEVER_K chunks from the candidates
+    # (hybrid: HYBRID_CANDIDATES per search; dense: MMR_FETCH_K) by maximal
+    # marginal relevance on the stored vectors (MMR_LAMBDA: 1 = relevance
+    # only, lower = more diverse); "similarity" keeps the plain ranking.
+    # Either way at most MAX_CHUNKS_PER_SOURCE chunks per page (0 = no cap).
+    # Opt-in, e.g. "mmr" with a cap of 2: check with benchmarks/bench_diversity.py
+    RETRIEVAL_MODE: str = "similarity"
+    MMR_FETCH_K: int = 20
+    MMR_LAMBDA: float = 0.7
+    MAX_CHUNKS_PER_SOURCE: int = 0
+    # mmap index.faiss + docstore.bin so uvicorn workers share the page cache
+    INDEX_MMAP: bool = True
+    # Prompt context (app/context_packer.py): overlapping chunks of a source
+    # are merged, then packed best-first into CONTEXT_TOKEN_BUDGET tokens of
+    # the chat model's encoding (0 = no limit); the first chunk that does not
+    # fit is cut if CONTEXT_MIN_TRUNCATED_TOKENS remain, lower ranks dropped.
+    # Opt-in: a budget below RETRIEVER_K full chunks can cut answers' sources
+    CONTEXT_TOKEN_BUDGET: int = 0
+    CONTEXT_MIN_TRUNCATED_TOKENS: int = 64
+
+    # Vector index type: "Flat" (exact), "IVFFlat", "HNSW" or "IVFPQ".
+    # Built (and trained) at ingest; see app/index_factory.py
+    INDEX_TYPE: str = "Flat"
+    IVF_NLIST: int = 0  # 0 = ~4 * sqrt(vectors)
+    IVF_NPROBE: int = 16
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 128
+    PQ_M: int = 96  # bytes per vector (8-bit codes)
+    # Vector encoding: "float32", "float16", "int8" (scalar quantization) or
+    # "pq"; lossy encodings keep float32 copies (vectors.npy, mmapped) to
+    # re-rank the top RERANK_FACTOR * k hits exactly (0 = no re-rank)
+    INDEX_ENCODING: str = "float32"
+    RERANK_FACTOR: int = 4
     PDF_PATH: str = "data/AI Engineer.pdf"
+    # Chunk sizes in characters ("chars") or in tokens of the embedding
+    # model's tiktoken encoding ("tokens": predictable prompt cost per chunk)
+    CHUNK_UNIT: str = "chars"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNK_TOKENS: int = 250
+    CHUNK_TOKEN_OVERLAP: int = 50
+    # Chunks whose estimated Jaccard similarity (MinHash over word 3-shingles)
+    # to an indexed chunk reaches this are not embedded (0 = keep everything).
+    # Opt-in, e.g. 0.85: changing it rebuilds the index on the next ingest
+    DEDUP_THRESHOLD: float = 0.0
+
+    # Semantic answer cache in front of the graph
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_SIZE: int = 512
+
+    # Sitemap-based deep crawl: (sitemap URL, source_type) per site or section.
+    # Flat <urlset> or <sitemapindex> (followed recursively), plain or .xml.gz;
+    # all crawled concurrently, a URL listed twice is fetched once
+    SITEMAPS: list[tuple[str, str]] = [
+        ("https://www.promtior.ai/pages-sitemap.xml", "website"),
+        ("https://www.promtior.ai/blog-posts-sitemap.xml", "blog"),
+    ]
 
-    # Sitemap-based deep crawl
-    PAGES_SITEMAP: str = "https://www.promtior.ai/pages-sitemap.xml"
-    BLOG_SITEMAP: str = "https://www.promtior.ai/blog-posts-sitemap.xml"
+    # Async crawl: global in-flight limit + per-host politeness cap
+    CRAWL_CONCURRENCY: int = 16
+    CRAWL_PER_HOST_LIMIT: int = 6
+    CRAWL_TIMEOUT: float = 15.0
+    # Keep-alive connections kept in the crawl pool; HTTP/2 needs the optional h2 package
+    CRAWL_POOL_SIZE: int = 16
+    CRAWL_HTTP2: bool = True
+    # Retries of connection errors / 429 / 5xx, with exponential backoff from
+    # CRAWL_BACKOFF seconds (Retry-After wins when the server sends it)
+    CRAWL_RETRIES: int = 3
+    CRAWL_BACKOFF: float = 0.5
+    # HTML parsing: "fast" (lxml.etree tree walk) or "soup" (BeautifulSoup);
+    # both return the same text
+    HTML_PARSER: str = "fast"
+    # Processes parsing HTML and chunking documents (0 = one per CPU, 1 = inline)
+    PARSE_WORKERS: int = 0
+    # Streaming ingestion: documents buffered between crawl and chunking, and
+    # chunks per committed batch (index + manifest saved; a crash resumes
+    # from the last commit)
+    INGEST_QUEUE_SIZE: int = 64
+    INGEST_BATCH_CHUNKS: int = 256
+
+    # Embedding scheduler: token-sized batches drawn from per-minute buckets
+    EMBED_TPM_LIMIT: int = 1_000_000
+    EMBED_RPM_LIMIT: int = 3_000
+    EMBED_MAX_BATCH_TOKENS: int = 50_000
+    EMBED_MAX_BATCH_INPUTS: int = 2_048
+    EMBED_CONCURRENCY: int = 4
+    EMBED_MAX_RETRIES: int = 6
+
+    # Local caches (HTTP validators, embeddings) -- safe to delete at any time
+    CACHE_DIR: str = ".cache"
+    HTTP_CACHE_PATH: str = os.path.join(CACHE_DIR, "http_cache.json")
+    EMBEDDING_CACHE_PATH: str = os.path.join(CACHE_DIR, "embeddings.sqlite")
+
+    # Query-embedding cache: in-process LRU + optional SQLite tier shared
+    # by all uvicorn workers on the host
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_SHARED: bool = False
+    QUERY_CACHE_PATH: str = os.path.join(CACHE_DIR, "query_embeddings.sqlite")
 
     # URLs to skip (no useful RAG content)
     SKIP_URL_PATTERNS: tuple[str, ...] = (
@@ -55,6 +170,23 @@ class Config:
         "404",
     )
 
+    @classmethod
+    def embedding_metadata(cls) -> dict[str, object]:
+        """Embedding settings recorded with the index and checked when loading it."""
+        metadata: dict[str, object] = {"embedding_model": cls.EMBEDDING_MODEL}
+        dimensions = (cls.EMBEDDING_DIMENSIONS
+                      or NATIVE_EMBEDDING_DIMENSIONS.get(cls.EMBEDDING_MODEL))
+        if dimensions:
+            metadata["embedding_dimensions"] = dimensions
+        return metadata
+
+    @classmethod
+    def requested_dimensions(cls) -> int | None:
+        """EMBEDDING_DIMENSIONS to request: None when unset or the model's native size."""
+        if cls.EMBEDDING_DIMENSIONS == NATIVE_EMBEDDING_DIMENSIONS.get(cls.EMBEDDING_MODEL):
+            return None
+        return cls.EMBEDDING_DIMENSIONS
+
     @classmethod
     def validate(cls) -> None:
         """Raise early if required secrets are missing."""
@@ -77,25 +209,95 @@ def get_llm() -> ChatOpenAI:
 def get_embeddings() -> OpenAIEmbeddings:
     """Factory: create and cache a single OpenAIEmbeddings instance."""
     Config.validate()
-    return OpenAIEmbeddings(model=Config.EMBEDDING_MODEL)
+    return OpenAIEmbeddings(model=Config.EMBEDDING_MODEL, dimensions=Config.requested_dimensions())
+
+
+@lru_cache(maxsize=1)
+def get_query_embeddings() -> Embeddings:
+    """Factory: query embeddings behind the LRU (+ optional shared SQLite) cache."""
+    from app.embedding_cache import CachedQueryEmbeddings, EmbeddingCache
+
+    shared = (
+        EmbeddingCache(
+            Config.QUERY_CACHE_PATH, Config.EMBEDDING_MODEL, Config.requested_dimensions(),
+        )
+        if Config.QUERY_CACHE_SHARED else None
+    )
+    return CachedQueryEmbeddings(get_embeddings(), Config.QUERY_CACHE_SIZE, shared)
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer() -> tiktoken.Encoding:
+    """Factory: load and cache the tiktoken encoding of the embedding model."""
+    return tiktoken.encoding_for_model(Config.EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=1)
+def get_prompt_tokenizer() -> tiktoken.Encoding:
+    """Factory: load and cache the tiktoken encoding of the chat model."""
+    return tiktoken.encoding_for_model(Config.MODEL_NAME)
 
 
 @lru_cache(maxsize=1)
-def get_retriever() -> VectorStoreRetriever:
-    """Factory: load the persisted FAISS index once and cache the retriever.
+def get_retriever() -> BaseRetriever:
+    """Factory: load the persisted index once and cache the retriever.
+
+    With Config.HYBRID_SEARCH (and a bm25.npz next to the index) this is a
+    HybridRetriever, otherwise dense-only: a DiverseRetriever when
+    Config.RETRIEVAL_MODE / MAX_CHUNKS_PER_SOURCE ask for diversity, else
+    the plain FAISS retriever.
 
     Raises:
         FileNotFoundError: If the FAISS index directory does not exist.
+        ValueError: If Config.RETRIEVAL_MODE is not "similarity" or "mmr".
     """
     if not os.path.exists(Config.INDEX_PATH):
         raise FileNotFoundError(
             f"FAISS index not found at '{Config.INDEX_PATH}'. "
             "Run ingester.py first."
         )
+    from app.diversity import RETRIEVAL_MODES, DiverseRetriever
+    from app.docstore import load_index
+    from app.index_factory import enable_reconstruct, tune_index
+    from app.keyword_index import HybridRetriever, load_keyword_index
+
+    if Config.RETRIEVAL_MODE not in RETRIEVAL_MODES:
+        raise ValueError(
+            f"Unknown RETRIEVAL_MODE {Config.RETRIEVAL_MODE!r}; expected one of {RETRIEVAL_MODES}"
+        )
+    lambda_mult = Config.MMR_LAMBDA if Config.RETRIEVAL_MODE == "mmr" else 1.0
+
     logger.info("Loading FAISS index from '%s'", Config.INDEX_PATH)
-    vector_store = FAISS.load_local(
-        Config.INDEX_PATH,
-        get_embeddings(),
-        allow_dangerous_deserialization=True,
+    vector_store = load_index(
+        Config.INDEX_PATH, get_query_embeddings(), Config.INDEX_MMAP, Config.RERANK_FACTOR,
+        expected_metadata=Config.embedding_metadata(),
+    )
+    tune_index(vector_store.index, Config.IVF_NPROBE, Config.HNSW_EF_SEARCH)
+    if lambda_mult < 1:
+        enable_reconstruct(vector_store.index)
+    keyword_index = (
+        load_keyword_index(Config.INDEX_PATH, vector_store.index.ntotal)
+        if Config.HYBRID_SEARCH else None
+    )
+    if keyword_index is None:
+        if Config.HYBRID_SEARCH:
+            logger.warning("No BM25 index in '%s' -- dense retrieval only", Config.INDEX_PATH)
+        if lambda_mult < 1 or Config.MAX_CHUNKS_PER_SOURCE:
+            return DiverseRetriever(
+                vector_store=vector_store,
+                k=Config.RETRIEVER_K,
+                fetch_k=Config.MMR_FETCH_K,
+                lambda_mult=lambda_mult,
+                max_per_source=Config.MAX_CHUNKS_PER_SOURCE,
+            )
+        return vector_store.as_retriever(search_kwargs={"k": Config.RETRIEVER_K})
+    return HybridRetriever(
+        vector_store=vector_store,
+        keyword_index=keyword_index,
+        k=Config.RETRIEVER_K,
+        candidates=Config.HYBRID_CANDIDATES,
+        rrf_k=Config.RRF_K,
+        keyword_only_max_terms=Config.KEYWORD_ONLY_MAX_TERMS,
+        lambda_mult=lambda_mult,
+        max_per_source=Config.MAX_CHUNKS_PER_SOURCE,
     )
-    return vector_store.as_retriever(search_kwargs={"k": Config.RETRIEVER_K})
\ No newline at end of file
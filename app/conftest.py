@@ -0,0 +1,28 @@
+"""Shared pytest fixtures."""
+
+import pytest
+import tiktoken
+
+from app import context_packer
+
+
+@pytest.fixture(scope="session")
+def byte_encoding() -> tiktoken.Encoding:
+    """Stand-in tokenizer, one token per UTF-8 byte: no BPE download needed.
+
+    Like the OpenAI encodings it has an ``<|endoftext|>`` special token.
+    """
+    return tiktoken.Encoding(
+        "bytes", pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+
+
+@pytest.fixture
+def byte_tokenizer(monkeypatch, byte_encoding):
+    """Count prompt tokens with ``byte_encoding`` (token counts = UTF-8 bytes)."""
+    monkeypatch.setattr(context_packer, "get_prompt_tokenizer", lambda: byte_encoding)
+    context_packer.count_tokens.cache_clear()
+    yield byte_encoding
+    context_packer.count_tokens.cache_clear()
@@ -0,0 +1,143 @@
+"""Token-budgeted packing of retrieved chunks into the prompt context.
+
+retrieve_node used to join all RETRIEVER_K chunks verbatim, so the prompt
+grew with the chunk size and k.  The packer works on the ranked chunks in
+two steps:
+
+  1. Merge: chunks of one source that overlap (the splitter repeats the end
+     of a chunk at the start of the next) are joined into one passage, so
+     the shared text is sent once.  A passage keeps the rank and metadata of
+     its best chunk.
+  2. Pack: passages are added best-first while they fit in the budget
+     (tokens of the chat model's encoding, source label and separator
+     included).  The first one that does not fit is cut to the remaining
+     budget if at least ``min_truncated`` tokens remain; it (otherwise) and
+     every passage ranked below it are dropped.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+
+from app.config import get_prompt_tokenizer
+
+SEPARATOR = "\n\n---\n\n"
+# Shared characters needed to treat two chunks of a source as neighbours
+_MIN_OVERLAP = 32
+# Framing tokens per chat message, plus the reply primer
+_TOKENS_PER_MESSAGE = 3
+
+
+class PackedContext(NamedTuple):
+    context: str
+    sources: str
+    tokens: int  # context tokens
+    chunks: int  # retrieved chunks
+    passages: int  # passages in the context
+    merged: int  # chunks merged into a better-ranked neighbour
+    dropped: int  # passages left out for the budget
+    truncated: bool
+
+
+@lru_cache(maxsize=1 << 14)
+def count_tokens(text: str) -> int:
+    """Tokens of ``text`` for the chat model (memoized: chunks recur across requests)."""
+    return len(get_prompt_tokenizer().encode_ordinary(text))
+
+
+def prompt_tokens(messages: list[BaseMessage]) -> int:
+    """Prompt tokens of a chat request (message contents plus framing)."""
+    encoding = get_prompt_tokenizer()
+    return _TOKENS_PER_MESSAGE * (len(messages) + 1) + sum(
+        len(encoding.encode_ordinary(m.content)) for m in messages
+    )
+
+
+def _join(first: str, second: str) -> str | None:
+    """``first`` followed by ``second``, their shared text once, if ``second``
+    starts with at least _MIN_OVERLAP characters that end ``first``."""
+    head = second[:_MIN_OVERLAP]
+    if len(head) < _MIN_OVERLAP:
+        return None
+    start = first.find(head, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first[:start] + second
+        start = first.find(head, start + 1)
+    return None
+
+
+def merge_overlapping(docs: list[Document]) -> tuple[list[Document], int]:
+    """Ranked passages from ranked ``docs``, overlapping neighbours merged.
+
+    Returns the passages and the number of chunks merged away.
+    """
+    passages: list[tuple[int, Document]] = []
+    for rank, doc in enumerate(docs):
+        passage = (rank, doc)
+        while True:
+            for i, (other_rank, other) in enumerate(passages):
+                if other.metadata.get("source") != passage[1].metadata.get("source"):
+                    continue
+                first, second = sorted((passage, (other_rank, other)), key=lambda p: p[0])
+                text = (_join(first[1].page_content, second[1].page_content)
+                        or _join(second[1].page_content, first[1].page_content))
+                if text is not None:
+                    break
+            else:
+                break
+            del passages[i]
+            passage = (first[0], Document(page_content=text, metadata=first[1].metadata))
+        passages.append(passage)
+    passages.sort(key=lambda p: p[0])
+    return [doc for _, doc in passages], len(docs) - len(passages)
+
+
+def _label(doc: Document) -> str:
+    source_type = doc.metadata.get("source_type", "unknown")
+    source_url = doc.metadata.get("source", "unknown")
+    return f"[{source_type}: {source_url}]"
+
+
+def _truncate(text: str, tokens: int) -> str:
+    encoding = get_prompt_tokenizer()
+    return encoding.decode(encoding.encode_ordinary(text)[:tokens]).rstrip()
+
+
+def pack_context(docs: list[Document], budget: int, min_truncated: int = 64) -> PackedContext:
+    """Tagged context of ranked ``docs`` within ``budget`` tokens (0 = no limit)."""
+    passages, merged = merge_overlapping(docs)
+    separator = count_tokens(SEPARATOR)
+    blocks: list[str] = []
+    labels: list[str] = []
+    used = 0
+    truncated = False
+    for doc in passages:
+        label = _label(doc)
+        block = f"{label}\n{doc.page_content}"
+        cost = count_tokens(block) + (separator if blocks else 0)
+        if budget and used + cost > budget:
+            room = budget - used - count_tokens(f"{label}\n") - (separator if blocks else 0)
+            if room < min_truncated:
+                break
+            block = f"{label}\n{_truncate(doc.page_content, room)}"
+            cost = count_tokens(block) + (separator if blocks else 0)
+            truncated = True
+        blocks.append(block)
+        used += cost
+        if label not in labels:
+            labels.append(label)
+        if truncated:
+            break
+    return PackedContext(
+        context=SEPARATOR.join(blocks),
+        sources=", ".join(labels),
+        tokens=used,
+        chunks=len(docs),
+        passages=len(blocks),
+        merged=merged,
+        dropped=len(passages) - len(blocks),
+        truncated=truncated,
+    )
@@ -0,0 +1,150 @@
+"""Async HTTP crawler with bounded parallelism for sitemap ingestion.
+
+One shared httpx.AsyncClient (a single keep-alive connection pool, HTTP/2
+when the optional ``h2`` package is installed) serves every request of a
+crawl, sitemaps included.  Two layers of semaphores bound the parallelism:
+
+  - a global limit (Config.CRAWL_CONCURRENCY) on in-flight requests;
+  - a per-host politeness cap (Config.CRAWL_PER_HOST_LIMIT) so one site is
+    never hit with the whole budget at once.
+
+Transient failures (connection errors, timeouts, 429 and 5xx gateway /
+overload statuses) are retried up to Config.CRAWL_RETRIES times, honouring
+Retry-After and otherwise backing off exponentially with full jitter; the
+slots are released while waiting.  Every URL's attempts, final status and
+total time are kept in ``timings`` for the end-of-crawl summary.
+
+The crawler only fetches; parsing stays in ingester.py so each source loader
+keeps producing the same list[Document].
+"""
+
+import asyncio
+import importlib.util
+import time
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import httpx
+import numpy as np
+from app.config import Config, logger
+from app.retry import MAX_BACKOFF, backoff, retry_after
+
+HTTP_HEADERS = {
+    "User-Agent": "PromtiorBot/1.0 (+https://github.com/lochi011/promtior-ai-challenge)"
+}
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class FetchTiming(NamedTuple):
+    """One URL's fetch: total seconds (backoff included), attempts, last status."""
+
+    seconds: float
+    attempts: int
+    status: int | None  # None: request error on the last attempt
+
+
+class AsyncCrawler:
+    """Shared connection pool + global and per-host concurrency limits.
+
+    Usage:
+        async with AsyncCrawler() as crawler:
+            resp = await crawler.get(url)
+        logger.info(crawler.summary())
+    """
+
+    def __init__(
+        self,
+        concurrency: int = Config.CRAWL_CONCURRENCY,
+        per_host_limit: int = Config.CRAWL_PER_HOST_LIMIT,
+        timeout: float = Config.CRAWL_TIMEOUT,
+        pool_size: int = Config.CRAWL_POOL_SIZE,
+        retries: int = Config.CRAWL_RETRIES,
+        backoff: float = Config.CRAWL_BACKOFF,
+        http2: bool = Config.CRAWL_HTTP2,
+    ) -> None:
+        self._global = asyncio.Semaphore(concurrency)
+        self._per_host_limit = per_host_limit
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self.retries = retries
+        self.backoff = backoff
+        self.timings: dict[str, FetchTiming] = {}
+        self._client = httpx.AsyncClient(
+            headers=HTTP_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            http2=http2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+
+    async def __aenter__(self) -> "AsyncCrawler":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self._per_host_limit)
+        return self._hosts[host]
+
+    async def get(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response | None:
+        """GET a URL within both concurrency limits, retrying transient failures.
+
+        A 304 Not Modified (answer to conditional ``headers``) is returned
+        as-is.  Returns None (and logs a warning) on other non-2xx statuses,
+        on errors a retry cannot fix (redirect loop, undecodable body,
+        invalid URL) and once the retries are exhausted.
+        """
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            # host slot first: waiting on a busy host must not pin a global slot
+            async with self._host_semaphore(url), self._global:
+                try:
+                    resp = await self._client.get(url, headers=headers)
+                except httpx.TransportError as exc:
+                    resp, reason = None, type(exc).__name__
+                except (httpx.HTTPError, httpx.InvalidURL) as exc:
+                    resp, reason = None, type(exc).__name__
+                    break
+            if resp is not None:
+                if resp.status_code not in _RETRY_STATUSES:
+                    break
+                reason = resp.status_code
+            if attempt == self.retries:
+                break
+            delay = min(MAX_BACKOFF, (resp is not None and retry_after(resp.headers))
+                        or backoff(attempt, self.backoff))
+            logger.info(
+                "  Retrying in %.2fs (attempt %d/%d, %s): %s",
+                delay, attempt + 1, self.retries, reason, url,
+            )
+            await asyncio.sleep(delay)
+
+        status = resp.status_code if resp is not None else None
+        self.timings[url] = FetchTiming(time.perf_counter() - start, attempt + 1, status)
+        if resp is None or not (resp.is_success or status == httpx.codes.NOT_MODIFIED):
+            logger.warning("  Could not fetch (%s): %s", status or reason, url)
+            return None
+        return resp
+
+    def summary(self) -> str:
+        """One-line latency / retry summary over every URL fetched so far."""
+        if not self.timings:
+            return "0 URLs fetched"
+        seconds = np.array([t.seconds for t in self.timings.values()]) * 1000
+        retried = sum(t.attempts > 1 for t in self.timings.values())
+        failed = sum(
+            t.status is None or t.status >= 400 for t in self.timings.values()
+        )
+        p50, p95 = np.percentile(seconds, [50, 95])
+        slowest = max(self.timings, key=lambda url: self.timings[url].seconds)
+        return (
+            f"{len(self.timings)} URLs fetched: p50 {p50:.0f}ms, p95 {p95:.0f}ms, "
+            f"max {seconds.max():.0f}ms ({slowest}); {retried} retried, {failed} failed"
+        )
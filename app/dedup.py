@@ -0,0 +1,161 @@
+"""Near-duplicate chunk detection (MinHash + LSH) ahead of embedding.
+
+Wix pages repeat the same hero text, CTAs and service blurbs on many URLs,
+so the splitter yields lots of near-identical chunks.  Each chunk gets a
+MinHash signature over its word 3-shingles (the fraction of equal
+components estimates the Jaccard similarity of two shingle sets); an LSH
+band index finds candidate matches without comparing all pairs, and a chunk
+whose estimated similarity to an indexed one reaches the threshold is
+dropped instead of embedded.
+
+The index is seeded with the chunks already in the vector store, so
+incremental runs also skip chunks that duplicate unchanged documents.  A
+document's own previous chunks are never matches: they are forgotten as
+soon as the document is re-chunked.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import logger
+
+NUM_PERM = 128
+_SHINGLE = 3
+_WORD = re.compile(r"\w+")
+
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(bands, rows) whose S-curve midpoint (1/b)^(1/r) is closest to ``threshold``."""
+    shapes = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    return min(shapes, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes h(x) = (a * x + b) >> 32 (mod 2^64)."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """uint32 MinHash of the word 3-shingles of ``text`` (casefolded)."""
+        words = _WORD.findall(text.casefold())
+        shingles = {
+            " ".join(words[i:i + _SHINGLE])
+            for i in range(max(1, len(words) - _SHINGLE + 1))
+        }
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles),
+        )
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """LSH over MinHash signatures; keys are chunk ids, each owned by a document."""
+
+    def __init__(self, threshold: float, num_perm: int = NUM_PERM) -> None:
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        self._buckets: list[dict[bytes, set[str]]] = [{} for _ in range(self.bands)]
+        self._signatures: dict[str, np.ndarray] = {}
+        self._owners: dict[str, tuple[str, str]] = {}  # chunk id -> (document key, source)
+        self._by_owner: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+    def add(self, chunk_id: str, owner: str, source: str, signature: np.ndarray) -> None:
+        self._signatures[chunk_id] = signature
+        self._owners[chunk_id] = (owner, source)
+        self._by_owner.setdefault(owner, []).append(chunk_id)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, set()).add(chunk_id)
+
+    def forget(self, owner: str) -> list[str]:
+        """Remove (and return) the chunk ids of document ``owner``."""
+        chunk_ids = self._by_owner.pop(owner, [])
+        for chunk_id in chunk_ids:
+            signature = self._signatures.pop(chunk_id)
+            del self._owners[chunk_id]
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                bucket[key].discard(chunk_id)
+                if not bucket[key]:
+                    del bucket[key]
+        return chunk_ids
+
+    def match(self, signature: np.ndarray) -> tuple[str, float] | None:
+        """Most similar indexed chunk at or above the threshold, as (id, similarity)."""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates |= bucket.get(key, set())
+        best = None
+        for chunk_id in candidates:
+            similarity = float(np.mean(self._signatures[chunk_id] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (chunk_id, similarity)
+        return best
+
+    def owner(self, chunk_id: str) -> tuple[str, str]:
+        """(document key, source) of an indexed chunk."""
+        return self._owners[chunk_id]
+
+
+class ChunkDeduplicator:
+    """Drops chunks that nearly duplicate one already indexed, and reports merges."""
+
+    def __init__(self, threshold: float) -> None:
+        self.index = NearDuplicateIndex(threshold)
+        self.kept = 0
+        self.dropped = 0
+        self.merges: Counter[tuple[str, str]] = Counter()  # (dropped source, kept source)
+
+    def seed(self, chunk_id: str, owner: str, chunk: Document) -> None:
+        """Index an already-embedded chunk of document ``owner``."""
+        source = chunk.metadata.get("source", owner)
+        self.index.add(chunk_id, owner, source, self.index.hasher.signature(chunk.page_content))
+
+    def filter(
+        self, owner: str, chunks: list[Document], chunk_ids: list[str]
+    ) -> tuple[list[Document], list[str], list[str]]:
+        """Split document ``owner``'s chunks into kept ones and near-duplicates.
+
+        Its previously indexed chunks are forgotten first.  Returns the kept
+        (chunks, ids) -- now indexed -- and the ids the dropped chunks were
+        merged into.
+        """
+        self.index.forget(owner)
+        kept, kept_ids, merged_into = [], [], []
+        for chunk, chunk_id in zip(chunks, chunk_ids):
+            signature = self.index.hasher.signature(chunk.page_content)
+            source = chunk.metadata.get("source", owner)
+            match = self.index.match(signature)
+            if match is None:
+                self.index.add(chunk_id, owner, source, signature)
+                kept.append(chunk)
+                kept_ids.append(chunk_id)
+                continue
+            merged_into.append(match[0])
+            self.merges[source, self.index.owner(match[0])[1]] += 1
+        self.kept += len(kept)
+        self.dropped += len(chunks) - len(kept)
+        return kept, kept_ids, merged_into
+
+    def log_report(self, top: int = 10) -> None:
+        total = self.kept + self.dropped
+        logger.info(
+            "Near-duplicate chunks: %d of %d dropped (threshold %.2f, %d bands x %d rows)",
+            self.dropped, total, self.index.threshold, self.index.bands, self.index.rows,
+        )
+        for (dropped, kept), count in self.merges.most_common(top):
+            logger.info("  %3d chunks of %s merged into %s", count, dropped, kept)
+        if len(self.merges) > top:
+            logger.info("  ... and %d more source pairs", len(self.merges) - top)
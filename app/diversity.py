@@ -0,0 +1,138 @@
+"""Diversity-aware selection of retrieved chunks: MMR plus a per-source cap.
+
+Neighbouring chunks of a page share CHUNK_OVERLAP characters and Wix pages
+repeat their blurbs, so the top k by relevance often hold several
+near-copies of one passage.  Instead, k chunks are picked greedily from a
+longer ranked candidate list by maximal marginal relevance,
+
+    lambda * relevance(c) - (1 - lambda) * max cosine(c, already picked),
+
+with relevance the candidate's retrieval score rescaled to [0, 1] (so dense
+distances, BM25 scores and fused RRF scores all work) and the cosines taken
+from the vectors stored in the index: one (n x n) matrix product, no
+embedding calls.  With ``max_per_source`` a source stops being eligible
+once that many of its chunks are picked.  Only the picked rows are read
+from the docstore (all candidates when the cap needs their sources).
+"""
+
+from collections import Counter
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import run_in_executor
+from pydantic import ConfigDict
+
+from app.index_factory import RerankIndex
+
+RETRIEVAL_MODES = ("similarity", "mmr")
+
+
+def stored_vectors(index: faiss.Index | RerankIndex, positions: np.ndarray) -> np.ndarray:
+    """float32 vectors at ``positions`` (exact copies for a re-ranked index).
+
+    IVF indexes need a direct map first (index_factory.enable_reconstruct).
+    """
+    if isinstance(index, RerankIndex):
+        return np.asarray(index.vectors[positions], dtype=np.float32)
+    return index.reconstruct_batch(positions)
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    vectors: np.ndarray | None,
+    k: int,
+    lambda_mult: float,
+    sources: list[str] | None = None,
+    max_per_source: int = 0,
+) -> list[int]:
+    """Indices of ``k`` candidates picked by MMR (relevance order without ``vectors``)."""
+    n = len(relevance)
+    span = float(relevance.max() - relevance.min()) if n else 0.0
+    relevance = (relevance - relevance.min()) / span if span > 0 else np.ones(n)
+    if vectors is not None and lambda_mult < 1:
+        unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = unit @ unit.T
+    else:
+        similarity = None
+    redundancy = np.full(n, -1.0)
+    available = np.ones(n, dtype=bool)
+    groups = np.asarray(sources, dtype=object) if max_per_source else None
+    per_source: Counter = Counter()
+    picked: list[int] = []
+    while len(picked) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+        picked.append(best)
+        available[best] = False
+        if similarity is not None:
+            np.maximum(redundancy, similarity[best], out=redundancy)
+        if groups is not None:
+            per_source[groups[best]] += 1
+            if per_source[groups[best]] >= max_per_source:
+                available &= groups != groups[best]
+    return picked
+
+
+def diversify(
+    vector_store: FAISS,
+    ranked: list[tuple[int, float]],
+    k: int,
+    lambda_mult: float = 1.0,
+    max_per_source: int = 0,
+) -> list[Document]:
+    """``k`` chunks of the ranked (FAISS position, score) candidates, higher scores first."""
+    store = vector_store
+    if not ranked:
+        return []
+    positions = np.array([p for p, _ in ranked], dtype=np.int64)
+    relevance = np.array([s for _, s in ranked], dtype=np.float64)
+    vectors = stored_vectors(store.index, positions) if lambda_mult < 1 else None
+    docs: dict[int, Document | str] = {}
+    sources = None
+    if max_per_source:
+        docs = {i: store.docstore.search(store.index_to_docstore_id[int(p)])
+                for i, p in enumerate(positions)}
+        sources = [
+            doc.metadata.get("source", "") if isinstance(doc, Document) else "" for doc in docs.values()
+        ]
+    picked = mmr_select(relevance, vectors, k, lambda_mult, sources, max_per_source)
+    chosen = [
+        docs[i] if i in docs else store.docstore.search(store.index_to_docstore_id[int(positions[i])])
+        for i in picked
+    ]
+    return [doc for doc in chosen if isinstance(doc, Document)]
+
+
+class DiverseRetriever(BaseRetriever):
+    """Dense FAISS retrieval with MMR / per-source selection over ``fetch_k`` candidates."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: FAISS
+    k: int = 5
+    fetch_k: int = 20
+    lambda_mult: float = 0.7
+    max_per_source: int = 0
+
+    def _select(self, embedding: list[float]) -> list[Document]:
+        query = np.array([embedding], dtype=np.float32)
+        distances, positions = self.vector_store.index.search(query, self.fetch_k)
+        ranked = [(int(p), -float(d)) for p, d in zip(positions[0], distances[0]) if p >= 0]
+        return diversify(self.vector_store, ranked, self.k, self.lambda_mult, self.max_per_source)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self._select(self.vector_store.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        embedding = await self.vector_store.embeddings.aembed_query(query)
+        return await run_in_executor(None, self._select, embedding)
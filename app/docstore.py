@@ -0,0 +1,296 @@
+"""Compact columnar docstore and memory-mapped loading of the FAISS index.
+
+The index directory holds ``index.faiss`` (the vectors) and
+``docstore.bin`` (the chunks); there is no pickle, so loading needs no
+``allow_dangerous_deserialization``.
+
+docstore.bin is column-oriented and addressed by FAISS position:
+
+    magic (8 bytes) | header length (uint64) | JSON header | padded columns
+
+The header carries the row count, index-level metadata (the embedding model
+and dimensions, checked on load), the interned string table, the interned
+"extra" metadata dicts and the (offset, dtype, count) of every column:
+
+  - ids / texts: UTF-8 blobs with uint64 offset columns (n + 1 entries);
+  - source / source_type / title: uint32 indices into the string table
+    (0xFFFFFFFF when the chunk has no such key);
+  - extra: uint32 index into the extras table (any other metadata, e.g.
+    PDF page fields; 0 is the empty dict).
+
+Served with Config.INDEX_MMAP, both files are mmapped: uvicorn workers
+share the OS page cache and a query only decodes the rows it returns.
+A quantized index may also come with ``vectors.npy`` (exact float32
+vectors for re-ranking, see app.index_factory), which is mmapped too.
+``bm25.npz`` (app.keyword_index) is saved alongside by ingestion.
+"""
+
+import json
+import mmap
+import os
+import shutil
+from collections.abc import Iterator, Mapping
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.config import logger
+from app.index_factory import RerankIndex
+from app.keyword_index import KEYWORD_FILE, BM25Index
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.bin"
+VECTORS_FILE = "vectors.npy"
+_MAGIC = b"PDOCS002"
+_INTERNED = ("source", "source_type", "title")
+_ABSENT = 0xFFFFFFFF
+
+
+def _blob(values: list[bytes]) -> tuple[np.ndarray, bytes]:
+    """uint64 offsets (n + 1) and the concatenated bytes."""
+    offsets = np.zeros(len(values) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum([len(v) for v in values])
+    return offsets, b"".join(values)
+
+
+def write_docstore(vector_store: FAISS, path: str, metadata: dict | None = None) -> None:
+    """Write the chunks of ``vector_store`` in FAISS position order."""
+    count = vector_store.index.ntotal
+    strings: dict[str, int] = {}
+    extras: dict[str, int] = {"{}": 0}
+    ids: list[bytes] = []
+    texts: list[bytes] = []
+    interned = {key: np.full(count, _ABSENT, dtype="<u4") for key in _INTERNED}
+    extra = np.zeros(count, dtype="<u4")
+
+    for i in range(count):
+        doc_id = vector_store.index_to_docstore_id[i]
+        doc = vector_store.docstore.search(doc_id)
+        ids.append(doc_id.encode("utf-8"))
+        texts.append(doc.page_content.encode("utf-8"))
+        rest = {}
+        for key, value in doc.metadata.items():
+            if key in interned and isinstance(value, str):
+                interned[key][i] = strings.setdefault(value, len(strings))
+            else:
+                rest[key] = value
+        encoded = json.dumps(rest, ensure_ascii=False, sort_keys=True)
+        extra[i] = extras.setdefault(encoded, len(extras))
+
+    id_offsets, id_blob = _blob(ids)
+    text_offsets, text_blob = _blob(texts)
+    columns: dict[str, np.ndarray | bytes] = {
+        "id_offsets": id_offsets, "ids": id_blob,
+        "text_offsets": text_offsets, "texts": text_blob,
+        **interned, "extra": extra,
+    }
+
+    sections = {}
+    position = 0
+    for name, column in columns.items():
+        if isinstance(column, bytes):
+            sections[name] = [position, "u1", len(column)]
+            position += len(column)
+        else:
+            sections[name] = [position, column.dtype.str, len(column)]
+            position += column.nbytes
+        position += -position % 8
+
+    header = json.dumps({
+        "count": count,
+        "metadata": metadata or {},
+        "strings": list(strings),
+        "extras": [json.loads(e) for e in extras],
+        "sections": sections,
+    }, ensure_ascii=False).encode("utf-8")
+    header += b" " * (-(len(_MAGIC) + 8 + len(header)) % 8)
+
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        written = 0
+        for name, column in columns.items():
+            data = column if isinstance(column, bytes) else column.tobytes()
+            f.write(b"\0" * (sections[name][0] - written))
+            f.write(data)
+            written = sections[name][0] + len(data)
+
+
+def save_index(
+    vector_store: FAISS,
+    index_path: str,
+    exact_vectors: np.ndarray | None = None,
+    metadata: dict | None = None,
+    keyword_index: BM25Index | None = None,
+) -> None:
+    """Persist index.faiss and docstore.bin (+ vectors.npy for re-ranking,
+    bm25.npz for hybrid search).
+
+    Files are written next to the target and swapped in with os.replace, so
+    a server that has the old files mmapped keeps reading intact pages.
+    """
+    staging = index_path.rstrip("/\\") + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    faiss.write_index(vector_store.index, os.path.join(staging, INDEX_FILE))
+    write_docstore(vector_store, os.path.join(staging, DOCSTORE_FILE), metadata)
+    if exact_vectors is not None:
+        np.save(os.path.join(staging, VECTORS_FILE), exact_vectors.astype(np.float32))
+    if keyword_index is not None:
+        keyword_index.save(os.path.join(staging, KEYWORD_FILE))
+    os.makedirs(index_path, exist_ok=True)
+    written = os.listdir(staging)
+    for name in written:
+        os.replace(os.path.join(staging, name), os.path.join(index_path, name))
+    os.rmdir(staging)
+    # index.pkl is left over from the pickled LangChain format
+    for name in {"index.pkl", VECTORS_FILE, KEYWORD_FILE}.difference(written):
+        if os.path.exists(os.path.join(index_path, name)):
+            os.remove(os.path.join(index_path, name))
+
+
+def load_vectors(index_path: str) -> np.ndarray | None:
+    """The float32 vectors saved for re-ranking (memory-mapped), if any."""
+    path = os.path.join(index_path, VECTORS_FILE)
+    return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+
+class MmapDocstore(Docstore):
+    """Read-only docstore over a mmapped docstore.bin, searched by FAISS position."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a docstore file (rebuild with ingester.py --full)")
+        header_len = int.from_bytes(self._mm[len(_MAGIC):len(_MAGIC) + 8], "little")
+        base = len(_MAGIC) + 8 + header_len
+        header = json.loads(self._mm[len(_MAGIC) + 8:base])
+        self._count: int = header["count"]
+        self.metadata: dict = header.get("metadata", {})
+        self._strings: list[str] = header["strings"]
+        self._extras: list[dict] = header["extras"]
+        self._columns = {
+            name: np.frombuffer(self._mm, dtype=dtype, count=count, offset=base + offset)
+            for name, (offset, dtype, count) in header["sections"].items()
+            if dtype != "u1"
+        }
+        self._blobs = {
+            name: base + offset
+            for name, (offset, dtype, _) in header["sections"].items()
+            if dtype == "u1"
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _read(self, blob: str, i: int) -> str:
+        offsets = self._columns[f"{blob[:-1]}_offsets"]
+        start = self._blobs[blob] + int(offsets[i])
+        return self._mm[start:self._blobs[blob] + int(offsets[i + 1])].decode("utf-8")
+
+    def search(self, search: int) -> Document | str:
+        """Chunk stored at FAISS position ``search``."""
+        if not 0 <= search < self._count:
+            return f"ID {search} not found."
+        metadata = {}
+        for key in _INTERNED:
+            value = int(self._columns[key][search])
+            if value != _ABSENT:
+                metadata[key] = self._strings[value]
+        metadata.update(self._extras[int(self._columns["extra"][search])])
+        return Document(
+            id=self._read("ids", search),
+            page_content=self._read("texts", search),
+            metadata=metadata,
+        )
+
+    def close(self) -> None:
+        self._columns.clear()
+        self._mm.close()
+
+
+class _Positions(Mapping):
+    """index_to_docstore_id for MmapDocstore: FAISS position -> itself."""
+
+    def __init__(self, count: int) -> None:
+        self._count = count
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self._count:
+            raise KeyError(i)
+        return int(i)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._count))
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def load_index(
+    index_path: str,
+    embeddings: Embeddings,
+    use_mmap: bool = True,
+    rerank_factor: int = 0,
+    expected_metadata: dict | None = None,
+) -> FAISS:
+    """Load the persisted index.
+
+    With ``use_mmap`` the vectors and docstore stay memory-mapped and the
+    store is read-only (search works; add/delete do not).  Otherwise both
+    are read into memory as a regular, mutable FAISS store (ingestion).
+    A ``rerank_factor`` wraps the index in RerankIndex when vectors.npy
+    exists (quantized index).
+
+    Raises:
+        FileNotFoundError: If index.faiss or docstore.bin is missing.
+        ValueError: If docstore.bin does not match index.faiss, or the index
+            was built with other ``expected_metadata`` (embedding settings).
+    """
+    docstore_path = os.path.join(index_path, DOCSTORE_FILE)
+    if not os.path.exists(docstore_path):
+        raise FileNotFoundError(
+            f"'{docstore_path}' not found. Run ingester.py (--full to convert an old index)."
+        )
+    flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if use_mmap else 0
+    index = faiss.read_index(os.path.join(index_path, INDEX_FILE), flags)
+    docstore = MmapDocstore(docstore_path)
+    if len(docstore) != index.ntotal:
+        raise ValueError(
+            f"{DOCSTORE_FILE} has {len(docstore)} records for {index.ntotal} vectors"
+        )
+    expected_metadata = expected_metadata or {}
+    dimensions = expected_metadata.get("embedding_dimensions")
+    if dimensions and index.d != dimensions:
+        raise ValueError(
+            f"Index at '{index_path}' holds {index.d}-dim vectors, configured {dimensions}. "
+            "Re-run ingester.py."
+        )
+    for key, value in expected_metadata.items():
+        if docstore.metadata.get(key, value) != value:
+            raise ValueError(
+                f"Index at '{index_path}' was built with {key}={docstore.metadata[key]!r}, "
+                f"configured {value!r}. Re-run ingester.py."
+            )
+    vectors = load_vectors(index_path) if rerank_factor else None
+    if vectors is not None and len(vectors) == index.ntotal:
+        logger.info("Re-ranking top %d x k hits with exact vectors", rerank_factor)
+        index = RerankIndex(index, vectors, rerank_factor)
+    if use_mmap:
+        logger.info("Memory-mapped FAISS index (%d vectors)", index.ntotal)
+        return FAISS(embeddings, index, docstore, _Positions(index.ntotal))
+
+    documents = [docstore.search(i) for i in range(index.ntotal)]
+    docstore.close()
+    return FAISS(
+        embeddings,
+        index,
+        InMemoryDocstore({doc.id: doc for doc in documents}),
+        {i: doc.id for i, doc in enumerate(documents)},
+    )
@@ -0,0 +1,182 @@
+"""Embedding caches: persistent SQLite store + query-time LRU wrapper.
+
+EmbeddingCache stores vectors as raw float32 blobs keyed by
+(model, sha256(text)), so a re-ingest only pays the embedding API for text it
+has never seen with the current model.  A shortened embedding size is part
+of the model key ("text-embedding-3-small:512").  FAISS stores float32 as well, so
+nothing is lost in the round-trip.
+
+CachedQueryEmbeddings wraps the query side of an Embeddings model with a
+bounded in-process LRU and, optionally, an EmbeddingCache shared by every
+uvicorn worker on the host, so repeated questions skip the API round-trip.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables.config import run_in_executor
+from app.config import logger
+
+
+def text_hash(text: str) -> str:
+    """sha256 hex digest of the UTF-8 text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """(model, text hash) -> float32 vector, with hit/miss counters."""
+
+    def __init__(self, path: str, model: str, dimensions: int | None = None) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.model = f"{model}:{dimensions}" if dimensions else model
+        self.hits = 0
+        self.misses = 0
+        # Shared by server threads (callers serialize access) and, via WAL,
+        # readable by other worker processes while one of them writes.
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_sha256 TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_sha256))"
+        )
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Cached vector for each text, or None where it is missing."""
+        hashes = [text_hash(t) for t in texts]
+        found: dict[str, list[float]] = {}
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = self._conn.execute(
+                "SELECT text_sha256, vector FROM embeddings WHERE model = ?"
+                f" AND text_sha256 IN ({','.join('?' * len(chunk))})",
+                [self.model, *chunk],
+            )
+            for digest, blob in rows:
+                found[digest] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+        vectors = [found.get(h) for h in hashes]
+        hit_count = sum(v is not None for v in vectors)
+        self.hits += hit_count
+        self.misses += len(vectors) - hit_count
+        return vectors
+
+    def put_many(self, texts: list[str], vectors: list[list[float]]) -> None:
+        """Store freshly computed vectors (one transaction per call)."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_sha256, vector) VALUES (?, ?, ?)",
+                [
+                    (self.model, text_hash(t), np.asarray(v, dtype=np.float32).tobytes())
+                    for t, v in zip(texts, vectors)
+                ],
+            )
+
+    def log_stats(self) -> None:
+        """Log the hit/miss counters accumulated so far."""
+        total = self.hits + self.misses
+        logger.info(
+            "Embedding cache: %d hits, %d misses (%.0f%% hit rate)",
+            self.hits, self.misses, 100 * self.hits / total if total else 0,
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace; case is kept since it can matter (client names)."""
+    return " ".join(text.split())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Query embeddings served from an LRU, then a shared SQLite tier, then the API.
+
+    Document embedding is passed straight through to the wrapped model.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        max_size: int,
+        shared: EmbeddingCache | None = None,
+    ) -> None:
+        self.inner = inner
+        self.max_size = max_size
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        # _lock guards the LRU only, so a lookup never waits on SQLite I/O
+        self._lock = threading.Lock()
+        self._shared_lock = threading.Lock()
+
+    def _lookup(self, key: str) -> list[float] | None:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _lookup_shared(self, key: str) -> list[float] | None:
+        # SQLite I/O: off the event loop on the async path
+        with self._shared_lock:
+            vector = self.shared.get_many([key])[0]
+        if vector is not None:
+            with self._lock:
+                self.hits += 1
+                self._remember(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def _store(self, key: str, vector: list[float]) -> None:
+        """Keep a vector the API returned (a miss in both tiers)."""
+        with self._lock:
+            self.misses += 1
+            self._remember(key, vector)
+
+    def _store_shared(self, key: str, vector: list[float]) -> None:
+        with self._shared_lock:
+            self.shared.put_many([key], [vector])
+
+    def embed_query(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        vector = self._lookup(key)
+        if vector is None and self.shared is not None:
+            vector = self._lookup_shared(key)
+        if vector is None:
+            vector = self.inner.embed_query(key)
+            self._store(key, vector)
+            if self.shared is not None:
+                self._store_shared(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        vector = self._lookup(key)
+        if vector is None and self.shared is not None:
+            vector = await run_in_executor(None, self._lookup_shared, key)
+        if vector is None:
+            vector = await self.inner.aembed_query(key)
+            self._store(key, vector)
+            if self.shared is not None:
+                await run_in_executor(None, self._store_shared, key, vector)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.inner.aembed_documents(texts)
@@ -0,0 +1,217 @@
+"""Rate-limit-aware embedding scheduler for ingestion.
+
+Replaces the fixed "50 docs, sleep 1s" loop with:
+
+  - token-sized batches (tiktoken counts, capped by tokens and inputs);
+  - two token buckets (tokens/min and requests/min) that every request
+    draws from, so several batches run concurrently without exceeding quota;
+  - adaptation to the server: x-ratelimit-* headers resize the buckets to
+    the real limits and cap them at the remaining quota;
+  - 429 / transient-error handling that honours Retry-After(-ms) and
+    otherwise backs off exponentially with full jitter, pausing all workers.
+
+Talks to the OpenAI embeddings endpoint directly (AsyncOpenAI raw responses)
+because the LangChain wrapper does not expose response headers.
+"""
+
+import asyncio
+import time
+
+import openai
+from app.config import Config, get_tokenizer, logger
+from app.retry import backoff, retry_after
+
+
+class TokenBucket:
+    """Per-minute quota refilled continuously; ``acquire`` waits for capacity."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Take ``amount`` units, sleeping until the bucket holds enough."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) * 60 / self.capacity)
+
+    def observe(self, limit: str | None, remaining: str | None) -> None:
+        """Adapt to x-ratelimit-limit-* / x-ratelimit-remaining-* headers.
+
+        The advertised limit resizes the bucket (so a higher real quota is
+        used), and the remaining quota caps the level (so a lower one is
+        respected even while other requests are still in flight).
+        """
+        self._refill()
+        if limit and limit.isdigit():
+            self.capacity = float(limit)
+        if remaining and remaining.isdigit():
+            self.level = min(self.level, float(remaining))
+
+    def drain(self) -> None:
+        """Empty the bucket (after a 429 the server says we are over quota)."""
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+class EmbeddingScheduler:
+    """Embed texts with concurrent, token-sized, rate-limited batches.
+
+    Usage:
+        scheduler = EmbeddingScheduler.from_config()
+        vectors = asyncio.run(scheduler.embed(texts))
+    """
+
+    def __init__(
+        self,
+        client: openai.AsyncOpenAI,
+        model: str = Config.EMBEDDING_MODEL,
+        dimensions: int | None = None,
+        tokens_per_minute: int = Config.EMBED_TPM_LIMIT,
+        requests_per_minute: int = Config.EMBED_RPM_LIMIT,
+        max_batch_tokens: int = Config.EMBED_MAX_BATCH_TOKENS,
+        max_batch_inputs: int = Config.EMBED_MAX_BATCH_INPUTS,
+        concurrency: int = Config.EMBED_CONCURRENCY,
+        max_retries: int = Config.EMBED_MAX_RETRIES,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._tokens_per_minute = tokens_per_minute
+        self._requests_per_minute = requests_per_minute
+        self._paused_until = 0.0
+        self.stats = {"requests": 0, "rate_limited": 0, "retries": 0, "tokens": 0}
+
+    @classmethod
+    def from_config(cls) -> "EmbeddingScheduler":
+        """Scheduler for the real OpenAI API (the client's own retries are off)."""
+        Config.validate()
+        return cls(
+            openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0),
+            Config.EMBEDDING_MODEL,
+            Config.requested_dimensions(),
+        )
+
+    def plan_batches(self, texts: list[str]) -> list[tuple[list[int], int]]:
+        """Group text indices into batches bounded by tokens and input count.
+
+        Returns:
+            (indices, token_count) per batch, in input order.
+        """
+        encoder = get_tokenizer()
+        batches: list[tuple[list[int], int]] = []
+        current: list[int] = []
+        current_tokens = 0
+        for i, n_tokens in enumerate(len(t) for t in encoder.encode_ordinary_batch(texts)):
+            n_tokens = max(n_tokens, 1)
+            if current and (
+                current_tokens + n_tokens > self.max_batch_tokens
+                or len(current) >= self.max_batch_inputs
+            ):
+                batches.append((current, current_tokens))
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += n_tokens
+        if current:
+            batches.append((current, current_tokens))
+        return batches
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed all texts; the result keeps the order of ``texts``."""
+        if not texts:
+            return []
+        tokens = TokenBucket(self._tokens_per_minute)
+        requests = TokenBucket(self._requests_per_minute)
+        batches = self.plan_batches(texts)
+        results: list[list[float] | None] = [None] * len(texts)
+        queue: asyncio.Queue = asyncio.Queue()
+        for batch in batches:
+            queue.put_nowait(batch)
+
+        async def worker() -> None:
+            while not queue.empty():
+                indices, n_tokens = queue.get_nowait()
+                vectors = await self._embed_batch(
+                    [texts[i] for i in indices], n_tokens, tokens, requests,
+                )
+                for i, vector in zip(indices, vectors):
+                    results[i] = vector
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(batches)))))
+        elapsed = time.monotonic() - start
+        logger.info(
+            "Embedded %d texts in %d batches / %d requests in %.1fs "
+            "(%d tokens, %d rate-limited, %d retries)",
+            len(texts), len(batches), self.stats["requests"], elapsed,
+            self.stats["tokens"], self.stats["rate_limited"], self.stats["retries"],
+        )
+        return results
+
+    async def _embed_batch(
+        self,
+        batch: list[str],
+        n_tokens: int,
+        tokens: TokenBucket,
+        requests: TokenBucket,
+    ) -> list[list[float]]:
+        """One batch with quota accounting, backoff and retries."""
+        for attempt in range(self.max_retries + 1):
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await tokens.acquire(n_tokens)
+            await requests.acquire(1)
+            self.stats["requests"] += 1
+            try:
+                raw = await self.client.embeddings.with_raw_response.create(
+                    model=self.model, input=batch,
+                    dimensions=self.dimensions or openai.NOT_GIVEN,
+                )
+            except openai.RateLimitError as exc:
+                self.stats["rate_limited"] += 1
+                tokens.drain()
+                delay = retry_after(exc.response.headers) or backoff(attempt)
+            except openai.InternalServerError as exc:
+                delay = retry_after(exc.response.headers) or backoff(attempt)
+            except openai.APIConnectionError:
+                delay = backoff(attempt)
+            else:
+                headers = raw.headers
+                tokens.observe(
+                    headers.get("x-ratelimit-limit-tokens"),
+                    headers.get("x-ratelimit-remaining-tokens"),
+                )
+                requests.observe(
+                    headers.get("x-ratelimit-limit-requests"),
+                    headers.get("x-ratelimit-remaining-requests"),
+                )
+                self.stats["tokens"] += n_tokens
+                data = sorted(raw.parse().data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+
+            if attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            logger.warning(
+                "Embedding batch throttled/failed (attempt %d/%d) -- retrying in %.2fs",
+                attempt + 1, self.max_retries, delay,
+            )
+        raise RuntimeError(f"Embedding batch failed after {self.max_retries} retries")
@@ -0,0 +1,82 @@
+"""On-disk HTTP validator cache for repeat crawls.
+
+Keyed by URL, each entry keeps the validators the server sent (ETag,
+Last-Modified), the sitemap <lastmod> seen at fetch time, and the parsed
+page output (text, title).  That lets the crawler:
+
+  - skip the request entirely when the sitemap <lastmod> is unchanged;
+  - send If-None-Match / If-Modified-Since and reuse the parsed output
+    on 304 Not Modified.
+
+Entries not touched during a run are dropped on save, so pages removed from
+the sitemaps do not accumulate.
+"""
+
+import json
+import os
+from app.config import logger
+
+
+class HttpValidatorCache:
+    """URL -> {"etag", "last_modified", "lastmod", "text", "title"}."""
+
+    def __init__(self, entries: dict[str, dict] | None = None) -> None:
+        self._entries: dict[str, dict] = entries or {}
+        self._touched: set[str] = set()
+
+    @classmethod
+    def load(cls, path: str) -> "HttpValidatorCache":
+        """Load the cache file, or return an empty cache if missing/corrupt."""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            logger.warning("HTTP cache at '%s' is unreadable -- starting empty", path)
+            return cls()
+
+    def save(self, path: str) -> None:
+        """Persist entries touched in this run (atomic write)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        kept = {url: self._entries[url] for url in self._touched if url in self._entries}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(kept, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get(self, url: str) -> dict | None:
+        """Return the cached entry for ``url`` and mark it as still in use."""
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._touched.add(url)
+        return entry
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a revalidation."""
+        entry = self._entries.get(url) or {}
+        headers: dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        title: str,
+        etag: str | None,
+        last_modified: str | None,
+        lastmod: str | None,
+    ) -> None:
+        """Store validators and parsed output for a freshly fetched page."""
+        self._entries[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "lastmod": lastmod,
+            "text": text,
+            "title": title,
+        }
+        self._touched.add(url)
@@ -0,0 +1,167 @@
+"""FAISS index factory: index type, vector encoding and exact re-ranking.
+
+Ingestion always works on an exact IndexFlatL2 (LangChain's FAISS.delete
+relies on flat row shifting); ``build_index`` turns the final vectors into
+the index selected by Config.INDEX_TYPE / Config.INDEX_ENCODING right before
+it is saved, and ``tune_index`` applies the query-time knobs when the server
+loads it.
+
+    Flat      exact search, cost linear in the corpus
+    IVFFlat   k-means coarse quantizer (IVF_NLIST lists, IVF_NPROBE probed)
+    HNSW      graph search (HNSW_M links, HNSW_EF_SEARCH candidates)
+    IVFPQ     IVFFlat with the "pq" encoding
+
+Encodings (bytes per 1536-dim vector): float32 6144, float16 3072 (2x),
+int8 1536 (4x, scalar quantization), pq PQ_M (product quantization,
+64x at PQ_M=96).  Lossy encodings can keep the float32 vectors next to the
+index (vectors.npy, memory-mapped, never loaded whole) so RerankIndex can
+re-score the top RERANK_FACTOR * k candidates exactly.
+
+Corpora too small to train the requested index fall back to a simpler one.
+"""
+
+import math
+
+import faiss
+import numpy as np
+from app.config import Config, logger
+
+INDEX_TYPES = ("Flat", "IVFFlat", "HNSW", "IVFPQ")
+ENCODINGS = ("float32", "float16", "int8", "pq")
+
+# k-means wants ~39 training points per centroid; PQ trains 256 per sub-quantizer
+_POINTS_PER_CENTROID = 39
+_MIN_LISTS = 8
+
+
+def _nlist(n_rows: int) -> int:
+    nlist = Config.IVF_NLIST or int(4 * math.sqrt(n_rows))
+    return min(nlist, n_rows // _POINTS_PER_CENTROID)
+
+
+def _pq_m(dim: int) -> int:
+    """Largest sub-quantizer count <= Config.PQ_M that divides ``dim``."""
+    return max(m for m in range(1, min(Config.PQ_M, dim) + 1) if dim % m == 0)
+
+
+def is_lossy(index: faiss.Index) -> bool:
+    """Whether a built index stores codes that lose precision versus float32.
+
+    Decided from the index itself: small corpora fall back to Flat codecs
+    whatever type / encoding was requested.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    return not isinstance(index, (faiss.IndexFlat, faiss.IndexIVFFlat))
+
+
+def _codec(n_rows: int, dim: int, encoding: str) -> str:
+    if encoding == "float16":
+        return "SQfp16"
+    if encoding == "int8":
+        return "SQ8"
+    if encoding == "pq":
+        if n_rows >= 256 * _POINTS_PER_CENTROID:
+            return f"PQ{_pq_m(dim)}"
+        logger.info("%d vectors are too few to train PQ -- storing float32", n_rows)
+    return "Flat"
+
+
+def index_spec(n_rows: int, dim: int, index_type: str, encoding: str = "float32") -> str:
+    """faiss.index_factory description for this corpus size.
+
+    Raises:
+        ValueError: If ``index_type`` / ``encoding`` is not in INDEX_TYPES / ENCODINGS.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown INDEX_TYPE {index_type!r}; expected one of {INDEX_TYPES}")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown INDEX_ENCODING {encoding!r}; expected one of {ENCODINGS}")
+    if index_type == "IVFPQ":
+        index_type, encoding = "IVFFlat", "pq"
+
+    codec = _codec(n_rows, dim, encoding)
+    if index_type == "HNSW":
+        return f"HNSW{Config.HNSW_M}" + ("" if codec == "Flat" else f"_{codec}")
+    if index_type == "IVFFlat":
+        nlist = _nlist(n_rows)
+        if nlist >= _MIN_LISTS:
+            return f"IVF{nlist},{codec}"
+        logger.info("%d vectors are too few to train IVF -- using a flat index", n_rows)
+    return codec
+
+
+def build_index(vectors: np.ndarray, index_type: str, encoding: str = "float32") -> faiss.Index:
+    """Train (if needed) and fill an L2 index with ``vectors``.
+
+    Row order is preserved, so FAISS position i is still vectors[i].
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_rows, dim = vectors.shape
+    spec = index_spec(n_rows, dim, index_type, encoding)
+    index = faiss.index_factory(dim, spec, faiss.METRIC_L2)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+    codes = faiss.downcast_index(index.storage) if isinstance(index, faiss.IndexHNSW) else index
+    if isinstance(codes, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        # only useful for polysemous (Hamming) filtering, which we never use
+        codes.do_polysemous_training = False
+    if not index.is_trained:
+        logger.info("Training %s on %d vectors", spec, n_rows)
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def tune_index(index: "faiss.Index | RerankIndex", nprobe: int, ef_search: int) -> None:
+    """Set the query-time recall/latency knobs (no-op for Flat)."""
+    if isinstance(index, RerankIndex):
+        index = index.index
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+        return
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+
+
+def enable_reconstruct(index: "faiss.Index | RerankIndex") -> None:
+    """Let reconstruct_batch read stored vectors (IVF indexes need a direct map)."""
+    if isinstance(index, RerankIndex):
+        return
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass
+
+
+class RerankIndex:
+    """A quantized index whose top ``factor * k`` hits are re-scored in float32.
+
+    Provides the part of the faiss.Index interface the LangChain FAISS
+    store uses when searching (search, reconstruct, ntotal, d); the store
+    is read-only.
+    """
+
+    def __init__(self, index: faiss.Index, vectors: np.ndarray, factor: int) -> None:
+        self.index = index
+        self.vectors = vectors
+        self.factor = factor
+        self.ntotal = index.ntotal
+        self.d = index.d
+
+    def search(self, x: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        _, candidates = self.index.search(x, k * self.factor)
+        distances = np.full((len(x), k), np.inf, dtype=np.float32)
+        labels = np.full((len(x), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(x, candidates)):
+            ids = np.sort(ids[ids >= 0])  # ascending reads from the mmapped file
+            exact = ((self.vectors[ids] - query) ** 2).sum(axis=1)
+            best = np.argsort(exact)[:k]
+            distances[row, :len(best)] = exact[best]
+            labels[row, :len(best)] = ids[best]
+        return distances, labels
+
+    def reconstruct(self, i: int) -> np.ndarray:
+        return np.array(self.vectors[i], dtype=np.float32)
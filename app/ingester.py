@@ -1,33 +1,65 @@
 """Deep-crawl ingestion pipeline using Wix Sitemaps + PDF.
 
-Fetches sitemap XML, extracts URLs, then scrapes each page synchronously
-with requests + BeautifulSoup.  PyPDFLoader handles the presentation PDF.
-A custom _parse_page() strips nav/footer/script noise before chunking.
+Fetches the Config.SITEMAPS XML (sitemap indexes followed recursively,
+.xml.gz inflated), extracts and deduplicates the URLs, then scrapes the pages
+of every site concurrently with an asyncio crawler (httpx, app.crawler).
+PyPDFLoader handles the presentation PDF.  A custom _parse_page() strips
+nav/footer/script noise before chunking (one walk over the tree,
+precompiled regexes); the default "fast" Config.HTML_PARSER walks the lxml
+tree without building BeautifulSoup objects at all.
+
+Documents stream through bounded queues (fetch + parse -> chunk -> embed +
+index, see _IngestPipeline): early pages are embedded while later ones are
+still being crawled, and the index is committed batch by batch so an
+interrupted run resumes where it stopped.  Parsing and chunking are
+CPU-bound and run in a process pool of Config.PARSE_WORKERS workers.
 
 Safeguards against data pollution:
   - Static asset URLs (.jpg, .png, .svg, etc.) are rejected before fetching.
   - Content-Type must be text/html; binary responses are discarded.
   - Pages with < 200 chars of clean text are dropped (galleries, broken pages).
-  - Embeddings are sent in batches to avoid OpenAI 429 rate limits.
-
-Strategy Pattern: each data source has its own loader function returning
-list[Document] with standardized metadata (source, source_type, title).
+  - Chunks that nearly duplicate an indexed one (Wix boilerplate repeated
+    across pages) are dropped before embedding, see app.dedup.
+  - Embeddings are sent in token-sized, rate-limited batches to avoid
+    OpenAI 429s, and vectors already in the local embedding cache are
+    never re-requested.
+
+Re-runs are incremental: app.http_cache revalidates pages with ETag /
+Last-Modified and sitemap <lastmod>, and app.manifest keeps a content hash
+per document so only new or changed documents are re-chunked and re-embedded.
+
+Strategy Pattern: each data source has its own loader producing Documents
+with standardized metadata (source, source_type, title).
 """
 
+import argparse
+import asyncio
 import os
 import re
-import time
-import requests
-from bs4 import BeautifulSoup
+import zlib
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from urllib.parse import urldefrag
+import faiss
+import numpy as np
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from app.config import Config, get_embeddings, logger
-
-_HTTP_HEADERS = {
-    "User-Agent": "PromtiorBot/1.0 (+https://github.com/lochi011/promtior-ai-challenge)"
-}
+from lxml import etree
+from app.config import Config, get_embeddings, get_tokenizer, logger
+from app.crawler import AsyncCrawler
+from app.dedup import ChunkDeduplicator
+from app.docstore import DOCSTORE_FILE, load_index, load_vectors, save_index
+from app.embedding_cache import EmbeddingCache
+from app.embedding_scheduler import EmbeddingScheduler
+from app.http_cache import HttpValidatorCache
+from app.index_factory import build_index, is_lossy
+from app.keyword_index import KEYWORD_FILE, BM25Index
+from app.manifest import IngestManifest, document_hash, document_key, index_settings
 
 _STATIC_EXTENSIONS = frozenset([
     ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
@@ -37,43 +69,213 @@ _STATIC_EXTENSIONS = frozenset([
 ])
 
 _MIN_TEXT_LENGTH = 200
-_EMBED_BATCH_SIZE = 50
+_SEPARATORS = ["\n\n", "\n", ". ", ", ", " ", ""]
+_POOL_CHUNKSIZE = 4  # documents per worker task when chunking
+_GZIP_MAGIC = b"\x1f\x8b"
+_MAX_SITEMAP_BYTES = 50 * 2**20  # sitemaps.org limit for one (uncompressed) file
 
 
 # ---------------------------------------------------------------------------
 # Parsing & cleaning
 # ---------------------------------------------------------------------------
 
+# Subtrees whose text never reaches the index
+_SKIP_TAGS = frozenset(["nav", "footer", "header", "script", "style",
+                        "noscript", "iframe", "svg", "picture", "img"])
+# Content containers, in order of preference
+_CONTAINERS = ("main", "article", "body")
+_TEXT_TYPES = frozenset([NavigableString, CData])  # what get_text() keeps
+# get_text() also drops the strings inside these (TemplateString, RubyTextString, ...)
+_HIDDEN_TEXT_TAGS = frozenset(["template", "rt", "rp"])
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\ufeff"))
+_NOISE = re.compile(
+    r"top of page|bottom of page|Privacy Policy|Ancla \d+|cookie|suscri\w+",
+    re.IGNORECASE,
+)
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+
+def _visible_strings(soup: BeautifulSoup) -> tuple[list[str], dict[str, tuple[int, int]]]:
+    """One walk over the tree, skipping _SKIP_TAGS subtrees.
+
+    Returns the stripped, non-empty strings in document order and, per
+    container tag, the [start, end) range of strings inside its first
+    occurrence.
+    """
+    strings: list[str] = []
+    starts: dict[str, int] = {}
+    spans: dict[str, tuple[int, int]] = {}
+    stack: list = [soup]
+    while stack:
+        node = stack.pop()
+        if type(node) is str:
+            spans[node] = (starts[node], len(strings))  # end of a container
+        elif isinstance(node, Tag):
+            if node.name in _SKIP_TAGS:
+                continue
+            if node.name in _CONTAINERS and node.name not in starts:
+                starts[node.name] = len(strings)
+                stack.append(node.name)
+            stack.extend(reversed(node.contents))
+        elif type(node) in _TEXT_TYPES:
+            text = node.strip()
+            if text:
+                strings.append(text)
+    return strings, spans
+
+
 def _parse_page(soup: BeautifulSoup) -> str:
     """Extract clean text from a BeautifulSoup object.
 
-    Removes nav, footer, header, script, style, and noscript tags,
+    Skips nav, footer, header, script, style, and noscript subtrees,
     then extracts text from <main> or <article> if available,
     falling back to the full <body>.
     """
-    for tag in soup.find_all(["nav", "footer", "header", "script", "style",
-                              "noscript", "iframe", "svg", "picture"]):
-        tag.decompose()
+    return _clean_text(*_visible_strings(soup))
 
-    for img in soup.find_all("img"):
-        img.decompose()
 
-    main = soup.find("main") or soup.find("article") or soup.find("body")
-    if main is None:
+def _clean_text(strings: list[str], spans: dict[str, tuple[int, int]]) -> str:
+    """Join the strings of the preferred container and drop noise."""
+    span = next((spans[name] for name in _CONTAINERS if name in spans), None)
+    if span is None:
         return ""
 
-    text = main.get_text(separator="\n", strip=True)
+    text = "\n".join(strings[span[0]:span[1]]).translate(_ZERO_WIDTH)
+    text = _NOISE.sub("", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def _parse_html(html: str) -> tuple[str, str]:
+    """Return (cleaned_text, page_title) of an HTML page (pool worker)."""
+    soup = BeautifulSoup(html, "lxml")
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    return _parse_page(soup), title
+
 
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"[\u200b\u200c\u200d\ufeff]", "", text)
+def _append_stripped(strings: list[str], text: str | None) -> None:
+    if text and (text := text.strip()):
+        strings.append(text)
 
-    noise = [r"top of page", r"bottom of page", r"Privacy Policy",
-             r"Ancla \d+", r"cookie", r"suscri\w+"]
-    for pattern in noise:
-        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
 
-    text = re.sub(r"\n\s*\n", "\n\n", text)
-    return text.strip()
+def _element_strings(
+    element: etree._Element,
+    strings: list[str],
+    starts: dict[str, int],
+    spans: dict[str, tuple[int, int]],
+    hidden: bool = False,
+) -> None:
+    """_visible_strings over an lxml tree: own text, children, their tails."""
+    name = element.tag
+    if name in _SKIP_TAGS:
+        return
+    first = name in _CONTAINERS and name not in starts
+    if first:
+        starts[name] = len(strings)
+    hidden = hidden or name in _HIDDEN_TEXT_TAGS
+    if not hidden:
+        _append_stripped(strings, element.text)
+    for child in element:
+        if isinstance(child.tag, str):  # not a comment / processing instruction
+            _element_strings(child, strings, starts, spans, hidden)
+        if not hidden:
+            _append_stripped(strings, child.tail)
+    if first:
+        spans[name] = (starts[name], len(strings))
+
+
+def _parse_html_fast(html: str) -> tuple[str, str]:
+    """_parse_html straight from an lxml.etree tree (no BeautifulSoup objects).
+
+    Same text and title as _parse_html: the walk mirrors _visible_strings
+    and the cleaning is shared with _parse_page.
+    """
+    parser = etree.HTMLParser()
+    parser.feed(html)
+    root = parser.close()
+    if root is None:
+        return "", ""
+    strings: list[str] = []
+    spans: dict[str, tuple[int, int]] = {}
+    _element_strings(root, strings, {}, spans)
+    title = root.find(".//title")
+    return _clean_text(strings, spans), (title.text or "").strip() if title is not None else ""
+
+
+_HTML_PARSERS = {"soup": _parse_html, "fast": _parse_html_fast}
+
+
+def _html_parser() -> Callable[[str], tuple[str, str]]:
+    """The page parser selected by Config.HTML_PARSER (picklable, for the pool).
+
+    Raises:
+        ValueError: If Config.HTML_PARSER is not "soup" or "fast".
+    """
+    if Config.HTML_PARSER not in _HTML_PARSERS:
+        raise ValueError(
+            f"Unknown HTML_PARSER {Config.HTML_PARSER!r}; expected one of {tuple(_HTML_PARSERS)}"
+        )
+    return _HTML_PARSERS[Config.HTML_PARSER]
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_count(text: str) -> int:
+    """Tokens of ``text`` for the embedding model (memoized per process).
+
+    The splitter measures every piece when splitting and again when merging,
+    and separators / short sentences recur across pages.
+    """
+    return len(get_tokenizer().encode_ordinary(text))
+
+
+def _chunking() -> dict:
+    """_split_document keyword arguments for Config.CHUNK_UNIT.
+
+    Raises:
+        ValueError: If Config.CHUNK_UNIT is not "chars" or "tokens".
+    """
+    if Config.CHUNK_UNIT == "chars":
+        return {"chunk_size": Config.CHUNK_SIZE, "chunk_overlap": Config.CHUNK_OVERLAP}
+    if Config.CHUNK_UNIT == "tokens":
+        return {
+            "chunk_size": Config.CHUNK_TOKENS,
+            "chunk_overlap": Config.CHUNK_TOKEN_OVERLAP,
+            "length_function": _token_count,
+        }
+    raise ValueError(f"Unknown CHUNK_UNIT {Config.CHUNK_UNIT!r}; expected 'chars' or 'tokens'")
+
+
+def _split_document(
+    doc: Document,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len,
+) -> list[Document]:
+    """Chunks of one document (pool worker), sized by ``length_function``."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=_SEPARATORS,
+        length_function=length_function,
+    )
+    return splitter.split_documents([doc])
+
+
+@contextmanager
+def _worker_pool(workers: int) -> Iterator[Executor | None]:
+    """Process pool for parsing / chunking; None (work inline) for 1 worker."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield None
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        yield pool
+
+
+def _map(pool: Executor | None, func: Callable, items: list) -> list:
+    """``func`` over ``items`` in ``pool`` (or inline), in order."""
+    if pool is None:
+        return [func(item) for item in items]
+    return list(pool.map(func, items, chunksize=_POOL_CHUNKSIZE))
 
 
 def _is_static_asset(url: str) -> bool:
@@ -93,79 +295,218 @@ def _should_skip(url: str) -> bool:
 # Source loaders (Strategy Pattern)
 # ---------------------------------------------------------------------------
 
-def _extract_urls_from_sitemap(sitemap_url: str) -> list[str]:
-    """Fetch sitemap XML and return the list of <loc> URLs."""
+def _sitemap_xml(content: bytes) -> bytes:
+    """Sitemap bytes, gunzipped when served as a raw .xml.gz file.
+
+    Raises:
+        ValueError: If it inflates past _MAX_SITEMAP_BYTES (the sitemap limit).
+    """
+    if not content.startswith(_GZIP_MAGIC):
+        return content  # plain, or decoded by httpx (Content-Encoding: gzip)
+    inflater = zlib.decompressobj(wbits=31)
+    xml = inflater.decompress(content, _MAX_SITEMAP_BYTES)
+    if inflater.unconsumed_tail:
+        raise ValueError(f"gzip sitemap inflates past {_MAX_SITEMAP_BYTES} bytes")
+    return xml
+
+
+async def _extract_urls_from_sitemap(
+    crawler: AsyncCrawler, sitemap_url: str, visited: set[str] | None = None,
+) -> list[tuple[str, str | None]]:
+    """Fetch sitemap XML and return (<loc> URL, <lastmod> or None) pairs.
+
+    A <sitemapindex> is followed recursively (child sitemaps fetched
+    concurrently, each sitemap once even if listed twice or in a cycle);
+    the pairs come back in document order.
+    """
+    visited = set() if visited is None else visited
+    visited.add(sitemap_url)
+    resp = await crawler.get(sitemap_url)
+    if resp is None:
+        logger.error("Failed to fetch sitemap XML: %s", sitemap_url)
+        return []
     try:
-        resp = requests.get(sitemap_url, headers=_HTTP_HEADERS, timeout=15)
-        resp.raise_for_status()
-    except requests.RequestException:
-        logger.error("Failed to fetch sitemap XML: %s", sitemap_url, exc_info=True)
+        soup = BeautifulSoup(_sitemap_xml(resp.content), "lxml-xml")
+    except (ValueError, zlib.error):
+        logger.error("Unreadable sitemap: %s", sitemap_url, exc_info=True)
         return []
 
-    soup = BeautifulSoup(resp.content, "lxml-xml")
-    return [loc.text.strip() for loc in soup.find_all("loc")]
-
+    if soup.find("sitemapindex") is not None:
+        children = [loc.text.strip() for loc in soup.select("sitemap > loc")]
+        children = [url for url in dict.fromkeys(children) if url not in visited]
+        visited.update(children)
+        logger.info("  Sitemap index %s: %d child sitemaps", sitemap_url, len(children))
+        nested = await asyncio.gather(*(
+            _extract_urls_from_sitemap(crawler, url, visited) for url in children
+        ))
+        return [entry for entries in nested for entry in entries]
+
+    entries: list[tuple[str, str | None]] = []
+    for loc in soup.find_all("loc"):
+        lastmod = loc.parent.find("lastmod", recursive=False) if loc.parent else None
+        entries.append((loc.text.strip(), lastmod.text.strip() if lastmod else None))
+    return entries
+
+
+async def _fetch_page(
+    crawler: AsyncCrawler,
+    url: str,
+    http_cache: HttpValidatorCache,
+    lastmod: str | None = None,
+    pool: Executor | None = None,
+) -> tuple[str, str, bool]:
+    """Fetch a single page and return (cleaned_text, page_title, from_cache).
+
+    Pages whose sitemap <lastmod> matches the cached one are served from the
+    HTTP cache without a request; otherwise the request is conditional and
+    a 304 reuses the cached parse.  Validates Content-Type is text/html
+    before parsing, in ``pool`` when given (the event loop keeps fetching).
+    """
+    cached = http_cache.get(url)
+    if cached is not None and lastmod and cached["lastmod"] == lastmod:
+        logger.info("  UNCHANGED (lastmod %s): %s", lastmod, url)
+        return cached["text"], cached["title"], True
 
-def _fetch_page(url: str) -> tuple[str, str]:
-    """Fetch a single page and return (cleaned_text, page_title).
+    resp = await crawler.get(url, headers=http_cache.conditional_headers(url))
+    if resp is None:
+        return "", "", False
 
-    Validates Content-Type is text/html before parsing.
-    """
-    try:
-        resp = requests.get(url, headers=_HTTP_HEADERS, timeout=15)
-        resp.raise_for_status()
-    except requests.RequestException:
-        logger.warning("  Could not fetch: %s", url)
-        return "", ""
+    if resp.status_code == 304 and cached is not None:
+        logger.info("  NOT MODIFIED (304): %s", url)
+        cached["lastmod"] = lastmod
+        return cached["text"], cached["title"], True
 
     content_type = resp.headers.get("Content-Type", "")
     if "text/html" not in content_type:
         logger.info("  Skipping (not HTML, got %s): %s", content_type, url)
-        return "", ""
-
-    soup = BeautifulSoup(resp.text, "lxml")
-    title = soup.title.string.strip() if soup.title and soup.title.string else ""
-    return _parse_page(soup), title
-
-
-def _load_sitemap(sitemap_url: str, source_type: str) -> list[Document]:
-    """Load all pages from a sitemap using synchronous requests."""
-    logger.info("Loading sitemap: %s", sitemap_url)
-    urls = _extract_urls_from_sitemap(sitemap_url)
-    logger.info("  Found %d raw URLs in sitemap", len(urls))
-
-    cleaned: list[Document] = []
-    skipped_filter = 0
-    skipped_empty = 0
-
-    for url in urls:
-        if _should_skip(url):
-            logger.info("  SKIP (filtered): %s", url)
-            skipped_filter += 1
-            continue
-
-        text, page_title = _fetch_page(url)
-        if len(text) < _MIN_TEXT_LENGTH:
-            logger.info("  SKIP (< %d chars): %s", _MIN_TEXT_LENGTH, url)
-            skipped_empty += 1
-            continue
-
-        doc = Document(
-            page_content=text,
-            metadata={
-                "source": url,
-                "source_type": source_type,
-                "title": page_title or url.split("/")[-1] or "home",
-            },
+        return "", "", False
+
+    parse = _html_parser()
+    if pool is None:
+        text, title = parse(resp.text)
+    else:
+        text, title = await asyncio.get_running_loop().run_in_executor(
+            pool, parse, resp.text
         )
-        cleaned.append(doc)
-        logger.info("  OK: %s (%d chars)", url, len(text))
-
+    http_cache.put(
+        url, text, title,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+        lastmod=lastmod,
+    )
+    return text, title, False
+
+
+async def _crawl_sitemaps(
+    sitemaps: list[tuple[str, str]],
+    http_cache: HttpValidatorCache,
+    out: asyncio.Queue,
+    pool: Executor | None = None,
+) -> None:
+    """Crawl (sitemap URL, source_type) pairs, putting each cleaned page on ``out``.
+
+    All sitemaps share one crawler (connection pool + limits) and are
+    crawled concurrently, so several sites take about as long as the
+    slowest one.  Their URLs are collected first and deduplicated in
+    ``sitemaps`` order: a page listed by two sitemaps is fetched once, under
+    the first one's source_type.  Each sitemap then runs up to
+    Config.CRAWL_CONCURRENCY fetchers, which wait on ``out`` while it is
+    full, so a bounded queue also bounds the pages held in memory.  Pages
+    are parsed in ``pool`` when given.
+    """
+    async with AsyncCrawler(
+        concurrency=Config.CRAWL_CONCURRENCY,
+        per_host_limit=Config.CRAWL_PER_HOST_LIMIT,
+        timeout=Config.CRAWL_TIMEOUT,
+        pool_size=Config.CRAWL_POOL_SIZE,
+        retries=Config.CRAWL_RETRIES,
+        backoff=Config.CRAWL_BACKOFF,
+        http2=Config.CRAWL_HTTP2,
+    ) as crawler:
+        for sitemap_url, _ in sitemaps:
+            logger.info("Loading sitemap: %s", sitemap_url)
+        found = await asyncio.gather(*(
+            _extract_urls_from_sitemap(crawler, sitemap_url) for sitemap_url, _ in sitemaps
+        ))
+
+        claimed: set[str] = set()
+        crawls = []
+        for (sitemap_url, source_type), entries in zip(sitemaps, found):
+            logger.info("  Found %d raw URLs in sitemap %s", len(entries), sitemap_url)
+            to_fetch: list[tuple[str, str | None]] = []
+            counts = {"filtered": 0, "duplicate": 0}
+            for url, lastmod in entries:
+                url = urldefrag(url).url
+                if _should_skip(url):
+                    logger.info("  SKIP (filtered): %s", url)
+                    counts["filtered"] += 1
+                elif url in claimed:
+                    counts["duplicate"] += 1
+                else:
+                    claimed.add(url)
+                    to_fetch.append((url, lastmod))
+            crawls.append(_crawl_pages(
+                crawler, to_fetch, source_type, http_cache, out, pool, counts,
+            ))
+        await asyncio.gather(*crawls)
+    logger.info("Sitemap requests: %s", crawler.summary())
+
+
+async def _crawl_pages(
+    crawler: AsyncCrawler,
+    to_fetch: list[tuple[str, str | None]],
+    source_type: str,
+    http_cache: HttpValidatorCache,
+    out: asyncio.Queue,
+    pool: Executor | None,
+    counts: dict[str, int],
+) -> None:
+    """Fetch one sitemap's (URL, lastmod) pairs onto ``out`` (see _crawl_sitemaps)."""
+    pending = iter(to_fetch)
+    counts.update(loaded=0, empty=0, cached=0)
+
+    async def fetch() -> None:
+        for url, lastmod in pending:
+            text, page_title, cache_hit = await _fetch_page(crawler, url, http_cache, lastmod, pool)
+            counts["cached"] += cache_hit
+            if len(text) < _MIN_TEXT_LENGTH:
+                logger.info("  SKIP (< %d chars): %s", _MIN_TEXT_LENGTH, url)
+                counts["empty"] += 1
+                continue
+            await out.put(Document(
+                page_content=text,
+                metadata={
+                    "source": url,
+                    "source_type": source_type,
+                    "title": page_title or url.split("/")[-1] or "home",
+                },
+            ))
+            counts["loaded"] += 1
+            logger.info("  OK: %s (%d chars)", url, len(text))
+
+    fetchers = min(Config.CRAWL_CONCURRENCY, len(to_fetch))
+    await asyncio.gather(*(fetch() for _ in range(fetchers)))
     logger.info(
-        "Sitemap %s summary: %d loaded, %d filtered, %d empty/short",
-        source_type, len(cleaned), skipped_filter, skipped_empty,
+        "Sitemap %s summary: %d loaded, %d filtered, %d duplicate, %d empty/short, "
+        "%d unchanged (HTTP cache)",
+        source_type, counts["loaded"], counts["filtered"], counts["duplicate"],
+        counts["empty"], counts["cached"],
     )
-    return cleaned
+
+
+def _load_sitemap(
+    sitemap_url: str,
+    source_type: str,
+    http_cache: HttpValidatorCache,
+    pool: Executor | None = None,
+) -> list[Document]:
+    """All pages of a sitemap, in the order they were fetched."""
+    async def crawl() -> list[Document]:
+        out: asyncio.Queue = asyncio.Queue()
+        await _crawl_sitemaps([(sitemap_url, source_type)], http_cache, out, pool)
+        return [out.get_nowait() for _ in range(out.qsize())]
+
+    return asyncio.run(crawl())
 
 
 def _load_pdf(file_path: str) -> list[Document]:
@@ -187,25 +528,58 @@ def _load_pdf(file_path: str) -> list[Document]:
 
 
 # ---------------------------------------------------------------------------
-# Batched embedding (avoids OpenAI 429 rate limits)
+# Embedding (cache first, then the rate-limit-aware scheduler)
 # ---------------------------------------------------------------------------
 
-def _embed_in_batches(chunks: list[Document], batch_size: int = _EMBED_BATCH_SIZE) -> FAISS:
-    """Embed documents in batches with a pause between each to avoid 429s."""
-    embeddings = get_embeddings()
+async def _aembed_texts(
+    texts: list[str], cache: EmbeddingCache, scheduler: EmbeddingScheduler
+) -> list[list[float]]:
+    """Vectors for ``texts``, from the embedding cache or the API.
 
-    logger.info("Embedding batch 1/%d (%d docs)...",
-                (len(chunks) + batch_size - 1) // batch_size, len(chunks[:batch_size]))
-    vector_store = FAISS.from_documents(chunks[:batch_size], embeddings)
+    Only cache misses go to the API, through EmbeddingScheduler's
+    token-sized concurrent batches.
+    """
+    vectors = cache.get_many(texts)
+    missing = [n for n, vector in enumerate(vectors) if vector is None]
+    logger.info("Embedding %d chunks (%d cached)...", len(texts), len(texts) - len(missing))
+    if missing:
+        fresh = await scheduler.embed([texts[n] for n in missing])
+        cache.put_many([texts[n] for n in missing], fresh)
+        for n, vector in zip(missing, fresh):
+            vectors[n] = vector
+    return vectors
+
+
+def _embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        Config.EMBEDDING_CACHE_PATH, Config.EMBEDDING_MODEL, Config.requested_dimensions(),
+    )
 
-    for i in range(batch_size, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-        total_batches = (len(chunks) + batch_size - 1) // batch_size
-        logger.info("Embedding batch %d/%d (%d docs)...", batch_num, total_batches, len(batch))
-        time.sleep(1)
-        vector_store.add_documents(batch)
 
+def _embed_texts(texts: list[str]) -> list[list[float]]:
+    """Blocking ``_aembed_texts`` with its own cache connection and scheduler."""
+    cache = _embedding_cache()
+    try:
+        return asyncio.run(_aembed_texts(texts, cache, EmbeddingScheduler.from_config()))
+    finally:
+        cache.log_stats()
+        cache.close()
+
+
+def _add_embeddings(
+    chunks: list[Document],
+    ids: list[str],
+    vectors: list[list[float]],
+    vector_store: FAISS | None = None,
+) -> FAISS:
+    """Add embedded chunks to ``vector_store`` (or a new one)."""
+    text_embeddings = list(zip([doc.page_content for doc in chunks], vectors))
+    metadatas = [doc.metadata for doc in chunks]
+    if vector_store is None:
+        return FAISS.from_embeddings(
+            text_embeddings, get_embeddings(), metadatas=metadatas, ids=ids,
+        )
+    vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
     return vector_store
 
 
@@ -213,46 +587,287 @@ def _embed_in_batches(chunks: list[Document], batch_size: int = _EMBED_BATCH_SIZ
 # Ingestion orchestrator
 # ---------------------------------------------------------------------------
 
-def run_ingestion(file_path: str = Config.PDF_PATH) -> None:
-    """Deep-crawl sitemaps + PDF, chunk, embed, and persist FAISS index."""
+def _chunk_texts(vector_store: FAISS) -> list[str]:
+    """Chunk texts in FAISS position order."""
+    return [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[i]).page_content
+        for i in range(vector_store.index.ntotal)
+    ]
+
+
+def _load_index() -> FAISS | None:
+    """Load the persisted FAISS index for an incremental update, if any."""
+    if not os.path.exists(os.path.join(Config.INDEX_PATH, DOCSTORE_FILE)):
+        return None
+    vector_store = load_index(
+        Config.INDEX_PATH, get_embeddings(), use_mmap=False,
+        expected_metadata=Config.embedding_metadata(),
+    )
+    if not isinstance(vector_store.index, faiss.IndexFlat):
+        # ANN / quantized indexes cannot delete by position (and may be
+        # lossy): go back to an exact working index, from vectors.npy or
+        # refilled from the embedding cache
+        logger.info("Restoring exact vectors for %d chunks", vector_store.index.ntotal)
+        exact = load_vectors(Config.INDEX_PATH)
+        if exact is None or len(exact) != vector_store.index.ntotal:
+            exact = np.array(_embed_texts(_chunk_texts(vector_store)), dtype=np.float32)
+        vector_store.index = build_index(exact, "Flat")
+    return vector_store
+
+
+def _deduplicator(manifest: IngestManifest, vector_store: FAISS | None) -> ChunkDeduplicator:
+    """Near-duplicate filter seeded with every chunk already in the index."""
+    dedup = ChunkDeduplicator(Config.DEDUP_THRESHOLD)
+    if vector_store is not None:
+        for key, entry in manifest.documents.items():
+            for chunk_id in entry["chunk_ids"]:
+                chunk = vector_store.docstore.search(chunk_id)
+                if isinstance(chunk, Document):
+                    dedup.seed(chunk_id, key, chunk)
+    logger.info("Near-duplicate index seeded with %d chunks", len(dedup.index))
+    return dedup
+
+
+def _present(vector_store: FAISS | None, ids: list[str]) -> list[str]:
+    """The subset of ``ids`` stored in ``vector_store``."""
+    if vector_store is None:
+        return []
+    stored = set(vector_store.index_to_docstore_id.values())
+    return [chunk_id for chunk_id in ids if chunk_id in stored]
+
+
+# (key, hash, kept chunks, their ids, ids of the chunks the dropped ones
+# duplicate) of new / changed documents, committed together
+_Batch = list[tuple[str, str, list[Document], list[str], list[str]]]
+
+
+class _IngestPipeline:
+    """fetch + parse -> chunk -> embed + index, connected by bounded queues.
+
+    Each stage is a coroutine: the crawler keeps fetching (and the pool
+    parsing) while earlier pages are chunked and embedded.  Every batch of
+    about Config.INGEST_BATCH_CHUNKS chunks is committed: its documents'
+    stale vectors are replaced, and the (exact) index and the manifest are
+    saved together, so an interrupted run resumes after the last commit --
+    committed documents match the manifest and are not embedded again.
+    """
+
+    def __init__(
+        self,
+        manifest: IngestManifest,
+        vector_store: FAISS | None,
+        http_cache: HttpValidatorCache,
+        pool: Executor | None,
+    ) -> None:
+        self.manifest = manifest
+        self.vector_store = vector_store
+        self.http_cache = http_cache
+        self.pool = pool
+        self.dedup = _deduplicator(manifest, vector_store) if Config.DEDUP_THRESHOLD else None
+        self.seen: set[str] = set()
+        self.sources: dict[str, int] = {}
+        self.unchanged = 0
+        self.changed = 0
+        self.new_chunks = 0
+        self.commits = 0
+
+    async def run(self, pdf_docs: list[Document]) -> None:
+        documents: asyncio.Queue = asyncio.Queue(Config.INGEST_QUEUE_SIZE)
+        batches: asyncio.Queue = asyncio.Queue(2)
+        cache = _embedding_cache()
+        try:
+            await asyncio.gather(
+                self._fetch(documents, pdf_docs),
+                self._chunk(documents, batches),
+                self._index(batches, cache, EmbeddingScheduler.from_config()),
+            )
+        finally:
+            cache.log_stats()
+            cache.close()
+
+    async def _fetch(self, documents: asyncio.Queue, pdf_docs: list[Document]) -> None:
+        """Stage 1: crawled pages (parsed on arrival), then the PDF pages."""
+        await _crawl_sitemaps(Config.SITEMAPS, self.http_cache, documents, self.pool)
+        for doc in pdf_docs:
+            await documents.put(doc)
+        await documents.put(None)
+
+    async def _chunk(self, documents: asyncio.Queue, batches: asyncio.Queue) -> None:
+        """Stage 2: skip unchanged documents, split the rest into batches."""
+        split = partial(_split_document, **_chunking())
+        loop = asyncio.get_running_loop()
+        batch: _Batch = []
+        size = 0
+        while (doc := await documents.get()) is not None:
+            source_type = doc.metadata.get("source_type", "unknown")
+            self.sources[source_type] = self.sources.get(source_type, 0) + 1
+            key = document_key(doc)
+            if key in self.seen:
+                logger.info("  Duplicate document ignored: %s", key)
+                continue
+            self.seen.add(key)
+            digest = document_hash(doc)
+            if self.manifest.is_current(key, digest):
+                self.unchanged += 1
+                continue
+            self.changed += 1
+            chunks = split(doc) if self.pool is None else \
+                await loop.run_in_executor(self.pool, split, doc)
+            ids = [f"{digest[:16]}-{n}" for n in range(len(chunks))]
+            merged_into: list[str] = []
+            if self.dedup is not None:
+                chunks, ids, merged_into = self.dedup.filter(key, chunks, ids)
+            batch.append((key, digest, chunks, ids, merged_into))
+            size += len(chunks)
+            if size >= Config.INGEST_BATCH_CHUNKS > 0:
+                await batches.put(batch)
+                batch, size = [], 0
+        if batch:
+            await batches.put(batch)
+        await batches.put(None)
+
+    async def _index(
+        self, batches: asyncio.Queue, cache: EmbeddingCache, scheduler: EmbeddingScheduler
+    ) -> None:
+        """Stage 3: embed each batch, swap it into the index and commit."""
+        while (batch := await batches.get()) is not None:
+            ids = [chunk_id for _, _, _, doc_ids, _ in batch for chunk_id in doc_ids]
+            # the new ids are only present if a commit died between its two writes
+            stale_ids = _present(
+                self.vector_store, self.manifest.chunk_ids([key for key, *_ in batch]) + ids,
+            )
+            if stale_ids:
+                self.vector_store.delete(stale_ids)
+            chunks = [chunk for _, _, doc_chunks, _, _ in batch for chunk in doc_chunks]
+            if chunks:
+                vectors = await _aembed_texts([c.page_content for c in chunks], cache, scheduler)
+                self.vector_store = _add_embeddings(chunks, ids, vectors, self.vector_store)
+            for key, digest, _, doc_ids, merged_into in batch:
+                entry = {"hash": digest, "chunk_ids": doc_ids}
+                if merged_into:
+                    entry["merged_into"] = merged_into
+                self.manifest.documents[key] = entry
+            self.manifest.invalidate_merged(stale_ids)
+            self.new_chunks += len(chunks)
+            self.commits += 1
+            self.save(final=False)
+            logger.info(
+                "Committed batch %d: %d documents, %d chunks (%d replaced)",
+                self.commits, len(batch), len(chunks), len(stale_ids),
+            )
+
+    def save(self, final: bool) -> None:
+        """Persist index + manifest.
+
+        Batch commits save the exact working index; ``final`` builds the
+        configured index type and records it in the manifest.  Both rebuild the BM25 index, so a crash
+        mid-run still leaves hybrid search over the committed chunks.  Until
+        a batch has produced chunks there is no index: only the manifest is
+        written (and ignored on load without an index).
+        """
+        self.manifest.final_index = index_settings() if final else None
+        if self.vector_store is None:
+            os.makedirs(Config.INDEX_PATH, exist_ok=True)
+            self.manifest.save(Config.INDEX_PATH)
+            return
+        exact = None
+        if final and (Config.INDEX_TYPE != "Flat" or Config.INDEX_ENCODING != "float32"):
+            exact = self.vector_store.index.reconstruct_n(0, self.vector_store.index.ntotal)
+            self.vector_store.index = build_index(exact, Config.INDEX_TYPE, Config.INDEX_ENCODING)
+        # a batch commit's exact index needs no vectors.npy; an old one would
+        # no longer line up with the FAISS positions, so save_index drops it
+        keep_exact = exact is not None and Config.RERANK_FACTOR and is_lossy(self.vector_store.index)
+        save_index(
+            self.vector_store, Config.INDEX_PATH, exact if keep_exact else None,
+            metadata=Config.embedding_metadata(),
+            keyword_index=BM25Index.from_texts(_chunk_texts(self.vector_store)),
+        )
+        self.manifest.save(Config.INDEX_PATH)
+
 
-    # 1. Load from all sources
-    pages_docs = _load_sitemap(Config.PAGES_SITEMAP, "website")
-    blog_docs = _load_sitemap(Config.BLOG_SITEMAP, "blog")
+def run_ingestion(file_path: str = Config.PDF_PATH, full_rebuild: bool = False) -> None:
+    """Deep-crawl sitemaps + PDF, then chunk, embed, and index what changed.
+
+    Runs as a streaming pipeline (see _IngestPipeline) that commits the
+    index in batches; re-running after a crash picks up from the last
+    commit.  Unchanged documents (per the manifest content hash) keep their
+    vectors; ``full_rebuild`` ignores the manifest and HTTP cache,
+    re-fetching and re-embedding everything.
+    """
     pdf_docs = _load_pdf(file_path)
+    http_cache = (
+        HttpValidatorCache() if full_rebuild
+        else HttpValidatorCache.load(Config.HTTP_CACHE_PATH)
+    )
+    manifest = IngestManifest() if full_rebuild else IngestManifest.load(Config.INDEX_PATH)
+    vector_store = _load_index() if manifest.documents else None
+    if vector_store is None:
+        manifest = IngestManifest()
+
+    # 1-3. Crawl, chunk, embed and commit new / changed documents
+    with _worker_pool(Config.PARSE_WORKERS) as pool:
+        pipeline = _IngestPipeline(manifest, vector_store, http_cache, pool)
+        asyncio.run(pipeline.run(pdf_docs))
+    http_cache.save(Config.HTTP_CACHE_PATH)
 
-    all_docs = pages_docs + blog_docs + pdf_docs
     logger.info(
         "Total: %d pages + %d blog posts + %d PDF pages = %d documents",
-        len(pages_docs), len(blog_docs), len(pdf_docs), len(all_docs),
+        pipeline.sources.get("website", 0), pipeline.sources.get("blog", 0),
+        pipeline.sources.get("presentation", 0), sum(pipeline.sources.values()),
     )
-
-    if not all_docs:
+    if not pipeline.seen:
         logger.error("No documents loaded -- aborting ingestion")
         return
 
-    # 2. Split into chunks
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=Config.CHUNK_SIZE,
-        chunk_overlap=Config.CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", ", ", " ", ""],
-    )
-    chunks = splitter.split_documents(all_docs)
+    # 4. Drop documents that disappeared, then save the final index
+    removed = [key for key in manifest.documents if key not in pipeline.seen]
+    stale_ids = _present(pipeline.vector_store, manifest.chunk_ids(removed))
+    if stale_ids:
+        pipeline.vector_store.delete(stale_ids)
+        logger.info("Deleted %d stale vectors", len(stale_ids))
+    for key in removed:
+        del manifest.documents[key]
+    manifest.invalidate_merged(stale_ids)
+    if pipeline.dedup is not None:
+        pipeline.dedup.log_report()
+    stranded = [key for key, entry in manifest.documents.items() if not entry["hash"]]
+    if stranded:
+        logger.warning(
+            "%d documents had chunks merged into since-deleted chunks; "
+            "they are re-indexed on the next run", len(stranded),
+        )
     logger.info(
-        "Split into %d chunks (size=%d, overlap=%d)",
-        len(chunks), Config.CHUNK_SIZE, Config.CHUNK_OVERLAP,
+        "Manifest diff: %d new/changed, %d removed, %d unchanged documents",
+        pipeline.changed, len(removed), pipeline.unchanged,
     )
-
-    if len(chunks) > 2000:
+    if pipeline.new_chunks > 2000:
         logger.warning(
-            "Chunk count (%d) seems too high -- check URL filtering!", len(chunks)
+            "Chunk count (%d) seems too high -- check URL filtering!", pipeline.new_chunks
         )
 
-    # 3. Embed in batches and persist
-    vector_store = _embed_in_batches(chunks)
-    vector_store.save_local(Config.INDEX_PATH)
-    logger.info("FAISS index saved to '%s' (%d vectors)", Config.INDEX_PATH, len(chunks))
+    has_keyword_index = os.path.exists(os.path.join(Config.INDEX_PATH, KEYWORD_FILE))
+    if not pipeline.changed and not removed and has_keyword_index:
+        if manifest.index_is_final():
+            logger.info("Index is up to date -- nothing to embed")
+            return
+        logger.info("Index was not finalized (interrupted run?) -- rebuilding it")
+
+    if pipeline.vector_store is None:
+        logger.error("No chunks to index -- nothing saved")
+        return
+    pipeline.save(final=True)
+    logger.info(
+        "FAISS index saved to '%s' (%d vectors, %d newly embedded, %d batch commits)",
+        Config.INDEX_PATH, pipeline.vector_store.index.ntotal, pipeline.new_chunks,
+        pipeline.commits,
+    )
 
 
 if __name__ == "__main__":
-    run_ingestion()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build or update the FAISS index.")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="ignore the manifest and HTTP cache; re-fetch and re-embed everything "
+             "(to resume an interrupted --full run, re-run without --full)",
+    )
+    run_ingestion(full_rebuild=parser.parse_args().full)
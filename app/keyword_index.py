@@ -0,0 +1,229 @@
+"""BM25 keyword index over the chunks, fused with dense search (RRF).
+
+Dense search misses exact tokens the embedding model has no sense of, such
+as client names ("CIEMSA", "Paigo").  Ingestion therefore also writes
+``bm25.npz`` next to index.faiss: an inverted index over the same chunks,
+addressed by FAISS position like docstore.bin (no pickle):
+
+  - terms: sorted vocabulary, newline-separated UTF-8;
+  - offsets / postings / freqs: CSR postings lists (term -> positions, tf);
+  - lengths: chunk lengths in terms.
+
+HybridRetriever ranks the chunks with both searches and fuses the two
+rankings with reciprocal rank fusion (sum of 1 / (RRF_K + rank)).  Short
+keyword queries (no stopwords, every term indexed) are answered from BM25
+alone, without embedding the question.  Either ranking can be diversified
+(MMR, per-source cap) before the top k are returned; see app.diversity.
+"""
+
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import run_in_executor
+from pydantic import ConfigDict
+
+from app.diversity import diversify
+
+KEYWORD_FILE = "bm25.npz"
+
+_WORD = re.compile(r"\w+")
+# PDF text runs words together ("HandyPaigo"): split at lower -> upper
+_CAMEL = re.compile(r"(?<=[a-zà-ÿ])(?=[A-Z])")
+
+# English + Spanish function words (the site and the PDF mix both)
+_STOPWORDS = frozenset("""
+a about an and are as at be by can could did do does for from has have how i in
+is it its me of on or our tell that the their this to was we what when where
+which who why will with you your
+al con como cual cuales cuando de del donde el en es esta este la las lo los
+mas para por que quien quienes se sobre son su sus un una y
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Case- and accent-folded words of ``text``."""
+    folded = _CAMEL.sub(" ", text).casefold()
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded)
+        folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _WORD.findall(folded)
+
+
+class BM25Index:
+    """Okapi BM25 over chunks numbered by FAISS position."""
+
+    def __init__(
+        self,
+        terms: list[str],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        freqs: np.ndarray,
+        lengths: np.ndarray,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.freqs = freqs
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        # per-chunk part of the BM25 denominator
+        average = float(lengths.mean()) if len(lengths) else 1.0
+        self._norm = k1 * (1 - b + b * lengths / (average or 1.0))
+
+    @classmethod
+    def from_texts(cls, texts: list[str]) -> "BM25Index":
+        """Index ``texts``; text i is FAISS position i."""
+        postings: dict[str, list[tuple[int, int]]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for position, text in enumerate(texts):
+            words = [w for w in tokenize(text) if w not in _STOPWORDS]
+            lengths[position] = len(words)
+            for word, count in Counter(words).items():
+                postings.setdefault(word, []).append((position, count))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[t]) for t in terms])
+        pairs = np.array([p for t in terms for p in postings[t]], dtype=np.int64).reshape(-1, 2)
+        return cls(
+            terms, offsets,
+            pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.float32), lengths,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as arrays:
+            terms = arrays["terms"].tobytes().decode("utf-8")
+            return cls(
+                terms.split("\n") if terms else [],
+                *(arrays[name] for name in ("offsets", "postings", "freqs", "lengths")),
+            )
+
+    def save(self, path: str) -> None:
+        terms = np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8)
+        with open(path, "wb") as f:
+            np.savez(
+                f, terms=terms, offsets=self.offsets, postings=self.postings,
+                freqs=self.freqs, lengths=self.lengths,
+            )
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def is_keyword_query(self, query: str, max_terms: int) -> bool:
+        """At most ``max_terms`` words, no stopwords, all of them indexed."""
+        words = tokenize(query)
+        return 0 < len(words) <= max_terms and all(
+            w not in _STOPWORDS and w in self._term_ids for w in words
+        )
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Top ``k`` (position, score) pairs; chunks matching no term are left out."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        for word in set(tokenize(query)) - _STOPWORDS:
+            term = self._term_ids.get(word)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            positions, tf = self.postings[start:end], self.freqs[start:end]
+            idf = math.log(1 + (len(self) - len(positions) + 0.5) / (len(positions) + 0.5))
+            scores[positions] += idf * tf * (self.k1 + 1) / (tf + self._norm[positions])
+        matched = np.flatnonzero(scores)
+        best = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return [(int(p), float(scores[p])) for p in best]
+
+
+def load_keyword_index(index_path: str, count: int) -> BM25Index | None:
+    """The persisted BM25 index, or None if the index predates it.
+
+    Raises:
+        ValueError: If it does not cover the ``count`` chunks of index.faiss.
+    """
+    path = os.path.join(index_path, KEYWORD_FILE)
+    if not os.path.exists(path):
+        return None
+    index = BM25Index.load(path)
+    if len(index) != count:
+        raise ValueError(f"{KEYWORD_FILE} has {len(index)} chunks for {count} vectors")
+    return index
+
+
+def fused_scores(rankings: list[list[int]], rrf_k: int) -> list[tuple[int, float]]:
+    """(position, sum of 1 / (rrf_k + rank) over ``rankings``), best first."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking, start=1):
+            scores[position] = scores.get(position, 0.0) + 1 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], rrf_k: int) -> list[int]:
+    """Positions ordered by sum of 1 / (rrf_k + rank) over ``rankings``."""
+    return [position for position, _ in fused_scores(rankings, rrf_k)]
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense FAISS + BM25 retrieval fused with reciprocal rank fusion."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: FAISS
+    keyword_index: BM25Index
+    k: int = 5
+    candidates: int = 20
+    rrf_k: int = 60
+    keyword_only_max_terms: int = 3
+    # Diversity (app.diversity): MMR weight (1 = plain ranking) and per-source cap
+    lambda_mult: float = 1.0
+    max_per_source: int = 0
+
+    def is_keyword_query(self, query: str) -> bool:
+        """Whether ``query`` is served by BM25 alone (no embedding call)."""
+        return self.keyword_index.is_keyword_query(query, self.keyword_only_max_terms)
+
+    def _dense(self, embedding: list[float]) -> list[int]:
+        query = np.array([embedding], dtype=np.float32)
+        _, positions = self.vector_store.index.search(query, self.candidates)
+        return [int(p) for p in positions[0] if p >= 0]
+
+    def _documents(self, ranked: list[tuple[int, float]]) -> list[Document]:
+        if self.lambda_mult < 1 or self.max_per_source:
+            return diversify(
+                self.vector_store, ranked, self.k, self.lambda_mult, self.max_per_source,
+            )
+        store = self.vector_store
+        docs = [store.docstore.search(store.index_to_docstore_id[p]) for p, _ in ranked[:self.k]]
+        return [doc for doc in docs if isinstance(doc, Document)]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        keyword = self.keyword_index.search(query, self.candidates)
+        if keyword and self.is_keyword_query(query):
+            return self._documents(keyword)
+        dense = self._dense(self.vector_store.embeddings.embed_query(query))
+        return self._documents(fused_scores([dense, [p for p, _ in keyword]], self.rrf_k))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        keyword = self.keyword_index.search(query, self.candidates)
+        if keyword and self.is_keyword_query(query):
+            return self._documents(keyword)
+        embedding = await self.vector_store.embeddings.aembed_query(query)
+        dense = await run_in_executor(None, self._dense, embedding)
+        return self._documents(fused_scores([dense, [p for p, _ in keyword]], self.rrf_k))
@@ -0,0 +1,144 @@
+"""Persisted ingestion manifest for incremental re-indexing.
+
+The manifest maps every ingested document (a web page URL or a single PDF
+page) to the sha256 of its content + metadata and to the ids of the chunks
+it produced.  Chunk ids double as docstore ids in the FAISS vector store,
+which keeps its own chunk-id -> vector-row map, so they are all we need to
+delete a page's vectors.
+
+A re-run diffs the freshly loaded documents against the manifest and only
+touches what changed:
+
+  - new / changed documents are chunked and embedded;
+  - documents that disappeared have their vectors deleted;
+  - unchanged documents (and their vectors) are left alone.
+
+If the chunking, embedding or index settings changed since the last run,
+the manifest is discarded and the index is rebuilt from scratch.  The
+manifest also records the index settings the saved index was last
+finalized with: batch commits save the exact working index, so a run that
+died before its final save leaves it unset and the next run finalizes the
+index even when no document changed.
+"""
+
+import hashlib
+import json
+import os
+from langchain_core.documents import Document
+from app.config import Config, logger
+
+MANIFEST_FILE = "manifest.json"
+
+
+def document_key(doc: Document) -> str:
+    """Stable identity of a source document: URL, or PDF path + page."""
+    source = doc.metadata.get("source", "unknown")
+    if "page" in doc.metadata:
+        return f"{source}#page={doc.metadata['page']}"
+    return source
+
+
+def document_hash(doc: Document) -> str:
+    """sha256 over the text and metadata, so title changes re-index too."""
+    payload = json.dumps(
+        {"text": doc.page_content, "metadata": doc.metadata},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def index_settings() -> list[object]:
+    """Index type, encoding and build knobs of the final (served) index."""
+    return [
+        Config.INDEX_TYPE, Config.IVF_NLIST, Config.HNSW_M,
+        Config.HNSW_EF_CONSTRUCTION, Config.PQ_M,
+        Config.INDEX_ENCODING, bool(Config.RERANK_FACTOR),
+        Config.embedding_metadata().get("embedding_dimensions"),
+    ]
+
+
+def _settings() -> dict[str, object]:
+    """Settings that force a full rebuild when they change."""
+    return {
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "embedding_dimensions": Config.requested_dimensions(),
+        "chunk_unit": Config.CHUNK_UNIT,
+        "chunk_size": Config.CHUNK_SIZE,
+        "chunk_overlap": Config.CHUNK_OVERLAP,
+        "chunk_tokens": [Config.CHUNK_TOKENS, Config.CHUNK_TOKEN_OVERLAP],
+        "dedup_threshold": Config.DEDUP_THRESHOLD,
+        "index": index_settings(),
+    }
+
+
+class IngestManifest:
+    """Document key -> {"hash": ..., "chunk_ids": [...]} plus build settings.
+
+    ``chunk_ids`` are the indexed chunks only; chunks dropped as near-
+    duplicates are recorded as the ids they duplicate, in "merged_into".
+    ``final_index`` is the index_settings() of the last final save, None
+    after a batch commit.
+    """
+
+    def __init__(
+        self, documents: dict[str, dict] | None = None, final_index: list | None = None,
+    ) -> None:
+        self.documents: dict[str, dict] = documents or {}
+        self.final_index = final_index
+
+    @classmethod
+    def load(cls, index_path: str) -> "IngestManifest":
+        """Load the manifest, or return an empty one if missing or stale."""
+        path = os.path.join(index_path, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("settings") != _settings():
+            logger.info("Ingestion settings changed since last run -- full rebuild")
+            return cls()
+        return cls(data.get("documents", {}), data.get("final_index"))
+
+    def save(self, index_path: str) -> None:
+        """Write atomically so a crash never leaves a half-written manifest."""
+        path = os.path.join(index_path, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"settings": _settings(), "documents": self.documents,
+                 "final_index": self.final_index},
+                f, ensure_ascii=False, indent=1, sort_keys=True,
+            )
+        os.replace(tmp_path, path)
+
+    def index_is_final(self) -> bool:
+        """Whether the saved index was finalized with the configured settings."""
+        return self.final_index == index_settings()
+
+    def is_current(self, key: str, digest: str) -> bool:
+        """Whether document ``key`` is indexed with content hash ``digest``."""
+        entry = self.documents.get(key)
+        return entry is not None and entry["hash"] == digest
+
+    def chunk_ids(self, keys: list[str]) -> list[str]:
+        """Chunk ids currently stored for the given document keys."""
+        return [
+            chunk_id
+            for key in keys if key in self.documents
+            for chunk_id in self.documents[key]["chunk_ids"]
+        ]
+
+    def invalidate_merged(self, deleted_ids: list[str]) -> list[str]:
+        """Mark stale the documents with chunks merged into ``deleted_ids``.
+
+        Their hash is cleared so they are re-chunked (later in this run, or
+        on the next one) instead of silently losing that text.
+        """
+        deleted = set(deleted_ids)
+        keys = [
+            key for key, entry in self.documents.items()
+            if deleted.intersection(entry.get("merged_into", ()))
+        ]
+        for key in keys:
+            self.documents[key]["hash"] = ""
+        return keys
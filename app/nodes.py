@@ -2,12 +2,26 @@
 """LangGraph node definitions for the Promtior Bionic Agent.
 
 Each node is a pure function: (AgentState) -> partial state dict.
-The retrieve node carries source metadata so the generate node can cite.
+Nodes that wait on OpenAI also have an async twin (``a``-prefixed) that
+awaits the retriever / LLM, so LangServe's async endpoints keep requests on
+the event loop instead of parking a threadpool thread per request.
+The retrieve node carries source metadata so the generate node can cite,
+and packs the chunks into a token budget (app.context_packer).
+The cache nodes short-circuit repeated questions via app.answer_cache;
+keyword queries that the hybrid retriever answers from BM25 alone are only
+matched exactly there, so they never wait on an embedding.
+Answer text is also pushed to LangGraph's "custom" stream as {"answer": delta}
+so the served runnable can stream tokens (see agent.py).
 """
 
 from typing_extensions import TypedDict
-from langchain_core.messages import SystemMessage, HumanMessage
-from app.config import get_llm, get_retriever, logger
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from langgraph.config import get_stream_writer
+from app.answer_cache import get_answer_cache
+from app.config import Config, get_llm, get_query_embeddings, get_retriever, logger
+from app.context_packer import pack_context, prompt_tokens
+from app.keyword_index import HybridRetriever
 
 
 # ---------------------------------------------------------------------------
@@ -72,54 +86,126 @@ when there is relevant data available.
 # Nodes
 # ---------------------------------------------------------------------------
 
-def retrieve_node(state: AgentState) -> dict[str, str]:
-    """Search the FAISS knowledge base and return context with source tags."""
-    logger.info("RETRIEVE node - query: %s", state["question"])
+def _is_keyword_query(question: str) -> bool:
     retriever = get_retriever()
-    docs = retriever.invoke(state["question"])
+    return isinstance(retriever, HybridRetriever) and retriever.is_keyword_query(question)
 
-    tagged_chunks: list[str] = []
-    source_labels: list[str] = []
-    for doc in docs:
-        source_type = doc.metadata.get("source_type", "unknown")
-        source_url = doc.metadata.get("source", "unknown")
-        label = f"[{source_type}: {source_url}]"
-        tagged_chunks.append(f"{label}\n{doc.page_content}")
-        if label not in source_labels:
-            source_labels.append(label)
 
-    context = "\n\n---\n\n".join(tagged_chunks)
-    sources = ", ".join(source_labels)
-    logger.info("RETRIEVE node - %d chunks from sources: %s", len(docs), sources)
-    return {"context": context, "sources": sources}
+def cache_lookup_node(state: AgentState) -> dict[str, str]:
+    """Answer from the semantic answer cache when possible (skips RAG)."""
+    question = state["question"]
+    embed = None if _is_keyword_query(question) else get_query_embeddings().embed_query
+    return _cache_hit(state, get_answer_cache().lookup(question, embed))
 
 
-def generate_node(state: AgentState) -> dict[str, str]:
-    """Generate a grounded answer using XML-tagged context and CoT reasoning."""
-    logger.info("GENERATE node - building prompt")
+async def acache_lookup_node(state: AgentState) -> dict[str, str]:
+    """Async cache_lookup_node: the question embedding is awaited."""
+    question = state["question"]
+    aembed = None if _is_keyword_query(question) else get_query_embeddings().aembed_query
+    return _cache_hit(state, await get_answer_cache().alookup(question, aembed))
+
+
+def _cache_hit(state: AgentState, answer: str | None) -> dict[str, str]:
+    if answer is None:
+        return {}
+    logger.info("CACHE node - hit for: %s", state["question"])
+    get_stream_writer()({"answer": answer})
+    return {"answer": answer}
 
-    if not state["context"].strip():
-        logger.warning("GENERATE node - empty context, returning fallback")
-        return {
-            "answer": (
-                "I couldn't find specific information about that in the Promtior "
-                "knowledge base. Please try rephrasing your question or ask "
-                "about Promtior's services, founders, or case studies."
-            )
-        }
 
-    llm = get_llm()
+def cache_store_node(state: AgentState) -> dict[str, str]:
+    """Remember a grounded answer for future lookups."""
+    if state["context"].strip():
+        get_answer_cache().store(state["question"], state["answer"])
+    return {}
+
+
+def retrieve_node(state: AgentState) -> dict[str, str]:
+    """Search the knowledge base (dense or hybrid) and return context with source tags."""
+    logger.info("RETRIEVE node - query: %s", state["question"])
+    docs = get_retriever().invoke(state["question"])
+    return _format_context(docs)
+
+
+async def aretrieve_node(state: AgentState) -> dict[str, str]:
+    """Async retrieve_node (``retriever.ainvoke``)."""
+    logger.info("RETRIEVE node - query: %s", state["question"])
+    docs = await get_retriever().ainvoke(state["question"])
+    return _format_context(docs)
+
+
+def _format_context(docs: list[Document]) -> dict[str, str]:
+    """Pack retrieved chunks into the tagged, token-budgeted context and the source list."""
+    packed = pack_context(docs, Config.CONTEXT_TOKEN_BUDGET, Config.CONTEXT_MIN_TRUNCATED_TOKENS)
+    logger.info(
+        "RETRIEVE node - %d chunks -> %d passages (%d merged, %d dropped%s), "
+        "%d context tokens from sources: %s",
+        packed.chunks, packed.passages, packed.merged, packed.dropped,
+        ", last truncated" if packed.truncated else "", packed.tokens, packed.sources,
+    )
+    return {"context": packed.context, "sources": packed.sources}
 
+
+FALLBACK_ANSWER: str = (
+    "I couldn't find specific information about that in the Promtior "
+    "knowledge base. Please try rephrasing your question or ask "
+    "about Promtior's services, founders, or case studies."
+)
+
+
+def _build_messages(state: AgentState) -> list[BaseMessage]:
+    """System prompt plus the XML-tagged context and question."""
     user_message = (
         f"<context>\n{state['context']}\n</context>\n\n"
         f"<question>\n{state['question']}\n</question>"
     )
-
-    messages = [
+    return [
         SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=user_message),
     ]
 
-    response = llm.invoke(messages)
-    logger.info("GENERATE node - answer length: %d chars", len(response.content))
-    return {"answer": response.content}
\ No newline at end of file
+
+def generate_node(state: AgentState) -> dict[str, str]:
+    """Generate a grounded answer using XML-tagged context and CoT reasoning.
+
+    Tokens are streamed to the graph's custom stream as they arrive; the
+    returned state still holds the full answer.
+    """
+    logger.info("GENERATE node - building prompt")
+    writer = get_stream_writer()
+
+    if not state["context"].strip():
+        logger.warning("GENERATE node - empty context, returning fallback")
+        writer({"answer": FALLBACK_ANSWER})
+        return {"answer": FALLBACK_ANSWER}
+
+    messages = _build_messages(state)
+    logger.info("GENERATE node - prompt: %d tokens", prompt_tokens(messages))
+    answer = ""
+    for chunk in get_llm().stream(messages):
+        if chunk.content:
+            writer({"answer": chunk.content})
+            answer += chunk.content
+    logger.info("GENERATE node - answer length: %d chars", len(answer))
+    return {"answer": answer}
+
+
+async def agenerate_node(state: AgentState) -> dict[str, str]:
+    """Async generate_node (``llm.astream``), streaming tokens the same way."""
+    logger.info("GENERATE node - building prompt")
+    writer = get_stream_writer()
+
+    if not state["context"].strip():
+        logger.warning("GENERATE node - empty context, returning fallback")
+        writer({"answer": FALLBACK_ANSWER})
+        return {"answer": FALLBACK_ANSWER}
+
+    messages = _build_messages(state)
+    logger.info("GENERATE node - prompt: %d tokens", prompt_tokens(messages))
+    answer = ""
+    async for chunk in get_llm().astream(messages):
+        if chunk.content:
+            writer({"answer": chunk.content})
+            answer += chunk.content
+    logger.info("GENERATE node - answer length: %d chars", len(answer))
+    return {"answer": answer}
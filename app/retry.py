@@ -0,0 +1,23 @@
+"""Retry timing shared by the crawler and the embedding scheduler."""
+
+import random
+from collections.abc import Mapping
+
+MAX_BACKOFF = 30.0
+
+
+def retry_after(headers: Mapping[str, str]) -> float | None:
+    """Server-requested delay in seconds from retry-after-ms / retry-after."""
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+def backoff(attempt: int, base: float = 0.5) -> float:
+    """Exponential backoff from ``base`` seconds with full jitter, capped at MAX_BACKOFF."""
+    return random.uniform(0, min(MAX_BACKOFF, base * 2 ** attempt))
@@ -4,7 +4,8 @@ import os
 
 from fastapi import FastAPI
 from langserve import add_routes
-from app.agent import agent_executor
+from app.agent import agent_runnable
+from app.answer_cache import get_answer_cache
 
 app = FastAPI(
     title="Promtior Bionic API",
@@ -12,7 +13,7 @@ app = FastAPI(
     description="Professional Agentic RAG for Promtior Challenge",
 )
 
-add_routes(app, agent_executor, path="/agent")
+add_routes(app, agent_runnable, path="/agent")
 
 
 @app.get("/health")
@@ -21,6 +22,12 @@ async def health() -> dict[str, str]:
     return {"status": "bionic_online"}
 
 
+@app.get("/metrics/answer-cache")
+async def answer_cache_metrics() -> dict[str, int | float]:
+    """Hit/miss counters and hit rate of the semantic answer cache."""
+    return get_answer_cache().stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
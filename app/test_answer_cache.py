@@ -0,0 +1,80 @@
+"""Offline tests for the semantic answer cache."""
+
+import re
+
+import numpy as np
+
+from app.answer_cache import AnswerCache
+
+
+def _embed(question: str) -> list[float]:
+    """Toy embedding: bag of known words, so paraphrases land close together."""
+    vocab = ["who", "founded", "promtior", "services", "offer", "clients", "the"]
+    words = re.findall(r"\w+", question.lower())
+    return [float(words.count(w)) for w in vocab] + [0.1]
+
+
+def _cache(**kwargs) -> AnswerCache:
+    return AnswerCache(**{"threshold": 0.95, "ttl_seconds": 60, "max_size": 8,
+                          "version": lambda: "v1", **kwargs})
+
+
+def test_exact_hit_skips_embedding() -> None:
+    """A normalized exact match is served without calling the embedder."""
+    cache = _cache()
+    assert cache.lookup("Who founded Promtior?", _embed) is None
+    cache.store("Who founded Promtior?", "Emiliano and Ignacio")
+
+    def fail(_: str) -> list[float]:
+        raise AssertionError("embedding should not be needed")
+
+    assert cache.lookup("  who FOUNDED   promtior? ", fail) == "Emiliano and Ignacio"
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_hit_respects_threshold() -> None:
+    """Paraphrases above the threshold hit; unrelated questions miss."""
+    cache = _cache()
+    cache.lookup("Who founded Promtior?", _embed)
+    cache.store("Who founded Promtior?", "Emiliano and Ignacio")
+
+    assert cache.lookup("Promtior: who founded it?", _embed) == "Emiliano and Ignacio"
+    assert cache.lookup("What services does Promtior offer?", _embed) is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 2)
+    assert np.isclose(stats["hit_rate"], 1 / 3)
+
+
+def test_ttl_lru_and_index_version_invalidate() -> None:
+    """Expired, evicted and pre-reingestion entries are never served."""
+    cache = _cache(ttl_seconds=-1)
+    cache.lookup("Who founded Promtior?", _embed)
+    cache.store("Who founded Promtior?", "old")
+    assert cache.lookup("Who founded Promtior?", _embed) is None
+
+    cache = _cache(max_size=1)
+    for question in ("who founded promtior", "what services offer"):
+        cache.lookup(question, _embed)
+        cache.store(question, question.upper())
+    assert cache.stats()["size"] == 1
+    assert cache.lookup("what services offer", _embed) == "WHAT SERVICES OFFER"
+
+    version = ["v1"]
+    cache = _cache(version=lambda: version[0])
+    cache.lookup("who founded promtior", _embed)
+    cache.store("who founded promtior", "answer")
+    version[0] = "v2"
+    assert cache.lookup("who founded promtior", _embed) is None
+
+
+def test_keyword_questions_use_the_exact_tier_only() -> None:
+    """Without an embedder a question is matched exactly and never semantically."""
+    cache = _cache()
+    assert cache.lookup("CIEMSA", None) is None
+    cache.store("CIEMSA", "A Promtior client")
+    cache.lookup("Who founded Promtior?", _embed)
+    cache.store("Who founded Promtior?", "Emiliano and Ignacio")
+
+    assert cache.lookup("ciemsa", None) == "A Promtior client"
+    assert cache.lookup("Promtior: who founded it?", _embed) == "Emiliano and Ignacio"
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,74 @@
+"""Offline check that the async graph path never blocks on sync I/O."""
+
+import asyncio
+import itertools
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app import nodes
+from app.agent import agent_runnable
+from app.answer_cache import get_answer_cache
+
+_LATENCY = 0.1
+
+
+class _AsyncOnlyModel(GenericFakeChatModel):
+    """Fake chat model whose sync path fails; the async path sleeps per token."""
+
+    def _stream(self, *args, **kwargs):
+        raise AssertionError("sync LLM path used")
+
+    async def _astream(self, *args, **kwargs):
+        for chunk in super()._stream(*args, **kwargs):
+            await asyncio.sleep(_LATENCY / 10)
+            yield chunk
+
+
+class _AsyncOnlyRetriever:
+    def invoke(self, question: str) -> list[Document]:
+        raise AssertionError("sync retriever path used")
+
+    async def ainvoke(self, question: str) -> list[Document]:
+        await asyncio.sleep(_LATENCY)
+        return [Document(page_content="Promtior was founded in 2023.",
+                         metadata={"source": "https://www.promtior.ai", "source_type": "website"})]
+
+
+class _AsyncOnlyEmbeddings(Embeddings):
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        raise AssertionError("sync embeddings path used")
+
+    def embed_query(self, text: str) -> list[float]:
+        raise AssertionError("sync embeddings path used")
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return [float(len(text)), 1.0, 0.0]
+
+
+@pytest.mark.usefixtures("byte_tokenizer")
+def test_async_path_runs_requests_concurrently(monkeypatch) -> None:
+    answer = "Promtior was founded in May 2023 by Emiliano Chinelli and Ignacio Acuña."
+    llm = _AsyncOnlyModel(messages=itertools.cycle([AIMessage(content=answer)]))
+    monkeypatch.setattr(nodes, "get_llm", lambda: llm)
+    get_answer_cache.cache_clear()
+    monkeypatch.setattr(nodes, "get_retriever", lambda: _AsyncOnlyRetriever())
+    monkeypatch.setattr(nodes, "get_query_embeddings", lambda: _AsyncOnlyEmbeddings())
+
+    async def run(n: int) -> list[dict]:
+        return await asyncio.gather(*(
+            agent_runnable.ainvoke({"question": f"Async test {i}: when was Promtior founded?"})
+            for i in range(n)
+        ))
+
+    start = time.perf_counter()
+    results = asyncio.run(run(100))
+    elapsed = time.perf_counter() - start
+
+    assert results == [{"answer": answer}] * 100
+    # Serialized, 100 requests would take > 100 * 2 * _LATENCY = 20s.
+    assert elapsed < 20 * _LATENCY
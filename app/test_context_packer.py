@@ -0,0 +1,62 @@
+"""Tests for the token-budgeted context packer."""
+
+import pytest
+from langchain_core.documents import Document
+
+from app.context_packer import merge_overlapping, pack_context
+from app.ingester import _split_document
+
+pytestmark = pytest.mark.usefixtures("byte_tokenizer")
+
+
+def _doc(text: str, source: str) -> Document:
+    return Document(page_content=text, metadata={"source": source, "source_type": "website"})
+
+
+def test_overlapping_chunks_of_a_source_are_merged() -> None:
+    text = " ".join(f"Sentence {i} is about Promtior's GenAI delivery work." for i in range(40))
+    chunks = _split_document(_doc(text, "https://a"), chunk_size=300, chunk_overlap=80)
+    other = _doc("Promtior was founded in May 2023.", "https://b")
+
+    # ranks: chunk 2, other source, chunk 0, chunk 1 (bridges 0 and 2)
+    passages, merged = merge_overlapping([chunks[2], other, chunks[0], chunks[1]])
+
+    assert merged == 2
+    assert [p.metadata["source"] for p in passages] == ["https://a", "https://b"]
+    passage = passages[0].page_content
+    assert passage.startswith(chunks[0].page_content)
+    assert passage.endswith(chunks[2].page_content)
+    assert passage in text
+    assert len(passage) < sum(len(c.page_content) for c in chunks[:3])
+
+
+def test_chunks_that_only_share_a_source_are_kept_apart() -> None:
+    docs = [_doc("First section of the page. " * 5, "https://a"),
+            _doc("A different section entirely. " * 5, "https://a")]
+    passages, merged = merge_overlapping(docs)
+    assert merged == 0
+    assert passages == docs
+
+
+def test_budget_truncates_then_drops_lowest_ranked() -> None:
+    docs = [_doc(f"{n} " + "x" * 300, f"https://{n}") for n in ("one", "two", "three")]
+    first = len(f"[website: https://one]\n{docs[0].page_content}")
+
+    packed = pack_context(docs, budget=first + 200, min_truncated=64)
+
+    assert packed.tokens <= first + 200
+    assert (packed.passages, packed.dropped, packed.truncated) == (2, 1, True)
+    assert packed.sources == "[website: https://one], [website: https://two]"
+    assert packed.context.startswith(f"[website: https://one]\n{docs[0].page_content}")
+    assert "three" not in packed.context
+
+    # too little room left to be worth a truncated chunk
+    packed = pack_context(docs, budget=first + 50, min_truncated=64)
+    assert (packed.passages, packed.dropped, packed.truncated) == (1, 2, False)
+
+
+def test_no_budget_keeps_everything() -> None:
+    docs = [_doc("y" * 2000, f"https://{n}") for n in range(5)]
+    packed = pack_context(docs, budget=0)
+    assert (packed.passages, packed.dropped, packed.truncated) == (5, 0, False)
+    assert packed.tokens == len(packed.context)
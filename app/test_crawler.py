@@ -0,0 +1,102 @@
+"""Offline tests for the crawler and sitemap discovery (local stand-in sites)."""
+
+import asyncio
+
+import httpx
+
+from app import ingester
+from app.config import Config
+from app.crawler import AsyncCrawler
+from app.http_cache import HttpValidatorCache
+from benchmarks.standin import StandInSite
+
+
+async def _get_all(urls: list[str], **kwargs) -> tuple[list, AsyncCrawler]:
+    async with AsyncCrawler(backoff=0.01, **kwargs) as crawler:
+        responses = await asyncio.gather(*(crawler.get(url) for url in urls))
+    return responses, crawler
+
+
+def test_transient_failures_are_retried(monkeypatch) -> None:
+    """503s on the sitemap and on every page are retried until they succeed."""
+    monkeypatch.setattr(Config, "CRAWL_BACKOFF", 0.01)
+    with StandInSite(n_pages=5, latency=0, failures=2) as site:
+        docs = ingester._load_sitemap(site.sitemap_url, "website", HttpValidatorCache())
+
+    assert sorted(d.metadata["source"] for d in docs) == site.page_urls
+    assert site.failed == 2 * 6 and site.requests == 3 * 6
+
+
+def test_retries_give_up_and_timings_are_recorded() -> None:
+    """429 (Retry-After: 0) past the retry budget returns None; stats cover every URL."""
+    with StandInSite(n_pages=4, latency=0, failures=2, failure_status=429) as site:
+        failed, crawler = asyncio.run(_get_all(site.page_urls[:2], retries=1))
+        ok, _ = asyncio.run(_get_all(site.page_urls[2:], retries=2))
+
+    assert failed == [None, None] and all(r.status_code == 200 for r in ok)
+    assert {url: (t.attempts, t.status) for url, t in crawler.timings.items()} == {
+        url: (2, 429) for url in site.page_urls[:2]
+    }
+    assert "2 URLs fetched" in crawler.summary() and "2 failed" in crawler.summary()
+
+
+def test_unrecoverable_request_errors_fail_only_that_page() -> None:
+    """A redirect loop or an undecodable body is not retried and does not raise."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/loop":
+            return httpx.Response(302, headers={"Location": "/loop"})
+        if request.url.path == "/broken":
+            return httpx.Response(200, headers={"Content-Encoding": "gzip"}, content=b"not gzip")
+        return httpx.Response(200, text="ok")
+
+    async def crawl() -> tuple[list, AsyncCrawler]:
+        async with AsyncCrawler(backoff=0.01) as crawler:
+            crawler._client = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler), follow_redirects=True,
+            )
+            urls = ["https://a.test/loop", "https://a.test/broken", "https://a.test/ok",
+                    "https://a.test/\x00"]
+            return await asyncio.gather(*(crawler.get(url) for url in urls)), crawler
+
+    (loop, broken, ok, invalid), crawler = asyncio.run(crawl())
+    assert loop is None and broken is None and invalid is None
+    assert ok.text == "ok"
+    assert all(t.attempts == 1 for t in crawler.timings.values())
+
+def test_busy_host_does_not_hold_global_slots() -> None:
+    """Requests queued on a slow host leave the global slots to other hosts."""
+    with StandInSite(n_pages=3, latency=0.2) as slow, StandInSite(n_pages=1, latency=0) as fast:
+        _, crawler = asyncio.run(_get_all(
+            slow.page_urls + fast.page_urls, concurrency=2, per_host_limit=1,
+        ))
+
+    assert crawler.timings[fast.page_urls[0]].seconds < 0.15
+    assert max(crawler.timings[url].seconds for url in slow.page_urls) > 0.5
+
+def test_nested_gzip_sitemap_index_fetches_each_page_once() -> None:
+    """Index -> index -> .xml.gz, a repeated page and a self-reference."""
+    with StandInSite(n_pages=6, latency=0) as site:
+        docs = ingester._load_sitemap(site.sitemap_index_url, "website", HttpValidatorCache())
+
+    assert sorted(d.metadata["source"] for d in docs) == site.page_urls
+    assert site.requests == 4 + 6  # index, nested index, two urlsets, pages
+
+
+def test_sites_are_crawled_together_and_deduplicated() -> None:
+    """Pages listed by two sitemaps keep the first one's source_type."""
+    async def crawl(sitemaps) -> list:
+        out: asyncio.Queue = asyncio.Queue()
+        await ingester._crawl_sitemaps(sitemaps, HttpValidatorCache(), out)
+        return [out.get_nowait() for _ in range(out.qsize())]
+
+    with StandInSite(n_pages=3, latency=0) as a, StandInSite(n_pages=4, latency=0) as b:
+        docs = asyncio.run(crawl([
+            (a.sitemap_url, "website"), (b.sitemap_index_url, "blog"),
+            (a.sitemap_index_url, "blog"),
+        ]))
+        page_requests = a.requests + b.requests - 1 - 4 - 4
+
+    assert sorted((d.metadata["source"], d.metadata["source_type"]) for d in docs) == sorted(
+        [(url, "website") for url in a.page_urls] + [(url, "blog") for url in b.page_urls]
+    )
+    assert page_requests == 3 + 4
@@ -0,0 +1,39 @@
+"""Offline tests for MinHash-LSH near-duplicate chunk detection."""
+
+from langchain_core.documents import Document
+
+from app.dedup import ChunkDeduplicator, MinHasher
+
+
+def _chunk(source: str, words: list[str]) -> Document:
+    return Document(page_content=" ".join(words), metadata={"source": source})
+
+
+def test_signature_similarity_estimates_jaccard() -> None:
+    """Equal-component fraction tracks the Jaccard similarity of the 3-shingles."""
+    hasher = MinHasher()
+    words = [f"w{i}" for i in range(200)]
+    for changed in (0, 10, 40, 100):
+        other = words[:len(words) - changed] + [f"x{i}" for i in range(changed)]
+        shingles = [
+            {" ".join(w[i:i + 3]) for i in range(len(w) - 2)} for w in (words, other)
+        ]
+        jaccard = len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+        estimate = (hasher.signature(" ".join(words)) == hasher.signature(" ".join(other))).mean()
+        assert abs(estimate - jaccard) < 0.1
+
+
+def test_near_duplicates_are_dropped_but_not_against_own_chunks() -> None:
+    dedup = ChunkDeduplicator(threshold=0.8)
+    hero = [f"hero{i}" for i in range(150)]
+    dedup.seed("a-0", "https://a", _chunk("https://a", hero))
+
+    chunks = [_chunk("https://b", hero[:-3] + ["page", "b", "cta"]),
+              _chunk("https://b", [f"blurb{i}" for i in range(150)])]
+    kept, kept_ids, merged_into = dedup.filter("https://b", chunks, ["b-0", "b-1"])
+    assert kept == chunks[1:] and kept_ids == ["b-1"] and merged_into == ["a-0"]
+    assert dict(dedup.merges) == {("https://b", "https://a"): 1}
+
+    # re-chunking a document compares it against the others, not its old self
+    kept, _, merged_into = dedup.filter("https://a", [_chunk("https://a", hero)], ["a2-0"])
+    assert kept and not merged_into
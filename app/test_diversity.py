@@ -0,0 +1,50 @@
+"""Tests for MMR / per-source diversified retrieval."""
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.diversity import DiverseRetriever, mmr_select
+from app.docstore import load_index, save_index
+from app.keyword_index import BM25Index, HybridRetriever
+
+
+def test_mmr_skips_near_copies_and_caps_sources() -> None:
+    rng = np.random.default_rng(0)
+    axes = np.eye(8)
+    # three near-copies ranked first, then three unrelated (orthogonal) chunks
+    vectors = np.stack([axes[0] + rng.normal(scale=0.01, size=8) for _ in range(3)]
+                       + [axes[i] for i in (1, 2, 3)])
+    relevance = np.array([0.9, 0.89, 0.88, 0.8, 0.79, 0.78])
+
+    assert mmr_select(relevance, vectors, 3, lambda_mult=1.0) == [0, 1, 2]
+    picked = mmr_select(relevance, vectors, 3, lambda_mult=0.5)
+    assert picked[0] == 0 and not {1, 2} & set(picked)
+
+    sources = ["a", "a", "a", "b", "b", "c"]
+    assert mmr_select(relevance, None, 4, 1.0, sources, max_per_source=1) == [0, 3, 5]
+    assert mmr_select(relevance, None, 4, 1.0, sources, max_per_source=2) == [0, 1, 3, 4]
+
+
+def test_retrievers_diversify_repeated_page(tmp_path) -> None:
+    blurb = "Promtior helps companies adopt generative AI with agents and automation."
+    texts = [blurb] * 4 + [f"Promtior generative AI case study number {i}." for i in range(20)]
+    sources = ["https://www.promtior.ai/"] * 4 + [f"https://www.promtior.ai/case-{i}" for i in range(20)]
+    embeddings = DeterministicFakeEmbedding(size=16)
+    store = FAISS.from_texts(texts, embeddings, metadatas=[{"source": s} for s in sources])
+    save_index(store, str(tmp_path), keyword_index=BM25Index.from_texts(texts))
+    store = load_index(str(tmp_path), embeddings)
+
+    plain = store.similarity_search(blurb, k=4)
+    assert {d.metadata["source"] for d in plain} == {"https://www.promtior.ai/"}
+
+    dense = DiverseRetriever(vector_store=store, k=4, lambda_mult=0.5, max_per_source=2)
+    hybrid = HybridRetriever(
+        vector_store=store, keyword_index=BM25Index.from_texts(texts), k=4,
+        lambda_mult=0.5, max_per_source=2,
+    )
+    for retriever in (dense, hybrid):
+        docs = retriever.invoke(blurb)
+        assert len(docs) == 4
+        assert docs[0].page_content == blurb
+        assert sum(d.page_content == blurb for d in docs) == 1  # identical vectors: MMR keeps one
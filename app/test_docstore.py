@@ -0,0 +1,86 @@
+"""Offline tests for the columnar docstore and memory-mapped index loading."""
+
+import os
+import pickle
+
+import pytest
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.config import Config
+from app.docstore import DOCSTORE_FILE, MmapDocstore, load_index, save_index
+
+_TEXTS = [f"Promtior chunk {i}: {'ñ' * i} generative AI adoption" for i in range(40)]
+
+
+def _store(embeddings) -> FAISS:
+    metadatas = [
+        {"source": f"https://www.promtior.ai/page-{i % 4}", "source_type": "website",
+         **({"page": i, "page_label": str(i + 1)} if i % 5 else {"title": "Promtior"})}
+        for i in range(len(_TEXTS))
+    ]
+    ids = [f"chunk-{i}" for i in range(len(_TEXTS))]
+    return FAISS.from_texts(_TEXTS, embeddings, metadatas=metadatas, ids=ids)
+
+
+def test_mmap_load_matches_load_local(tmp_path) -> None:
+    embeddings = DeterministicFakeEmbedding(size=16)
+    store = _store(embeddings)
+    store.delete(["chunk-3", "chunk-17"])
+    save_index(store, str(tmp_path))
+
+    mapped = load_index(str(tmp_path), embeddings)
+    plain = load_index(str(tmp_path), embeddings, use_mmap=False)
+    assert isinstance(mapped.docstore, MmapDocstore)
+    assert not isinstance(plain.docstore, MmapDocstore)
+    assert plain.index_to_docstore_id[2] == "chunk-2"
+
+    for query in ("generative AI", "chunk 21", "Promtior ññññ"):
+        got = mapped.similarity_search_with_score(query, k=5)
+        want = store.similarity_search_with_score(query, k=5)
+        assert plain.similarity_search_with_score(query, k=5) == want
+        assert [(d.id, d.page_content, d.metadata) for d, _ in got] == \
+               [(d.id, d.page_content, d.metadata) for d, _ in want]
+        assert [s for _, s in got] == [s for _, s in want]
+
+
+def test_docstore_is_compact_and_mismatch_is_rejected(tmp_path) -> None:
+    embeddings = DeterministicFakeEmbedding(size=16)
+    store = _store(embeddings)
+    save_index(store, str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [DOCSTORE_FILE, "index.faiss"]
+    pickled = pickle.dumps((store.docstore, store.index_to_docstore_id))
+    assert os.path.getsize(tmp_path / DOCSTORE_FILE) < len(pickled)
+
+    smaller = _store(embeddings)
+    smaller.delete(["chunk-0"])
+    save_index(smaller, str(tmp_path / "other"))
+    os.replace(tmp_path / "other" / DOCSTORE_FILE, tmp_path / DOCSTORE_FILE)
+    with pytest.raises(ValueError):
+        load_index(str(tmp_path), embeddings)
+
+
+def test_embedding_settings_are_validated_on_load(tmp_path) -> None:
+    embeddings = DeterministicFakeEmbedding(size=16)
+    metadata = {"embedding_model": "text-embedding-3-small", "embedding_dimensions": 16}
+    save_index(_store(embeddings), str(tmp_path), metadata=metadata)
+
+    assert load_index(str(tmp_path), embeddings, expected_metadata=metadata).index.d == 16
+    for key, value in (("embedding_dimensions", 512), ("embedding_model", "text-embedding-3-large")):
+        with pytest.raises(ValueError, match=str(value)):
+            load_index(str(tmp_path), embeddings, expected_metadata={**metadata, key: value})
+
+
+def test_dimensions_are_only_requested_when_shortened(monkeypatch) -> None:
+    """Models without Matryoshka support reject ``dimensions``; the native size is implied."""
+    monkeypatch.setattr(Config, "EMBEDDING_MODEL", "text-embedding-ada-002")
+    for configured in (None, 1536):
+        monkeypatch.setattr(Config, "EMBEDDING_DIMENSIONS", configured)
+        assert Config.requested_dimensions() is None
+        assert Config.embedding_metadata()["embedding_dimensions"] == 1536
+
+    monkeypatch.setattr(Config, "EMBEDDING_MODEL", "text-embedding-3-small")
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSIONS", 512)
+    assert Config.requested_dimensions() == 512
+    assert Config.embedding_metadata()["embedding_dimensions"] == 512
@@ -0,0 +1,82 @@
+"""Offline tests for the query-embedding cache tiers."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.embedding_cache import CachedQueryEmbeddings, EmbeddingCache
+from app.testing import CountingEmbeddings
+
+
+def test_lru_serves_repeated_and_reformatted_queries() -> None:
+    """Whitespace variants share one API call; the LRU stays bounded."""
+    inner = CountingEmbeddings(size=8)
+    cached = CachedQueryEmbeddings(inner, max_size=2)
+
+    first = cached.embed_query("Who founded Promtior?")
+    assert cached.embed_query("  Who founded\tPromtior? ") == first
+    assert inner.queries == 1
+
+    cached.embed_query("What services?")
+    cached.embed_query("Which clients?")
+    cached.embed_query("Who founded Promtior?")
+    assert inner.queries == 4
+    assert (cached.hits, cached.misses) == (1, 4)
+
+
+def test_shared_sqlite_tier_is_reused_across_workers(tmp_path) -> None:
+    """A second process-level cache (another worker) hits the shared tier."""
+    path = str(tmp_path / "queries.sqlite")
+    inner = CountingEmbeddings(size=8)
+    worker_a = CachedQueryEmbeddings(inner, 16, EmbeddingCache(path, "model-a"))
+    worker_b = CachedQueryEmbeddings(inner, 16, EmbeddingCache(path, "model-a"))
+    other_model = CachedQueryEmbeddings(inner, 16, EmbeddingCache(path, "model-b"))
+
+    vector = worker_a.embed_query("What does Promtior do?")
+    assert worker_b.embed_query("What does Promtior do?") == pytest.approx(vector, rel=1e-6)
+    assert inner.queries == 1
+
+    other_model.embed_query("What does Promtior do?")
+    assert inner.queries == 2
+
+
+def test_async_queries_keep_sqlite_off_the_event_loop(tmp_path) -> None:
+    """aembed_query checks the LRU inline and runs shared-tier I/O in a thread."""
+    io_threads: set[int] = set()
+
+    class _RecordingCache(EmbeddingCache):
+        def get_many(self, texts):
+            io_threads.add(threading.get_ident())
+            return super().get_many(texts)
+
+        def put_many(self, texts, vectors):
+            io_threads.add(threading.get_ident())
+            super().put_many(texts, vectors)
+
+    path = str(tmp_path / "queries.sqlite")
+    inner = CountingEmbeddings(size=8)
+    worker_a = CachedQueryEmbeddings(inner, 16, _RecordingCache(path, "model-a"))
+    worker_b = CachedQueryEmbeddings(inner, 16, _RecordingCache(path, "model-a"))
+
+    async def ask() -> int:
+        await worker_a.aembed_query("Who founded Promtior?")  # API, then both tiers
+        await worker_a.aembed_query("Who founded Promtior?")  # LRU
+        await worker_b.aembed_query("Who founded Promtior?")  # shared tier
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(ask())
+    assert inner.queries == 1
+    assert io_threads and loop_thread not in io_threads
+    assert (worker_a.hits, worker_a.misses, worker_b.hits, worker_b.misses) == (1, 1, 1, 0)
+
+def test_shortened_embeddings_are_cached_separately(tmp_path) -> None:
+    """Vectors of another EMBEDDING_DIMENSIONS are never served from the cache."""
+    path = str(tmp_path / "embeddings.sqlite")
+    full = EmbeddingCache(path, "text-embedding-3-small", 1536)
+    full.put_many(["Promtior"], [[0.5] * 1536])
+    short = EmbeddingCache(path, "text-embedding-3-small", 256)
+    assert short.get_many(["Promtior"]) == [None]
+    short.put_many(["Promtior"], [[0.25] * 256])
+    assert len(full.get_many(["Promtior"])[0]) == 1536
+    assert len(short.get_many(["Promtior"])[0]) == 256
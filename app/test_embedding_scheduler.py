@@ -0,0 +1,60 @@
+"""Offline tests for the embedding scheduler against a fake embeddings API."""
+
+import asyncio
+
+import numpy as np
+import openai
+import pytest
+
+from app import embedding_scheduler
+from app.embedding_scheduler import EmbeddingScheduler
+from benchmarks.fake_openai import FakeEmbeddingsServer, fake_vector
+
+
+@pytest.fixture(autouse=True)
+def _byte_tokenizer(monkeypatch, byte_encoding):
+    # batch planning only needs token counts, not the model's exact BPE
+    monkeypatch.setattr(embedding_scheduler, "get_tokenizer", lambda: byte_encoding)
+
+
+def _texts(n: int) -> list[str]:
+    return [f"Promtior chunk number {i}: " + "bionic organizations " * 20 for i in range(n)]
+
+
+def _scheduler(server: FakeEmbeddingsServer, **kwargs) -> EmbeddingScheduler:
+    client = openai.AsyncOpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+    return EmbeddingScheduler(client, model="text-embedding-3-small", **kwargs)
+
+
+def test_special_token_text_is_counted_as_plain_text() -> None:
+    """Scraped pages about LLMs can contain "<|endoftext|>"."""
+    text = "GPT models end documents with <|endoftext|>."
+    scheduler = EmbeddingScheduler(None, model="text-embedding-3-small")
+    assert scheduler.plan_batches([text]) == [([0], len(text))]
+
+def test_scheduler_runs_batches_concurrently_in_order() -> None:
+    """Token-sized batches overlap and vectors come back in input order."""
+    texts = _texts(200)
+    with FakeEmbeddingsServer(latency=0.1) as server:
+        scheduler = _scheduler(server, max_batch_tokens=1_000, concurrency=4)
+        vectors = asyncio.run(scheduler.embed(texts))
+
+    assert len(scheduler.plan_batches(texts)) > 4
+    assert server.max_in_flight > 1
+    expected = np.stack([fake_vector(t, server.dim) for t in texts])
+    np.testing.assert_allclose(np.asarray(vectors), expected, rtol=1e-6)
+
+
+def test_scheduler_recovers_from_429() -> None:
+    """An optimistic local quota is corrected by 429s + retry-after-ms."""
+    texts = _texts(120)
+    with FakeEmbeddingsServer(tokens_per_minute=600_000, burst=3_000, latency=0.0) as server:
+        scheduler = _scheduler(
+            # ~20 texts per batch: one fits the server's burst, four at once do not
+            server, tokens_per_minute=10_000_000, max_batch_tokens=9_000, concurrency=4,
+        )
+        vectors = asyncio.run(scheduler.embed(texts))
+
+    assert server.rate_limited > 0
+    assert scheduler.stats["rate_limited"] == server.rate_limited
+    assert all(v is not None for v in vectors) and len(vectors) == len(texts)
@@ -0,0 +1,58 @@
+"""Offline recall checks for the ANN index factory and quantized encodings."""
+
+import faiss
+import numpy as np
+import pytest
+
+from app.config import Config
+from app.index_factory import RerankIndex, build_index, index_spec, is_lossy, tune_index
+
+
+def _clustered(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((64, dim), dtype=np.float32)
+    points = centers[rng.integers(0, 64, n)] + 0.3 * rng.standard_normal((n, dim), dtype=np.float32)
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("index_type", ["IVFFlat", "HNSW", "IVFPQ"])
+def test_ann_recall_against_flat(index_type: str, monkeypatch) -> None:
+    monkeypatch.setattr(Config, "PQ_M", 8)
+    vectors = _clustered(10_000, 32)
+    queries = _clustered(100, 32, seed=1)
+    _, exact = build_index(vectors, "Flat").search(queries, 10)
+
+    index = build_index(vectors, index_type)
+    assert index.ntotal == len(vectors)
+    tune_index(index, nprobe=16, ef_search=128)
+    _, approx = index.search(queries, 10)
+    recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(approx, exact)])
+    assert recall >= (0.6 if index_type == "IVFPQ" else 0.9)
+
+
+@pytest.mark.parametrize("encoding, ratio", [("float16", 2), ("int8", 4), ("pq", 8)])
+def test_quantized_flat_index_with_exact_rerank(encoding: str, ratio: int, monkeypatch) -> None:
+    monkeypatch.setattr(Config, "PQ_M", 16)
+    vectors = _clustered(10_000, 32)
+    queries = _clustered(100, 32, seed=1)
+    _, exact = build_index(vectors, "Flat").search(queries, 10)
+
+    index = build_index(vectors, "Flat", encoding)
+    assert index.sa_code_size() * ratio == vectors[0].nbytes
+    for searcher, floor in ((index, 0.3), (RerankIndex(index, vectors, 4), 0.98)):
+        _, approx = searcher.search(queries, 10)
+        recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(approx, exact)])
+        assert recall >= floor
+
+
+def test_small_corpus_falls_back_and_unknown_type_is_rejected() -> None:
+    assert index_spec(120, 1536, "IVFFlat") == "Flat"
+    assert index_spec(5_000, 1536, "IVFPQ").endswith(",Flat")
+    assert index_spec(120, 1536, "HNSW", "int8") == "HNSW32_SQ8"
+    fallback = build_index(_clustered(120, 8), "IVFPQ")
+    assert isinstance(fallback, faiss.IndexFlat) and not is_lossy(fallback)
+    assert is_lossy(build_index(_clustered(120, 8), "HNSW", "int8"))
+    with pytest.raises(ValueError):
+        index_spec(1_000, 8, "LSH")
+    with pytest.raises(ValueError):
+        index_spec(1_000, 8, "Flat", "int4")
@@ -0,0 +1,307 @@
+"""Offline tests for the ingestion pipeline (no network, no OpenAI)."""
+
+from functools import partial
+
+import faiss
+import pytest
+from bs4 import BeautifulSoup
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from app import ingester
+from app.config import Config, get_tokenizer
+from app.docstore import load_index
+from app.index_factory import RerankIndex
+from app.keyword_index import load_keyword_index
+from app.manifest import IngestManifest
+from app.http_cache import HttpValidatorCache
+from app.testing import CountingEmbeddings
+from benchmarks.bench_parse_page import original_parse_page
+from benchmarks.standin import StandInSite, wix_page
+
+
+class _FakeScheduler:
+    """Stands in for EmbeddingScheduler, embedding through the fake model."""
+
+    def __init__(self, embeddings: Embeddings, fail_after: int | None = None) -> None:
+        self.embeddings = embeddings
+        self.fail_after = fail_after
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if self.fail_after is not None:
+            if self.fail_after == 0:
+                raise RuntimeError("embedding API down")
+            self.fail_after -= 1
+        return self.embeddings.embed_documents(texts)
+
+
+def _page(url: str, text: str) -> Document:
+    return Document(
+        page_content=text * 40,
+        metadata={"source": url, "source_type": "website", "title": url},
+    )
+
+
+def _run(
+    monkeypatch, tmp_path, pages: list[Document], full_rebuild: bool = False,
+    fail_after: int | None = None,
+) -> tuple[FAISS, int]:
+    """Run one ingestion over ``pages``; return the saved store and #texts embedded.
+
+    ``fail_after`` makes the embedding API fail after that many calls.
+    """
+    embeddings = CountingEmbeddings()
+    monkeypatch.setattr(Config, "INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSIONS", 16)
+    monkeypatch.setattr(Config, "HTTP_CACHE_PATH", str(tmp_path / "http_cache.json"))
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite"))
+    monkeypatch.setattr(ingester, "get_embeddings", lambda: embeddings)
+    async def crawl(sitemaps, cache, out, pool=None) -> None:
+        for page in pages:
+            await out.put(page)
+
+    monkeypatch.setattr(ingester, "_crawl_sitemaps", crawl)
+    monkeypatch.setattr(ingester, "_load_pdf", lambda path: [])
+    monkeypatch.setattr(ingester.EmbeddingScheduler, "from_config",
+                        classmethod(lambda cls: _FakeScheduler(embeddings, fail_after)))
+
+    ingester.run_ingestion(full_rebuild=full_rebuild)
+    store = load_index(str(tmp_path), embeddings, use_mmap=False)
+    return store, embeddings.embedded
+
+
+def test_incremental_ingestion_only_embeds_changes(monkeypatch, tmp_path) -> None:
+    """Unchanged pages keep their vectors; edits and removals are applied."""
+    first = [_page("https://a", "alpha "), _page("https://b", "beta "), _page("https://c", "gamma ")]
+    store, embedded = _run(monkeypatch, tmp_path, first)
+    assert embedded == store.index.ntotal > 0
+
+    store, embedded = _run(monkeypatch, tmp_path, first)
+    assert embedded == 0
+
+    second = [first[0], _page("https://b", "beta changed "), _page("https://d", "delta ")]
+    store, embedded = _run(monkeypatch, tmp_path, second)
+    sources = {doc.metadata["source"] for doc in store.docstore._dict.values()}
+    assert sources == {"https://a", "https://b", "https://d"}
+    assert 0 < embedded < store.index.ntotal
+    assert len(store.index_to_docstore_id) == store.index.ntotal
+
+
+def test_full_rebuild_reuses_embedding_cache(monkeypatch, tmp_path) -> None:
+    """A forced rebuild re-indexes everything but embeds no known text."""
+    pages = [_page("https://a", "alpha "), _page("https://b", "beta ")]
+    store, embedded = _run(monkeypatch, tmp_path, pages)
+    assert embedded == store.index.ntotal
+
+    store, embedded = _run(monkeypatch, tmp_path, pages, full_rebuild=True)
+    assert embedded == 0
+    assert store.index.ntotal > 0
+
+
+def test_ann_index_survives_incremental_update(monkeypatch, tmp_path) -> None:
+    """An HNSW index is rebuilt on update from cached vectors, not re-embedded."""
+    monkeypatch.setattr(Config, "INDEX_TYPE", "HNSW")
+    pages = [_page("https://a", "alpha "), _page("https://b", "beta ")]
+    store, embedded = _run(monkeypatch, tmp_path, pages)
+    assert isinstance(store.index, faiss.IndexHNSW)
+
+    pages = [pages[0], _page("https://b", "beta changed ")]
+    store, embedded = _run(monkeypatch, tmp_path, pages)
+    assert isinstance(store.index, faiss.IndexHNSW)
+    assert 0 < embedded < store.index.ntotal
+    query = store.docstore.search(store.index_to_docstore_id[0]).page_content
+    assert store.similarity_search(query, k=1)[0].page_content == query
+
+
+def test_quantized_index_keeps_exact_vectors_for_rerank(monkeypatch, tmp_path) -> None:
+    """An int8 index is saved with vectors.npy, used for re-ranking and updates."""
+    monkeypatch.setattr(Config, "INDEX_ENCODING", "int8")
+    pages = [_page("https://a", "alpha "), _page("https://b", "beta ")]
+    store, _ = _run(monkeypatch, tmp_path, pages)
+    assert isinstance(store.index, faiss.IndexScalarQuantizer)
+
+    served = load_index(str(tmp_path), store.embeddings, rerank_factor=4)
+    assert isinstance(served.index, RerankIndex)
+    query = store.docstore.search(store.index_to_docstore_id[1]).page_content
+    assert served.similarity_search(query, k=1)[0].page_content == query
+
+    for path in tmp_path.glob("embeddings.sqlite*"):
+        path.unlink()
+    pages.append(_page("https://c", "gamma "))
+    store, embedded = _run(monkeypatch, tmp_path, pages)
+    assert 0 < embedded < store.index.ntotal
+
+
+def test_repeat_crawl_revalidates_instead_of_refetching(tmp_path) -> None:
+    """Second crawl is served by sitemap <lastmod>, or by 304 without it."""
+    for lastmod in (True, False):
+        cache_path = str(tmp_path / f"http_cache_{lastmod}.json")
+        with StandInSite(n_pages=5, latency=0, lastmod=lastmod) as site:
+            cache = HttpValidatorCache.load(cache_path)
+            first = ingester._load_sitemap(site.sitemap_url, "website", cache)
+            cache.save(cache_path)
+            requests_after_first = site.requests
+
+            cache = HttpValidatorCache.load(cache_path)
+            second = ingester._load_sitemap(site.sitemap_url, "website", cache)
+            page_requests = site.requests - requests_after_first - 1
+
+        assert sorted(d.page_content for d in first) == sorted(d.page_content for d in second)
+        assert len(second) == 5
+        if lastmod:
+            assert page_requests == 0
+        else:
+            assert page_requests == site.not_modified == 5
+
+
+def test_parse_and_chunk_in_a_process_pool_matches_inline() -> None:
+    """The worker pool returns the same documents and chunks, in order."""
+    split = partial(ingester._split_document, chunk_size=300, chunk_overlap=50)
+    with StandInSite(n_pages=6, latency=0) as site, ingester._worker_pool(2) as pool:
+        inline = ingester._load_sitemap(site.sitemap_url, "website", HttpValidatorCache())
+        pooled = ingester._load_sitemap(site.sitemap_url, "website", HttpValidatorCache(), pool)
+        chunks = ingester._map(pool, split, pooled)
+
+    def by_source(docs):  # pages arrive in fetch order
+        return sorted((d.metadata["source"], d.page_content, d.metadata) for d in docs)
+
+    assert by_source(pooled) == by_source(inline)
+    assert chunks == [split(doc) for doc in pooled]
+    assert len(chunks) == 6 and all(len(c) > 1 for c in chunks)
+
+
+def test_interrupted_ingestion_resumes_after_last_commit(monkeypatch, tmp_path) -> None:
+    """Batches committed before a crash are neither lost nor embedded again."""
+    monkeypatch.setattr(Config, "INGEST_BATCH_CHUNKS", 1)
+    pages = [_page(f"https://{name}", f"{name} ") for name in ("a", "b", "c", "d")]
+    try:
+        _run(monkeypatch, tmp_path, pages, fail_after=2)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("the embedding failure should abort the run")
+    committed = load_index(str(tmp_path), DeterministicFakeEmbedding(size=16), use_mmap=False)
+    assert {d.metadata["source"] for d in committed.docstore._dict.values()} == \
+           {"https://a", "https://b"}
+    assert load_keyword_index(str(tmp_path), committed.index.ntotal) is not None
+
+    for path in tmp_path.glob("embeddings.sqlite*"):
+        path.unlink()
+    store, embedded = _run(monkeypatch, tmp_path, pages)
+    assert {d.metadata["source"] for d in store.docstore._dict.values()} == \
+           {"https://a", "https://b", "https://c", "https://d"}
+    assert embedded == store.index.ntotal - committed.index.ntotal
+
+
+def test_crash_before_the_final_save_is_finalized_on_resume(monkeypatch, tmp_path) -> None:
+    """Every batch is committed, so the resumed run only builds the HNSW index."""
+    monkeypatch.setattr(Config, "INDEX_TYPE", "HNSW")
+    monkeypatch.setattr(Config, "INGEST_BATCH_CHUNKS", 1)
+    pages = [_page("https://a", "alpha "), _page("https://b", "beta ")]
+    save = ingester._IngestPipeline.save
+
+    def crash_on_final(self, final: bool) -> None:
+        if final:
+            raise RuntimeError("killed before the final save")
+        save(self, final)
+
+    monkeypatch.setattr(ingester._IngestPipeline, "save", crash_on_final)
+    with pytest.raises(RuntimeError):
+        _run(monkeypatch, tmp_path, pages)
+    monkeypatch.setattr(ingester._IngestPipeline, "save", save)
+
+    store, embedded = _run(monkeypatch, tmp_path, pages)
+    assert isinstance(store.index, faiss.IndexHNSW)
+    assert embedded == 0
+    assert IngestManifest.load(str(tmp_path)).index_is_final()
+
+def test_batches_without_chunks_commit_only_the_manifest(monkeypatch, tmp_path) -> None:
+    """A run whose documents yield no chunks saves no index and does not crash."""
+    empty = Document(page_content="", metadata={"source": "https://empty", "title": ""})
+    with pytest.raises(FileNotFoundError):
+        _run(monkeypatch, tmp_path, [empty])
+    assert not (tmp_path / "index.faiss").exists()
+
+    store, embedded = _run(monkeypatch, tmp_path, [empty, _page("https://a", "alpha ")])
+    assert embedded == store.index.ntotal > 0
+
+
+def test_near_duplicate_chunks_are_not_embedded(monkeypatch, tmp_path) -> None:
+    """A mirror page is merged into the original, and re-indexed once that changes."""
+    def page(url: str, words: str) -> Document:
+        text = " ".join(f"{words}{i}" for i in range(400))
+        return Document(page_content=text, metadata={"source": url, "title": url})
+
+    monkeypatch.setattr(Config, "DEDUP_THRESHOLD", 0.85)
+    original, mirror, other = page("https://a", "hero"), page("https://b", "hero"), \
+        page("https://c", "blurb")
+    store, embedded = _run(monkeypatch, tmp_path, [original, mirror, other])
+    documents = IngestManifest.load(str(tmp_path)).documents
+    assert documents["https://b"]["chunk_ids"] == []
+    assert documents["https://b"]["merged_into"] == documents["https://a"]["chunk_ids"]
+    assert embedded == store.index.ntotal
+    assert {doc.metadata["source"] for doc in store.docstore._dict.values()} == \
+           {"https://a", "https://c"}
+
+    # the original changes: the mirror's text is gone from the index until re-chunked
+    _run(monkeypatch, tmp_path, [page("https://a", "cta"), mirror, other])
+    assert IngestManifest.load(str(tmp_path)).documents["https://b"]["hash"] == ""
+    store, _ = _run(monkeypatch, tmp_path, [page("https://a", "cta"), mirror, other])
+    sources = {doc.metadata["source"] for doc in store.docstore._dict.values()}
+    assert sources == {"https://a", "https://b", "https://c"}
+
+
+def _tokenizer_available() -> bool:
+    try:
+        get_tokenizer()
+    except Exception:  # tiktoken downloads its BPE file on first use
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _tokenizer_available(), reason="tiktoken encoding not available offline")
+def test_token_chunks_fit_the_token_budget(monkeypatch) -> None:
+    """CHUNK_UNIT="tokens" bounds every chunk by CHUNK_TOKENS tokens, not characters."""
+    monkeypatch.setattr(Config, "CHUNK_UNIT", "tokens")
+    monkeypatch.setattr(Config, "CHUNK_TOKENS", 60)
+    monkeypatch.setattr(Config, "CHUNK_TOKEN_OVERLAP", 10)
+    text, _ = ingester._parse_html(wix_page(0))
+    chunks = ingester._split_document(Document(page_content=text), **ingester._chunking())
+
+    tokens = [len(get_tokenizer().encode_ordinary(c.page_content)) for c in chunks]
+    assert len(chunks) > 5 and max(tokens) <= 60
+    assert ingester._token_count.cache_info().hits > 0
+
+
+_EDGE_PAGES = [
+    # <main> inside a skipped <header> is not the content container
+    "<html><body><header><main>menu</main></header><article><p>Post</p>"
+    "<!-- comment --><template>hidden</template><p>Coo\u200bkie and SUSCRÍBETE</p>"
+    "</article></body></html>",
+    # nested containers: the first (outer) <main> wins
+    "<html><body><p>outside</p><main><div><main>inner</main></div>\n\n \n<p>after"
+    "</p></main><main>second</main></body></html>",
+    "<html><body><div>  \n Ancla 12 \n\n\n\n text\u200d <b>bold</b></div></body></html>",
+    "<p>no body tag</p>",
+    "",
+    # strings get_text() hides (template, ruby annotations), entities, a PI
+    "<html><head><title> Tom &amp; Jerry </title></head><body><template><main>t</main>"
+    "</template><p>a<ruby>漢<rt>kan</rt></ruby>b<?pi x?>c<br>d</p></body></html>",
+    '<?xml version="1.0" encoding="utf-8"?><meta charset="iso-8859-1"><p>héllo</p>',
+    "<svg><title>icon</title></svg><table><tr><td>cell</td></tr>loose</table>",
+    "<!-- only a comment -->",
+]
+
+
+def test_single_pass_parse_page_matches_original() -> None:
+    """The tree walk + combined regexes produce the same text as before."""
+    for html in [wix_page(i) for i in range(3)] + _EDGE_PAGES:
+        expected = original_parse_page(BeautifulSoup(html, "lxml"))
+        assert ingester._parse_page(BeautifulSoup(html, "lxml")) == expected
+
+
+def test_fast_parser_matches_beautifulsoup() -> None:
+    """HTML_PARSER="fast" returns the same (text, title) as "soup"."""
+    for html in [wix_page(i) for i in range(3)] + _EDGE_PAGES:
+        assert ingester._parse_html_fast(html) == ingester._parse_html(html)
@@ -0,0 +1,47 @@
+"""Offline tests for the BM25 index and hybrid (BM25 + dense) retrieval."""
+
+from langchain_community.vectorstores import FAISS
+
+from app.docstore import load_index, save_index
+from app.keyword_index import (
+    BM25Index, HybridRetriever, load_keyword_index, reciprocal_rank_fusion,
+)
+from app.testing import CountingEmbeddings
+
+_TEXTS = [f"Promtior generative AI adoption story number {i}." for i in range(30)] + [
+    "Case study: CIEMSA automated its reporting with a Promtior agent.",
+    "Case study: HandyPaigo payments support bot.",
+]
+
+
+def _retriever(tmp_path) -> tuple[HybridRetriever, CountingEmbeddings]:
+    embeddings = CountingEmbeddings()
+    store = FAISS.from_texts(_TEXTS, embeddings, ids=[f"chunk-{i}" for i in range(len(_TEXTS))])
+    save_index(store, str(tmp_path), keyword_index=BM25Index.from_texts(_TEXTS))
+    store = load_index(str(tmp_path), embeddings)
+    keyword_index = load_keyword_index(str(tmp_path), store.index.ntotal)
+    return HybridRetriever(vector_store=store, keyword_index=keyword_index, k=3), embeddings
+
+
+def test_keyword_queries_skip_the_embedding(tmp_path) -> None:
+    retriever, embeddings = _retriever(tmp_path)
+    assert retriever.invoke("CIEMSA")[0].id == "chunk-30"
+    assert retriever.invoke("paigo")[0].id == "chunk-31"  # run-together PDF words
+    assert embeddings.queries == 0
+
+    question = "Which client automated reporting with CIEMSA?"
+    dense = retriever.vector_store.similarity_search(question, k=3)
+    docs = retriever.invoke(question)
+    assert embeddings.queries == 2
+    assert "chunk-30" not in [d.id for d in dense]  # fake embeddings are random
+    assert len(docs) == 3 and "chunk-30" in [d.id for d in docs]
+
+
+def test_reciprocal_rank_fusion_and_persistence(tmp_path) -> None:
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]], 60) == [1, 3, 2]
+
+    retriever, _ = _retriever(tmp_path)
+    fresh = BM25Index.from_texts(_TEXTS)
+    assert retriever.keyword_index.terms == fresh.terms
+    assert retriever.keyword_index.search("adoption story 7", 5) == fresh.search("adoption story 7", 5)
+    assert load_keyword_index(str(tmp_path / "missing"), 0) is None
@@ -0,0 +1,64 @@
+"""Offline latency test for token streaming through the served runnable."""
+
+import itertools
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app import nodes
+from app.agent import agent_runnable
+from app.answer_cache import get_answer_cache
+
+_ANSWER = (
+    "Promtior was founded in May 2023 by Emiliano Chinelli and Ignacio Acuña "
+    "and helps organizations adopt Generative AI. (Source: Website)"
+)
+
+
+class _SlowStreamingModel(GenericFakeChatModel):
+    """Fake chat model that emits one word every ``delay`` seconds."""
+
+    delay: float = 0.02
+
+    def _stream(self, *args, **kwargs):
+        for chunk in super()._stream(*args, **kwargs):
+            time.sleep(self.delay)
+            yield chunk
+
+
+class _FakeRetriever:
+    def invoke(self, question: str) -> list[Document]:
+        return [Document(page_content="Promtior was founded in 2023.",
+                         metadata={"source": "https://www.promtior.ai", "source_type": "website"})]
+
+
+@pytest.mark.usefixtures("byte_tokenizer")
+def test_stream_time_to_first_token(monkeypatch) -> None:
+    """/stream emits deltas long before generation ends; /invoke gets the full text."""
+    llm = _SlowStreamingModel(messages=itertools.cycle([AIMessage(content=_ANSWER)]))
+    embeddings = DeterministicFakeEmbedding(size=8)
+    monkeypatch.setattr(nodes, "get_llm", lambda: llm)
+    get_answer_cache.cache_clear()
+    monkeypatch.setattr(nodes, "get_retriever", lambda: _FakeRetriever())
+    monkeypatch.setattr(nodes, "get_query_embeddings", lambda: embeddings)
+
+    start = time.perf_counter()
+    deltas: list[str] = []
+    ttft = None
+    for chunk in agent_runnable.stream({"question": "Streaming test: who founded Promtior?"}):
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        deltas.append(chunk["answer"])
+    total = time.perf_counter() - start
+
+    assert "".join(deltas) == _ANSWER
+    assert len(deltas) > 10
+    assert ttft < 10 * llm.delay  # within the first few words of generation
+    assert ttft < total / 4
+
+    result = agent_runnable.invoke({"question": "Streaming test: what does Promtior do?"})
+    assert result == {"answer": _ANSWER}
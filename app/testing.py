@@ -0,0 +1,20 @@
+"""Test doubles shared by the offline test modules."""
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings counting embedded texts and query calls."""
+
+    def __init__(self, size: int = 16) -> None:
+        self.inner = DeterministicFakeEmbedding(size=size)
+        self.embedded = 0
+        self.queries = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded += len(texts)
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries += 1
+        return self.inner.embed_query(text)
@@ -0,0 +1,128 @@
+"""Load test: sync-node vs async-node graph under concurrent requests.
+
+Usage:
+    python -m benchmarks.bench_agent_concurrency [--concurrency 1 50 200 500]
+        [--retrieve-latency 0.1] [--token-latency 0.01]
+
+Stubs stand in for OpenAI (query embedding, retriever, streaming LLM) with
+fixed latencies, so the numbers only reflect how the graph waits: the sync
+graph parks a threadpool thread per in-flight node, the async graph awaits
+on the event loop.  Both graphs are driven through ``astream`` exactly as
+LangServe drives them.
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import statistics
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app import nodes
+from app.agent import create_agent
+from app.config import logger
+from benchmarks.fake_openai import fake_vector
+
+_ANSWER = " ".join(["Promtior builds Generative AI solutions for companies."] * 4)
+
+
+class _StubEmbeddings(Embeddings):
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency)
+        return fake_vector(text, 16).tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        return fake_vector(text, 16).tolist()
+
+
+class _StubRetriever:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.docs = [Document(page_content="Promtior was founded in 2023.",
+                              metadata={"source": "https://www.promtior.ai", "source_type": "website"})]
+
+    def invoke(self, question: str) -> list[Document]:
+        time.sleep(self.latency)
+        return self.docs
+
+    async def ainvoke(self, question: str) -> list[Document]:
+        await asyncio.sleep(self.latency)
+        return self.docs
+
+
+class _StubChatModel(GenericFakeChatModel):
+    """One word per ``token_latency`` seconds, blocking or awaited."""
+
+    token_latency: float = 0.01
+
+    def _stream(self, *args, **kwargs):
+        for chunk in super()._stream(*args, **kwargs):
+            time.sleep(self.token_latency)
+            yield chunk
+
+    async def _astream(self, *args, **kwargs):
+        for chunk in super()._stream(*args, **kwargs):
+            await asyncio.sleep(self.token_latency)
+            yield chunk
+
+
+async def _load(graph, n: int, run: int) -> tuple[float, list[float]]:
+    """Fire ``n`` concurrent requests; (wall seconds, per-request latencies)."""
+
+    async def one(i: int) -> float:
+        start = time.perf_counter()
+        async for _ in graph.astream({"question": f"run {run} question {i}"}, stream_mode="custom"):
+            pass
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(n)))
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 200, 500])
+    parser.add_argument("--retrieve-latency", type=float, default=0.1)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    llm = _StubChatModel(
+        messages=itertools.cycle([AIMessage(content=_ANSWER)]),
+        token_latency=args.token_latency,
+    )
+    embeddings = _StubEmbeddings(latency=args.retrieve_latency / 5)
+    retriever = _StubRetriever(latency=args.retrieve_latency)
+    nodes.get_llm = lambda: llm
+    nodes.get_query_embeddings = lambda: embeddings
+    nodes.get_retriever = lambda: retriever
+
+    graphs = {"sync": create_agent(async_nodes=False), "async": create_agent()}
+    print(f"retrieve={args.retrieve_latency * 1000:.0f}ms "
+          f"token={args.token_latency * 1000:.0f}ms x {len(_ANSWER.split())} words")
+    print(f"{'mode':>5} {'conc':>5} {'wall s':>8} {'req/s':>8} {'p50 s':>7} {'p95 s':>7}")
+    run = 0
+    for n in args.concurrency:
+        for mode, graph in graphs.items():
+            run += 1
+            wall, latencies = asyncio.run(_load(graph, n, run))
+            p95 = statistics.quantiles(latencies, n=20)[-1] if n > 1 else latencies[0]
+            print(f"{mode:>5} {n:>5} {wall:>8.2f} {n / wall:>8.1f} "
+                  f"{statistics.median(latencies):>7.2f} {p95:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
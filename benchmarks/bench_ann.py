@@ -0,0 +1,85 @@
+"""Benchmark: recall@10 and query latency of the ANN index types vs Flat.
+
+Usage:
+    python -m benchmarks.bench_ann [--rows 10000 100000] [--dim 256] [--queries 200]
+
+Synthetic, clustered, unit-norm vectors (a rough stand-in for embeddings);
+recall is measured against the exact Flat results.  Each ANN type is swept
+over its query-time knob (IVF_NPROBE / HNSW_EF_SEARCH).  1M rows work with a
+smaller --dim (1M x 1536 float32 alone is 6 GB).
+"""
+
+import argparse
+import logging
+import time
+
+import faiss
+import numpy as np
+
+from app.config import logger
+from app.index_factory import build_index, tune_index
+
+_SWEEPS = {
+    "Flat": [None],
+    "IVFFlat": [1, 4, 16, 64],
+    "HNSW": [16, 64, 128, 256],
+    "IVFPQ": [4, 16, 64],
+}
+
+
+def _clustered(n: int, dim: int, rng: np.random.Generator, centers: np.ndarray) -> np.ndarray:
+    out = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 50_000):
+        m = min(50_000, n - start)
+        block = centers[rng.integers(0, len(centers), m)]
+        block += 0.5 * rng.standard_normal((m, dim), dtype=np.float32) / np.sqrt(dim) * 4
+        out[start:start + m] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return out
+
+
+def _per_query_ms(index: faiss.Index, queries: np.ndarray) -> tuple[float, np.ndarray]:
+    """Mean latency of one-at-a-time searches (the server's access pattern)."""
+    ids = np.empty((len(queries), 10), dtype=np.int64)
+    start = time.perf_counter()
+    for i, q in enumerate(queries):
+        ids[i] = index.search(q[None, :], 10)[1][0]
+    return (time.perf_counter() - start) * 1000 / len(queries), ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--types", nargs="+", default=list(_SWEEPS))
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((1_000, args.dim), dtype=np.float32)
+    queries = _clustered(args.queries, args.dim, rng, centers)
+
+    print(f"dim={args.dim} queries={args.queries} (k=10, one query per search call)")
+    print(f"{'rows':>8} {'type':>8} {'knob':>5} {'build s':>8} {'MB':>8} {'recall@10':>9} {'ms/query':>9}")
+    for rows in args.rows:
+        vectors = _clustered(rows, args.dim, rng, centers)
+        exact = None
+        for index_type in args.types:
+            start = time.perf_counter()
+            index = build_index(vectors, index_type)
+            build_s = time.perf_counter() - start
+            size_mb = faiss.serialize_index(index).nbytes / 2**20
+            for knob in _SWEEPS[index_type]:
+                if knob is not None:
+                    tune_index(index, nprobe=knob, ef_search=knob)
+                ms, ids = _per_query_ms(index, queries)
+                if exact is None:
+                    exact = build_index(vectors, "Flat").search(queries, 10)[1] \
+                        if index_type != "Flat" else ids
+                recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(ids, exact)])
+                print(f"{rows:>8} {index_type:>8} {knob or '-':>5} {build_s:>8.2f} "
+                      f"{size_mb:>8.1f} {recall:>9.3f} {ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: character vs token-budgeted chunking.
+
+Usage:
+    python -m benchmarks.bench_chunking [--pages 200] [--pdf data/AI Engineer.pdf] [--samples 1000]
+
+Splits the presentation PDF plus ``--pages`` synthetic Wix pages three ways:
+
+  - chars: CHUNK_SIZE / CHUNK_OVERLAP characters (len);
+  - tokens: CHUNK_TOKENS / CHUNK_TOKEN_OVERLAP tiktoken tokens, counting
+    every piece the splitter measures afresh;
+  - tokens, cached: the same through the memoized ingester._token_count.
+
+Reports chunking throughput and the token distribution of the chunks and of
+``--samples`` random RETRIEVER_K-chunk contexts (the prompt cost of one
+retrieve_node call).  Needs the tiktoken encoding (downloaded on first use).
+"""
+
+import argparse
+import logging
+import random
+import time
+from functools import partial
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app import ingester
+from app.config import Config, get_tokenizer, logger
+from benchmarks.standin import wix_page
+
+
+def _split(docs: list[Document], **kwargs) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    chunks = [c.page_content for doc in docs for c in ingester._split_document(doc, **kwargs)]
+    return time.perf_counter() - start, chunks
+
+
+def _percentiles(values: list[int]) -> str:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return f"{p5:>6.0f} {p50:>6.0f} {p95:>6.0f} {max(values):>6}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--pdf", default=Config.PDF_PATH)
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    encoder = get_tokenizer()
+    docs = ingester._load_pdf(args.pdf)
+    for i in range(args.pages):
+        text, title = ingester._parse_html(wix_page(i))
+        docs.append(Document(page_content=text, metadata={"title": title}))
+
+    def count(text: str) -> int:
+        return len(encoder.encode_ordinary(text))
+
+    tokens = {"chunk_size": Config.CHUNK_TOKENS, "chunk_overlap": Config.CHUNK_TOKEN_OVERLAP}
+    ingester._token_count.cache_clear()
+    modes = {
+        "chars": partial(_split, chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP),
+        "tokens": partial(_split, **tokens, length_function=count),
+        "tokens, cached": partial(_split, **tokens, length_function=ingester._token_count),
+    }
+
+    rng = random.Random(0)
+    k = Config.RETRIEVER_K
+    print(f"{len(docs)} documents ({sum(len(d.page_content) for d in docs) / 1e6:.1f} M chars); "
+          f"chars {Config.CHUNK_SIZE}/{Config.CHUNK_OVERLAP}, "
+          f"tokens {Config.CHUNK_TOKENS}/{Config.CHUNK_TOKEN_OVERLAP}, k={k}")
+    print(f"{'mode':>14} {'s':>6} {'docs/s':>7} {'chunks':>6} | tokens per chunk "
+          f"p5/p50/p95/max | per {k}-chunk context p5/p50/p95/max")
+    for name, split in modes.items():
+        seconds, chunks = split(docs)
+        sizes = [count(chunk) for chunk in chunks]
+        contexts = [sum(rng.sample(sizes, k)) for _ in range(args.samples)]
+        print(f"{name:>14} {seconds:>6.2f} {len(docs) / seconds:>7.0f} {len(chunks):>6} | "
+              f"{_percentiles(sizes)} | {_percentiles(contexts)}")
+    print(f"token count cache: {ingester._token_count.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
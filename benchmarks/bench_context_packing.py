@@ -0,0 +1,67 @@
+"""Benchmark: prompt context size and recall under context token budgets.
+
+Usage:
+    python -m benchmarks.bench_context_packing [--eval benchmarks/retrieval_eval.jsonl]
+        [--k 5] [--budgets 0 2000 1200 800]
+
+Retrieves the top ``--k`` chunks of every eval query from the index in
+Config.INDEX_PATH (BM25, so no OPENAI_API_KEY is needed), packs them with
+app.context_packer for each budget (0 = merge only, no limit) and reports
+the context tokens (mean / p95 / max), the chunks merged away, passages
+dropped and truncated, the packing time, and the hit rate: queries whose
+context still holds a chunk of a relevant source.  Needs the tiktoken
+encoding of Config.MODEL_NAME (downloaded on first use).
+"""
+
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from app import context_packer
+from app.config import Config, logger
+from app.docstore import load_index
+from app.keyword_index import load_keyword_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--eval", default="benchmarks/retrieval_eval.jsonl")
+    parser.add_argument("--k", type=int, default=Config.RETRIEVER_K)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 2000, 1200, 800])
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with open(args.eval, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    store = load_index(Config.INDEX_PATH, None, expected_metadata=Config.embedding_metadata())
+    keyword_index = load_keyword_index(Config.INDEX_PATH, store.index.ntotal)
+    if keyword_index is None:
+        raise SystemExit(f"No BM25 index in '{Config.INDEX_PATH}'; re-run ingester.py")
+    retrieved = [
+        [store.docstore.search(p) for p, _ in keyword_index.search(case["query"], args.k)]
+        for case in cases
+    ]
+
+    print(f"{len(cases)} queries, k={args.k}, {Config.MODEL_NAME} tokens")
+    print(f"{'budget':>6} {'mean':>6} {'p95':>6} {'max':>6} {'merged':>6} {'dropped':>7} "
+          f"{'trunc':>5} {'ms/q':>5} {'hit rate':>8}")
+    for budget in args.budgets:
+        context_packer.count_tokens.cache_clear()
+        start = time.perf_counter()
+        packed = [context_packer.pack_context(docs, budget) for docs in retrieved]
+        ms = (time.perf_counter() - start) * 1000 / len(cases)
+        tokens = [p.tokens for p in packed]
+        hits = sum(
+            any(f": {url}]" in p.context for url in case["sources"]) for p, case in zip(packed, cases)
+        )
+        print(f"{budget or 'none':>6} {np.mean(tokens):>6.0f} {np.percentile(tokens, 95):>6.0f} "
+              f"{max(tokens):>6} {sum(p.merged for p in packed):>6} "
+              f"{sum(p.dropped for p in packed):>7} {sum(p.truncated for p in packed):>5} "
+              f"{ms:>5.2f} {hits / len(cases):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
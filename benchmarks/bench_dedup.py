@@ -0,0 +1,62 @@
+"""Benchmark: chunks (and embedding tokens) saved by near-duplicate dropping.
+
+Usage:
+    python -m benchmarks.bench_dedup [--pages 300] [--thresholds 0.7 0.85 0.95]
+
+Parses and splits ``--pages`` synthetic Wix pages (the same hero text and
+paragraphs on every page, with the page number in each paragraph), then
+runs them through ChunkDeduplicator at each threshold. It reports the
+chunks and estimated tokens that would still be embedded (4 characters
+per token), the time spent per chunk, and the number of distinct (dropped
+page, kept page) pairs in the merge report.
+"""
+
+import argparse
+import logging
+import time
+
+from langchain_core.documents import Document
+
+from app import ingester
+from app.config import logger
+from app.dedup import ChunkDeduplicator
+from benchmarks.standin import wix_page
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.85, 0.95])
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    docs = []
+    for i in range(args.pages):
+        text, title = ingester._parse_html(wix_page(i))
+        source = f"https://www.promtior.ai/page-{i}"
+        docs.append(ingester._split_document(
+            Document(page_content=text, metadata={"source": source, "title": title}),
+            **ingester._chunking(),
+        ))
+    total = sum(len(chunks) for chunks in docs)
+    chars = sum(len(c.page_content) for chunks in docs for c in chunks)
+
+    print(f"{args.pages} pages, {total} chunks, ~{chars // 4} tokens")
+    print(f"{'threshold':>9} {'kept':>6} {'dropped':>7} {'~tokens':>8} {'us/chunk':>8} "
+          f"{'sources merged':>14}")
+    for threshold in args.thresholds:
+        dedup = ChunkDeduplicator(threshold)
+        kept_chars = 0
+        start = time.perf_counter()
+        for chunks in docs:
+            key = chunks[0].metadata["source"]
+            ids = [f"{key}-{n}" for n in range(len(chunks))]
+            kept, _, _ = dedup.filter(key, chunks, ids)
+            kept_chars += sum(len(c.page_content) for c in kept)
+        seconds = time.perf_counter() - start
+        print(f"{threshold:>9.2f} {dedup.kept:>6} {dedup.dropped:>7} {kept_chars // 4:>8} "
+              f"{seconds * 1e6 / total:>8.0f} {len(dedup.merges):>14}")
+
+
+if __name__ == "__main__":
+    main()
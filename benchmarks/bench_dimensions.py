@@ -0,0 +1,61 @@
+"""Benchmark: recall@k of shortened embeddings vs the full 1536 dimensions.
+
+Usage:
+    python -m benchmarks.bench_dimensions [--dims 256 512 1024 1536] [--index faiss_index]
+
+text-embedding-3 vectors are Matryoshka-trained: asking the API for
+``dimensions=d`` returns the first d components re-normalized, so the
+shortened vectors are computed from the full ones in the existing index
+(no API calls).  Every chunk is used once as a query against the rest
+(leave-one-out); recall is measured against the full-dimension neighbours.
+"""
+
+import argparse
+import logging
+
+import faiss
+import numpy as np
+
+from app.config import Config, logger
+from app.docstore import INDEX_FILE
+
+
+def _shorten(vectors: np.ndarray, dim: int) -> np.ndarray:
+    short = np.ascontiguousarray(vectors[:, :dim])
+    return short / np.linalg.norm(short, axis=1, keepdims=True)
+
+
+def _neighbours(vectors: np.ndarray, k: int) -> np.ndarray:
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index.search(vectors, k + 1)[1][:, 1:]  # drop the query itself
+
+
+def _recall(found: np.ndarray, exact: np.ndarray, k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(e[:k])) / k for f, e in zip(found, exact)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 512, 1024, 1536])
+    parser.add_argument("--index", default=Config.INDEX_PATH)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    index = faiss.read_index(f"{args.index}/{INDEX_FILE}")
+    vectors = index.reconstruct_n(0, index.ntotal)
+    full_dim = vectors.shape[1]
+    exact = _neighbours(_shorten(vectors, full_dim), 10)
+
+    print(f"{index.ntotal} chunks from {args.index} ({full_dim} dims), leave-one-out queries")
+    print(f"{'dims':>6} {'B/vec':>6} {'x smaller':>9} {'R@1':>6} {'R@5':>6} {'R@10':>6}")
+    for dim in args.dims:
+        if dim > full_dim:
+            continue
+        found = _neighbours(_shorten(vectors, dim), 10)
+        print(f"{dim:>6} {4 * dim:>6} {full_dim / dim:>9.1f} {_recall(found, exact, 1):>6.3f} "
+              f"{_recall(found, exact, 5):>6.3f} {_recall(found, exact, 10):>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
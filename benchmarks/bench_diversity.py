@@ -0,0 +1,80 @@
+"""Benchmark: similarity vs MMR / per-source-capped retrieval.
+
+Usage:
+    python -m benchmarks.bench_diversity [--eval benchmarks/retrieval_eval.jsonl]
+        [--k 3 5] [--lambdas 0.5 0.7] [--cap 2]
+
+For every eval query (query -> relevant source URLs) the top
+HYBRID_CANDIDATES chunks are ranked (hybrid RRF with OPENAI_API_KEY, BM25
+alone without it) and the top k are picked per mode from the vectors stored
+in Config.INDEX_PATH.  Reports, per k and mode, the hit rate (a relevant
+source among the k chunks), the mean distinct sources and the largest share
+of one source in the k chunks, and the selection time per query (docstore
+reads included).
+"""
+
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from app.config import Config, get_query_embeddings, logger
+from app.diversity import diversify
+from app.docstore import load_index
+from app.index_factory import enable_reconstruct
+from app.keyword_index import HybridRetriever, fused_scores, load_keyword_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--eval", default="benchmarks/retrieval_eval.jsonl")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, Config.RETRIEVER_K])
+    parser.add_argument("--lambdas", type=float, nargs="+", default=[0.5, Config.MMR_LAMBDA])
+    parser.add_argument("--cap", type=int, default=Config.MAX_CHUNKS_PER_SOURCE or 2)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with open(args.eval, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    embeddings = get_query_embeddings() if Config.OPENAI_API_KEY else None
+    store = load_index(Config.INDEX_PATH, embeddings, expected_metadata=Config.embedding_metadata())
+    enable_reconstruct(store.index)
+    keyword_index = load_keyword_index(Config.INDEX_PATH, store.index.ntotal)
+    if keyword_index is None:
+        raise SystemExit(f"No BM25 index in '{Config.INDEX_PATH}'; re-run ingester.py")
+    hybrid = HybridRetriever(
+        vector_store=store, keyword_index=keyword_index, candidates=Config.HYBRID_CANDIDATES,
+    )
+    ranked = []
+    for case in cases:
+        keyword = keyword_index.search(case["query"], Config.HYBRID_CANDIDATES)
+        if embeddings is not None:
+            dense = hybrid._dense(embeddings.embed_query(case["query"]))
+            keyword = fused_scores([dense, [p for p, _ in keyword]], Config.RRF_K)
+        ranked.append(keyword)
+
+    modes = {"similarity": (1.0, 0), f"cap {args.cap}": (1.0, args.cap)}
+    for lambda_mult in args.lambdas:
+        modes[f"mmr {lambda_mult}"] = (lambda_mult, 0)
+        modes[f"mmr {lambda_mult} + cap"] = (lambda_mult, args.cap)
+
+    print(f"{len(cases)} queries, {store.index.ntotal} chunks, "
+          f"{'hybrid' if embeddings is not None else 'BM25'} candidates")
+    print(f"{'k':>2} {'mode':<16} {'hit rate':>8} {'sources':>7} {'top share':>9} {'µs/q':>7}")
+    for k in args.k:
+        for name, (lambda_mult, cap) in modes.items():
+            start = time.perf_counter()
+            results = [diversify(store, r, k, lambda_mult, cap) for r in ranked]
+            micros = (time.perf_counter() - start) * 1e6 / len(cases)
+            sources = [[d.metadata.get("source", "") for d in docs] for docs in results]
+            hits = sum(bool(set(s) & set(c["sources"])) for s, c in zip(sources, cases))
+            distinct = np.mean([len(set(s)) for s in sources])
+            share = np.mean([max(s.count(x) for x in s) / len(s) for s in sources if s])
+            print(f"{k:>2} {name:<16} {hits / len(cases):>8.1%} {distinct:>7.2f} "
+                  f"{share:>9.0%} {micros:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
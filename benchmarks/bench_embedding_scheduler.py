@@ -0,0 +1,71 @@
+"""Benchmark: fixed "50 docs + sleep(1)" loop vs the embedding scheduler.
+
+Usage:
+    python -m benchmarks.bench_embedding_scheduler [--texts 2000] [--tpm 1200000] [--burst 150000]
+
+Both run against the local fake embeddings API (benchmarks/fake_openai.py)
+with the given server-side tokens-per-minute quota.  The scheduler starts
+with a deliberately optimistic local quota so it has to learn the real one
+from 429s and x-ratelimit-* headers.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+import openai
+
+from app.embedding_scheduler import EmbeddingScheduler
+from benchmarks.fake_openai import FakeEmbeddingsServer
+
+
+def _legacy_loop(server: FakeEmbeddingsServer, texts: list[str]) -> float:
+    """The previous _embed_in_batches behaviour (client retries on 429)."""
+    client = openai.OpenAI(base_url=server.base_url, api_key="bench")
+    start = time.perf_counter()
+    for i in range(0, len(texts), 50):
+        if i:
+            time.sleep(1)
+        client.embeddings.create(model="text-embedding-3-small", input=texts[i:i + 50])
+    return time.perf_counter() - start
+
+
+def _scheduled(server: FakeEmbeddingsServer, texts: list[str]) -> tuple[float, EmbeddingScheduler]:
+    client = openai.AsyncOpenAI(base_url=server.base_url, api_key="bench", max_retries=0)
+    scheduler = EmbeddingScheduler(
+        client, model="text-embedding-3-small", tokens_per_minute=server.tokens_per_minute * 10,
+    )
+    start = time.perf_counter()
+    asyncio.run(scheduler.embed(texts))
+    return time.perf_counter() - start, scheduler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--tpm", type=int, default=1_200_000)
+    parser.add_argument("--burst", type=int, default=150_000)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    texts = [f"chunk {i}: " + "Promtior builds bionic organizations with GenAI. " * 5
+             for i in range(args.texts)]
+
+    server_kwargs = {"tokens_per_minute": args.tpm, "burst": args.burst, "latency": args.latency}
+    with FakeEmbeddingsServer(**server_kwargs) as server:
+        legacy_s = _legacy_loop(server, texts)
+    with FakeEmbeddingsServer(**server_kwargs) as server:
+        scheduled_s, scheduler = _scheduled(server, texts)
+        rate_limited = server.rate_limited
+
+    print(f"texts={args.texts} server_tpm={args.tpm} burst={args.burst} "
+          f"latency={args.latency * 1000:.0f}ms")
+    print(f"fixed loop : {legacy_s:7.2f}s")
+    print(f"scheduler  : {scheduled_s:7.2f}s  speedup x{legacy_s / scheduled_s:.1f}  "
+          f"({scheduler.stats['requests']} requests, {rate_limited} x 429)")
+
+
+if __name__ == "__main__":
+    main()
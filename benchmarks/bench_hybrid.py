@@ -0,0 +1,73 @@
+"""Benchmark: dense vs BM25 vs hybrid (RRF) retrieval on a labelled eval set.
+
+Usage:
+    python -m benchmarks.bench_hybrid [--eval benchmarks/retrieval_eval.jsonl] [--k 5]
+
+Runs every query of the eval set (query -> relevant source URLs) against
+the index in Config.INDEX_PATH and reports hit rate@k (a relevant source
+among the top k chunks) and MRR.  Dense and hybrid retrieval embed the
+queries, so they need OPENAI_API_KEY; without it only BM25 is measured.
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from app.config import Config, get_query_embeddings, logger
+from app.docstore import load_index
+from app.keyword_index import HybridRetriever, load_keyword_index
+
+
+def _score(hits: list[list[str]], labels: list[set[str]], k: int) -> tuple[float, float]:
+    """Hit rate@k and mean reciprocal rank of the first relevant chunk."""
+    found = [next((r for r, s in enumerate(h[:k], 1) if s in l), 0) for h, l in zip(hits, labels)]
+    return sum(r > 0 for r in found) / len(found), sum(1 / r for r in found if r) / len(found)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--eval", default="benchmarks/retrieval_eval.jsonl")
+    parser.add_argument("--k", type=int, default=Config.RETRIEVER_K)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with open(args.eval, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    labels = [set(case["sources"]) for case in cases]
+
+    embeddings = get_query_embeddings() if Config.OPENAI_API_KEY else None
+    store = load_index(Config.INDEX_PATH, embeddings, expected_metadata=Config.embedding_metadata())
+    keyword_index = load_keyword_index(Config.INDEX_PATH, store.index.ntotal)
+    if keyword_index is None:
+        raise SystemExit(f"No BM25 index in '{Config.INDEX_PATH}'; re-run ingester.py")
+    hybrid = HybridRetriever(
+        vector_store=store, keyword_index=keyword_index, k=args.k,
+        candidates=Config.HYBRID_CANDIDATES, rrf_k=Config.RRF_K,
+        keyword_only_max_terms=Config.KEYWORD_ONLY_MAX_TERMS,
+    )
+
+    def source(position: int) -> str:
+        return store.docstore.search(position).metadata.get("source", "")
+
+    modes = {"bm25": lambda q: [source(p) for p, _ in keyword_index.search(q, args.k)]}
+    if embeddings is not None:
+        modes["dense"] = lambda q: [d.metadata["source"] for d in store.similarity_search(q, args.k)]
+        modes["hybrid"] = lambda q: [d.metadata["source"] for d in hybrid.invoke(q)]
+    else:
+        print("OPENAI_API_KEY not set: dense and hybrid skipped")
+
+    keyword_only = sum(hybrid.is_keyword_query(case["query"]) for case in cases)
+    print(f"{len(cases)} queries, {store.index.ntotal} chunks, k={args.k}; "
+          f"{keyword_only} keyword-only queries (no embedding call in hybrid)")
+    print(f"{'mode':>7} {'hit@k':>6} {'MRR':>6} {'ms/query':>9}")
+    for name, search in modes.items():
+        start = time.perf_counter()
+        hits = [search(case["query"]) for case in cases]
+        ms = (time.perf_counter() - start) * 1000 / len(cases)
+        hit_rate, mrr = _score(hits, labels, args.k)
+        print(f"{name:>7} {hit_rate:>6.3f} {mrr:>6.3f} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
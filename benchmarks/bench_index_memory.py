@@ -0,0 +1,128 @@
+"""Benchmark: per-worker startup time and memory of the index loaders.
+
+Usage:
+    python -m benchmarks.bench_index_memory [--rows 50000] [--dim 1536] [--workers 4]
+
+Builds a synthetic index (random vectors, ~1 KB chunks) in a temp dir, both
+as the old pickled LangChain format (index.pkl, FAISS.load_local) and the
+current one (docstore.bin), then starts ``--workers`` processes per loader
+that load it, run a few searches, and report /proc/self/smaps_rollup while
+all of them are alive.  RSS counts shared file pages in full for every process; PSS splits
+them between the processes mapping them, so PSS is the real per-worker cost.
+Linux only.
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.config import logger
+from app.docstore import load_index, save_index
+
+_FIELDS = ("Rss", "Pss", "Pss_Anon", "Pss_File")
+
+
+def _memory() -> dict[str, float]:
+    """Selected smaps_rollup fields of this process, in MB."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in _FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+
+def _build(path: str, rows: int, dim: int) -> None:
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(dim)
+    for start in range(0, rows, 10_000):
+        index.add(rng.standard_normal((min(10_000, rows - start), dim), dtype=np.float32))
+    filler = "Promtior helps companies adopt generative AI. " * 22
+    ids = [f"chunk-{i}" for i in range(rows)]
+    docstore = InMemoryDocstore({
+        ids[i]: Document(
+            page_content=f"{i} {filler}",
+            metadata={"source": f"https://www.promtior.ai/page-{i % 500}",
+                      "source_type": "website", "title": "Promtior"},
+        )
+        for i in range(rows)
+    })
+    store = FAISS(DeterministicFakeEmbedding(size=dim), index, docstore, dict(enumerate(ids)))
+    save_index(store, os.path.join(path, "current"))
+    store.save_local(os.path.join(path, "pickle"))
+
+
+def _load(path: str, mode: str, dim: int) -> FAISS:
+    embeddings = DeterministicFakeEmbedding(size=dim)
+    if mode == "pickle":
+        return FAISS.load_local(
+            os.path.join(path, "pickle"), embeddings, allow_dangerous_deserialization=True,
+        )
+    return load_index(os.path.join(path, "current"), embeddings, use_mmap=mode == "mmap")
+
+
+def _worker(path: str, mode: str, dim: int, barrier, results) -> None:
+    logger.setLevel(logging.WARNING)
+    before = _memory()
+    start = time.perf_counter()
+    store = _load(path, mode, dim)
+    load_s = time.perf_counter() - start
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(20):
+        store.similarity_search_by_vector(rng.standard_normal(dim).tolist(), k=5)
+    barrier.wait()  # every worker is loaded: shared pages are split now
+    results.put((before, _memory(), load_s))
+    barrier.wait()
+
+
+def _run(path: str, mode: str, dim: int, workers: int) -> list[tuple]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(path, mode, dim, barrier, results))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _build(tmp, args.rows, args.dim)
+        sizes = {
+            name: os.path.getsize(os.path.join(tmp, folder, name)) / 2**20
+            for folder in ("pickle", "current") for name in os.listdir(os.path.join(tmp, folder))
+        }
+        print(f"rows={args.rows} dim={args.dim} workers={args.workers} files: "
+              + ", ".join(f"{name} {mb:.0f}MB" for name, mb in sorted(sizes.items())))
+        print(f"{'mode':>10} {'load s':>7} " + " ".join(f"{f + ' MB':>12}" for f in _FIELDS)
+              + "   (per worker, mean; baseline subtracted)")
+        for mode in ("pickle", "in-memory", "mmap"):
+            runs = _run(tmp, mode, args.dim, args.workers)
+            deltas = {f: np.mean([after[f] - before[f] for before, after, _ in runs]) for f in _FIELDS}
+            load_s = np.mean([load_s for _, _, load_s in runs])
+            print(f"{mode:>10} {load_s:>7.2f} " + " ".join(f"{deltas[f]:>12.1f}" for f in _FIELDS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark: streaming ingestion vs the all-at-once (batch) behaviour.
+
+Usage:
+    python -m benchmarks.bench_ingest_pipeline [--pages 2000] [--latency 0.02]
+        [--embed-latency 0.2] [--dim 1536]
+
+Runs a full ingestion against the local stand-in site, with a fake
+embedding API that sleeps ``--embed-latency`` per 100 texts and returns
+``--dim``-d vectors.  "batch" reproduces the previous run_ingestion
+(unbounded queue, INGEST_BATCH_CHUNKS=0: everything is crawled and chunked
+before the first embedding call, one save at the end); "streaming" uses the
+configured queue size and batch commits.  Each mode runs in a fresh
+process so the reported peak RSS (ru_maxrss) is its own.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app import ingester
+from app.config import Config, logger
+from benchmarks.fake_openai import fake_vector
+from benchmarks.standin import StandInSite
+
+
+class _SlowScheduler:
+    def __init__(self, latency: float, dim: int) -> None:
+        self.latency = latency
+        self.dim = dim
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency * math.ceil(len(texts) / 100))
+        return [fake_vector(text, self.dim).tolist() for text in texts]
+
+
+def _child(args: argparse.Namespace) -> None:
+    """Run one ingestion in this process and print its stats as JSON."""
+    logger.setLevel(logging.WARNING)
+    if args.mode == "batch":
+        Config.INGEST_QUEUE_SIZE = 0
+        Config.INGEST_BATCH_CHUNKS = 0
+    scheduler = _SlowScheduler(args.embed_latency, args.dim)
+    ingester.EmbeddingScheduler.from_config = classmethod(lambda cls: scheduler)
+    ingester.get_embeddings = lambda: DeterministicFakeEmbedding(size=args.dim)
+    ingester._load_pdf = lambda path: []
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StandInSite(n_pages=args.pages, latency=args.latency) as site:
+        Config.INDEX_PATH = f"{tmp}/index"
+        Config.HTTP_CACHE_PATH = f"{tmp}/http_cache.json"
+        Config.EMBEDDING_CACHE_PATH = f"{tmp}/embeddings.sqlite"
+        Config.EMBEDDING_DIMENSIONS = args.dim
+        Config.SITEMAPS = [(site.sitemap_url, "website")]
+        start = time.perf_counter()
+        ingester.run_ingestion()
+        seconds = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--embed-latency", type=float, default=0.2)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--mode", choices=["batch", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        _child(args)
+        return
+
+    print(f"pages={args.pages} page latency={args.latency * 1000:.0f}ms "
+          f"embed latency={args.embed_latency * 1000:.0f}ms/100 texts dim={args.dim} "
+          f"(queue={Config.INGEST_QUEUE_SIZE}, batch={Config.INGEST_BATCH_CHUNKS} chunks)")
+    print(f"{'mode':>9} {'wall s':>7} {'peak RSS MB':>11}")
+    for mode in ("batch", "streaming"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_ingest_pipeline", *sys.argv[1:],
+             "--mode", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        stats = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:>9} {stats['seconds']:>7.2f} {stats['peak_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark: crawling several sites one after another vs together.
+
+Usage:
+    python -m benchmarks.bench_multisite [--sites 3] [--pages 100] [--latency 0.02]
+
+Starts ``--sites`` stand-in sites (site i answers with ``(i + 1) *
+--latency`` seconds of latency, so they differ in speed), each behind a
+nested, partly gzip-compressed sitemap index.  "sequential" crawls them one
+sitemap at a time, like the old per-sitemap loop; "together" hands all of
+them to _crawl_sitemaps.  Each site is also crawled alone, and the
+together time is compared against the slowest of those.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from contextlib import ExitStack
+
+from app import ingester
+from app.config import logger
+from app.http_cache import HttpValidatorCache
+from benchmarks.standin import StandInSite
+
+
+def _crawl(sitemaps: list[tuple[str, str]]) -> tuple[float, int]:
+    async def crawl() -> int:
+        out: asyncio.Queue = asyncio.Queue()
+        await ingester._crawl_sitemaps(sitemaps, HttpValidatorCache(), out)
+        return out.qsize()
+
+    start = time.perf_counter()
+    docs = asyncio.run(crawl())
+    return time.perf_counter() - start, docs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sites", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with ExitStack() as stack:
+        sites = [
+            stack.enter_context(StandInSite(n_pages=args.pages, latency=(i + 1) * args.latency))
+            for i in range(args.sites)
+        ]
+        sitemaps = [(site.sitemap_index_url, f"site-{i}") for i, site in enumerate(sites)]
+        alone = [_crawl([sitemap])[0] for sitemap in sitemaps]
+        sequential = sum(_crawl([sitemap])[0] for sitemap in sitemaps)
+        together, docs = _crawl(sitemaps)
+
+    print(f"{args.sites} sites x {args.pages} pages, latency "
+          f"{args.latency * 1000:.0f}..{args.sites * args.latency * 1000:.0f}ms, {docs} docs")
+    print("alone     : " + "  ".join(f"{s:.2f}s" for s in alone))
+    print(f"sequential: {sequential:7.2f}s")
+    print(f"together  : {together:7.2f}s  ({together / max(alone):.2f} x slowest site)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: page cleaning and HTML parsing throughput per MB of HTML.
+
+Usage:
+    python -m benchmarks.bench_parse_page [--fixtures DIR] [--pages 200] [--repeat 3]
+
+Cleans every saved ``*.html`` page in ``--fixtures`` (or ``--pages``
+synthetic Wix-shaped pages) and reports time per MB of HTML for:
+
+  - cleaning: the single-pass _parse_page vs the original decompose +
+    re.sub loop, with the BeautifulSoup tree built outside the timed
+    section (a fresh one per run, since the original decomposes it);
+  - parsing end to end (HTML -> text, title): HTML_PARSER "soup" vs "fast".
+
+Each pair is also checked for identical output.
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from app import ingester
+from app.config import logger
+from benchmarks.bench_parse_pool import _BULK
+from benchmarks.standin import wix_page
+
+
+def original_parse_page(soup: BeautifulSoup) -> str:
+    """The original _parse_page (decompose + one re.sub per pattern)."""
+    for tag in soup.find_all(["nav", "footer", "header", "script", "style",
+                              "noscript", "iframe", "svg", "picture"]):
+        tag.decompose()
+    for img in soup.find_all("img"):
+        img.decompose()
+    main = soup.find("main") or soup.find("article") or soup.find("body")
+    if main is None:
+        return ""
+    text = main.get_text(separator="\n", strip=True)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r"[\u200b\u200c\u200d\ufeff]", "", text)
+    for pattern in [r"top of page", r"bottom of page", r"Privacy Policy",
+                    r"Ancla \d+", r"cookie", r"suscri\w+"]:
+        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\n\s*\n", "\n\n", text)
+    return text.strip()
+
+
+def _clean(htmls: list[str], parse_page, repeat: int) -> tuple[float, list[str]]:
+    """Best-of-``repeat`` seconds to clean all pages, and the texts."""
+    best = float("inf")
+    for _ in range(repeat):
+        soups = [BeautifulSoup(html, "lxml") for html in htmls]
+        start = time.perf_counter()
+        texts = [parse_page(soup) for soup in soups]
+        best = min(best, time.perf_counter() - start)
+    return best, texts
+
+
+def _parse(htmls: list[str], parse_html, repeat: int) -> tuple[float, list[tuple[str, str]]]:
+    """Best-of-``repeat`` seconds to parse all pages, and the results."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = [parse_html(html) for html in htmls]
+        best = min(best, time.perf_counter() - start)
+    return best, parsed
+
+
+def _report(htmls: list[str], size_mb: float, runs: dict[str, tuple[float, list]]) -> None:
+    for name, (seconds, _) in runs.items():
+        print(f"{name:>11} {seconds:>7.3f} {seconds * 1000 / size_mb:>7.1f} "
+              f"{size_mb / seconds:>7.1f}")
+    first, second = (outputs for _, outputs in runs.values())
+    same = sum(a == b for a, b in zip(first, second))
+    print(f"identical output on {same}/{len(htmls)} pages")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", help="directory of saved .html pages")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    if args.fixtures:
+        htmls = []
+        for path in sorted(glob.glob(os.path.join(args.fixtures, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                htmls.append(f.read())
+    else:
+        htmls = [wix_page(i).replace("</head>", _BULK + "</head>") for i in range(args.pages)]
+    size_mb = sum(len(html.encode("utf-8")) for html in htmls) / 2**20
+
+    print(f"{len(htmls)} pages, {size_mb:.1f} MB of HTML")
+    print(f"{'cleaning':>11} {'s':>7} {'ms/MB':>7} {'MB/s':>7}")
+    _report(htmls, size_mb, {
+        "original": _clean(htmls, original_parse_page, args.repeat),
+        "single-pass": _clean(htmls, ingester._parse_page, args.repeat),
+    })
+    print(f"{'parsing':>11} {'s':>7} {'ms/MB':>7} {'MB/s':>7}")
+    _report(htmls, size_mb, {
+        "soup": _parse(htmls, ingester._parse_html, args.repeat),
+        "fast": _parse(htmls, ingester._parse_html_fast, args.repeat),
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark: HTML parsing + chunking inline vs in the worker process pool.
+
+Usage:
+    python -m benchmarks.bench_parse_pool [--fixtures DIR] [--pages 400] [--workers 1 2 4]
+
+Parses every saved ``*.html`` page in ``--fixtures`` (e.g. pages saved from
+the live site) with the Config.HTML_PARSER parser and splits the text with
+ingester._split_document, once per worker count (1 = inline, as before).
+Without ``--fixtures``, ``--pages`` synthetic Wix-shaped pages (inline
+scripts and styles padded to roughly the size of real Wix pages) are
+written to a temp dir first.
+"""
+
+import argparse
+import glob
+import logging
+import os
+import tempfile
+import time
+from functools import partial
+
+from langchain_core.documents import Document
+
+from app import ingester
+from app.config import logger
+from benchmarks.standin import wix_page
+
+# Wix pages ship a few hundred KB of inline JSON / JS / CSS around the content
+_BULK = "<script>window.viewerModel = {%s};</script><style>%s</style>" % (
+    ", ".join(f'"k{i}": "{"x" * 80}"' for i in range(2000)),
+    " ".join(f".c{i} {{ margin: {i}px; }}" for i in range(2000)),
+)
+
+
+def _write_fixtures(directory: str, pages: int) -> None:
+    for i in range(pages):
+        html = wix_page(i).replace("</head>", _BULK + "</head>")
+        with open(os.path.join(directory, f"page-{i}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def _parse_and_chunk(paths: list[str], workers: int) -> tuple[float, int]:
+    split = partial(ingester._split_document, **ingester._chunking())
+    start = time.perf_counter()
+    with ingester._worker_pool(workers) as pool:
+        htmls = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                htmls.append(f.read())
+        parsed = ingester._map(pool, ingester._html_parser(), htmls)
+        docs = [Document(page_content=text, metadata={"source": path, "title": title})
+                for path, (text, title) in zip(paths, parsed)]
+        chunks = ingester._map(pool, split, docs)
+    return time.perf_counter() - start, sum(len(c) for c in chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", help="directory of saved .html pages")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.fixtures or tmp
+        if not args.fixtures:
+            _write_fixtures(tmp, args.pages)
+        paths = sorted(glob.glob(os.path.join(directory, "*.html")))
+        size_mb = sum(os.path.getsize(p) for p in paths) / 2**20
+        print(f"{len(paths)} pages, {size_mb:.1f} MB of HTML, {os.cpu_count()} CPUs")
+        print(f"{'workers':>7} {'s':>7} {'pages/s':>8} {'chunks':>7} {'speedup':>7}")
+        baseline = None
+        for workers in args.workers:
+            seconds, chunks = _parse_and_chunk(paths, workers)
+            baseline = baseline or seconds
+            print(f"{workers:>7} {seconds:>7.2f} {len(paths) / seconds:>8.1f} {chunks:>7} "
+                  f"{baseline / seconds:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: size and recall@k of quantized encodings vs the float32 index.
+
+Usage:
+    python -m benchmarks.bench_quantization [--rows 20000] [--dim 1536] [--rerank 4]
+        [--pq-m 96]
+
+Builds the current index (Flat, float32) and each INDEX_ENCODING over the
+same synthetic clustered unit vectors, then reports bytes per vector, file
+size, recall@1/5/10 against the float32 results and latency, with and
+without the exact float32 re-rank (RerankIndex over the mmapped
+vectors.npy; its size is listed separately since it stays on disk).
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from app.config import Config, logger
+from app.index_factory import RerankIndex, build_index
+
+
+def _clustered(n: int, dim: int, rng: np.random.Generator, centers: np.ndarray) -> np.ndarray:
+    points = centers[rng.integers(0, len(centers), n)]
+    points += 2 * rng.standard_normal((n, dim), dtype=np.float32) / np.sqrt(dim)
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def _recall(found: np.ndarray, exact: np.ndarray, k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(e[:k])) / k for f, e in zip(found, exact)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rerank", type=int, default=Config.RERANK_FACTOR)
+    parser.add_argument("--pq-m", type=int, default=Config.PQ_M, help="bytes per vector for pq")
+    args = parser.parse_args()
+    Config.PQ_M = args.pq_m
+
+    logger.setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((200, args.dim), dtype=np.float32)
+    vectors = _clustered(args.rows, args.dim, rng, centers)
+    queries = _clustered(args.queries, args.dim, rng, centers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vectors_path = os.path.join(tmp, "vectors.npy")
+        np.save(vectors_path, vectors)
+        mapped = np.load(vectors_path, mmap_mode="r")
+        print(f"rows={args.rows} dim={args.dim} queries={args.queries}; "
+              f"vectors.npy for re-rank: {os.path.getsize(vectors_path) / 2**20:.1f} MB")
+        print(f"{'encoding':>9} {'rerank':>6} {'B/vec':>6} {'MB':>7} {'x smaller':>9} "
+              f"{'R@1':>6} {'R@5':>6} {'R@10':>6} {'ms/query':>9}")
+
+        exact = None
+        baseline_mb = None
+        for encoding in ("float32", "float16", "int8", "pq"):
+            index = build_index(vectors, "Flat", encoding)
+            path = os.path.join(tmp, f"{encoding}.faiss")
+            faiss.write_index(index, path)
+            size_mb = os.path.getsize(path) / 2**20
+            baseline_mb = baseline_mb or size_mb
+            searchers = [("-", index)]
+            if encoding != "float32" and args.rerank:
+                searchers.append((f"x{args.rerank}", RerankIndex(index, mapped, args.rerank)))
+            for rerank, searcher in searchers:
+                start = time.perf_counter()
+                found = np.vstack([searcher.search(q[None, :], 10)[1] for q in queries])
+                ms = (time.perf_counter() - start) * 1000 / len(queries)
+                if exact is None:
+                    exact = found
+                print(f"{encoding:>9} {rerank:>6} {index.sa_code_size():>6} {size_mb:>7.1f} "
+                      f"{baseline_mb / size_mb:>9.1f} {_recall(found, exact, 1):>6.3f} "
+                      f"{_recall(found, exact, 5):>6.3f} {_recall(found, exact, 10):>6.3f} "
+                      f"{ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
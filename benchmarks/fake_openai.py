@@ -0,0 +1,145 @@
+"""Local stand-in for the OpenAI embeddings endpoint.
+
+Implements ``POST /v1/embeddings`` closely enough for the official client:
+deterministic vectors (float or base64, honouring ``dimensions``), ``x-ratelimit-*`` headers, and a
+server-side tokens-per-minute bucket (optionally with a smaller ``burst``
+capacity) that answers 429 + ``retry-after-ms`` when exceeded.  Lets
+scheduler throughput and 429 handling run offline.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_vector(text: str, dim: int) -> np.ndarray:
+    """Deterministic unit vector derived from the text's sha256."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def fake_token_count(text: str) -> int:
+    """Rough server-side token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class FakeEmbeddingsServer:
+    """Threaded fake of the embeddings API with a tokens-per-minute quota.
+
+    Usage:
+        with FakeEmbeddingsServer(tokens_per_minute=600_000) as server:
+            client = openai.AsyncOpenAI(base_url=server.base_url, api_key="x")
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int = 1_000_000,
+        latency: float = 0.05,
+        dim: int = 16,
+        burst: int | None = None,
+    ) -> None:
+        self.tokens_per_minute = tokens_per_minute
+        self.burst = burst or tokens_per_minute
+        self.latency = latency
+        self.dim = dim
+        self.requests = 0
+        self.rate_limited = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._level = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def __enter__(self) -> "FakeEmbeddingsServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _take(self, tokens: int) -> tuple[bool, float, int]:
+        """Charge the quota: (allowed, seconds until allowed, remaining)."""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            rate = self.tokens_per_minute / 60
+            self._level = min(self.burst, self._level + (now - self._updated) * rate)
+            self._updated = now
+            if tokens > self._level:
+                self.rate_limited += 1
+                return False, (tokens - self._level) / rate, int(self._level)
+            self._level -= tokens
+            return True, 0.0, int(self._level)
+
+    def respond(self, body: dict) -> tuple[int, dict[str, str], dict]:
+        """Return (status, headers, json payload) for an embeddings request."""
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        tokens = sum(fake_token_count(t) for t in texts)
+        allowed, wait_s, remaining = self._take(tokens)
+        headers = {
+            "x-ratelimit-limit-tokens": str(self.tokens_per_minute),
+            "x-ratelimit-remaining-tokens": str(remaining),
+        }
+        if not allowed:
+            headers["retry-after-ms"] = str(int(wait_s * 1000) + 1)
+            error = {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}
+            return 429, headers, {"error": error}
+
+        time.sleep(self.latency)
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        dim = body.get("dimensions") or self.dim
+        for i, text in enumerate(texts):
+            vector = fake_vector(text, dim)
+            embedding = base64.b64encode(vector.tobytes()).decode() if as_base64 else vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        payload = {
+            "object": "list",
+            "data": data,
+            "model": body["model"],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+        return 200, headers, payload
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                with server._lock:
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                try:
+                    status, headers, payload = server.respond(body)
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+                raw = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
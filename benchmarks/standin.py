@@ -0,0 +1,177 @@
+"""Local HTTP stand-in for the Promtior Wix site.
+
+Serves a sitemap plus N synthetic Wix-like pages from a background thread so
+crawler benchmarks and tests run offline and reproducibly.  Each response is
+delayed by ``latency`` seconds to mimic real network round-trips.  Pages
+carry an ETag and honour If-None-Match; ``lastmod=True`` adds <lastmod>
+entries to the sitemap.  ``failures=n`` makes every path answer its first n
+requests with ``failure_status`` (429s carry ``Retry-After: 0``).
+
+``/sitemap-index.xml`` lists the same pages through a nested sitemap index:
+it points at ``/sitemap-nested.xml`` (an index of the gzip-compressed
+``/sitemap-1.xml.gz``, first half of the pages), at ``/sitemap-2.xml`` (the
+second half, plus page 0 again) and at itself.
+"""
+
+import gzip
+import threading
+import time
+from collections.abc import Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_HERO = (
+    "Promtior helps organizations become bionic: we combine people and "
+    "Generative AI to automate processes and boost productivity."
+)
+
+
+def wix_page(i: int) -> str:
+    """Return a synthetic page shaped like the Wix markup we crawl."""
+    paragraphs = "\n".join(
+        f"<p class=\"font_8\">Section {j} of page {i}: {_HERO} "
+        f"Clients such as CIEMSA and Paigo saw a {j + 3}x return.</p>"
+        for j in range(12)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><title>Promtior | Page {i}</title>
+<script>window.wixBiSession = {{"viewerName": "thunderbolt"}};</script>
+<style>.font_8 {{ font-size: 16px; }}</style></head>
+<body>
+<div id="SITE_CONTAINER"><span>top of page</span>
+<header><nav><a href="/">Home</a><a href="/service">Services</a></nav></header>
+<main id="PAGES_CONTAINER">
+<section><h1>Page {i}\u200b title</h1><img src="/hero-{i}.png" alt="hero">
+<svg><path d="M0 0"/></svg>{paragraphs}
+<p>Ancla {i}</p><p>Accept cookie settings and suscribe to our newsletter.</p>
+<iframe src="https://www.youtube.com/embed/x"></iframe></section>
+</main>
+<footer><p>Privacy Policy</p><p>bottom of page</p></footer></div>
+</body></html>"""
+
+
+def sitemap(urls: list[str], lastmod: str | None = None) -> str:
+    """Return a flat <urlset> sitemap for the given URLs."""
+    stamp = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+    locs = "".join(f"<url><loc>{u}</loc>{stamp}</url>" for u in urls)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{locs}</urlset>"
+    )
+
+
+def sitemap_index(urls: list[str]) -> str:
+    """Return a <sitemapindex> pointing at the given sitemap URLs."""
+    locs = "".join(f"<sitemap><loc>{u}</loc></sitemap>" for u in urls)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{locs}</sitemapindex>"
+    )
+
+
+class StandInSite:
+    """Threaded HTTP server hosting ``/sitemap.xml`` and ``/page-<i>``.
+
+    ``/sitemap-index.xml`` is the nested-index variant of ``/sitemap.xml``.
+
+    Usage:
+        with StandInSite(n_pages=300, latency=0.05) as site:
+            crawl(site.sitemap_url)
+    """
+
+    def __init__(
+        self,
+        n_pages: int = 300,
+        latency: float = 0.05,
+        lastmod: bool = False,
+        failures: int = 0,
+        failure_status: int = 503,
+    ) -> None:
+        self.latency = latency
+        self.lastmod = "2026-01-01T00:00:00Z" if lastmod else None
+        self.failures = failures
+        self.failure_status = failure_status
+        self.requests = 0
+        self.not_modified = 0
+        self.failed = 0
+        self._attempts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        self.page_urls = [f"{self.base_url}/page-{i}" for i in range(n_pages)]
+        self.sitemap_url = f"{self.base_url}/sitemap.xml"
+        self.sitemap_index_url = f"{self.base_url}/sitemap-index.xml"
+
+    def __enter__(self) -> "StandInSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def route(
+        self, path: str, headers: Mapping[str, str]
+    ) -> tuple[int, dict[str, str], str | bytes]:
+        """Return (status, response headers, body) for a request."""
+        with self._lock:
+            self._attempts[path] = attempt = self._attempts.get(path, 0) + 1
+            if attempt <= self.failures:
+                self.failed += 1
+                retry = {"Retry-After": "0"} if self.failure_status == 429 else {}
+                return self.failure_status, {"Content-Type": "text/plain", **retry}, "try again"
+        if path == "/sitemap.xml":
+            return 200, {"Content-Type": "application/xml"}, sitemap(self.page_urls, self.lastmod)
+        half = len(self.page_urls) // 2
+        if path == "/sitemap-index.xml":
+            children = ["/sitemap-nested.xml", "/sitemap-2.xml", "/sitemap-index.xml"]
+            return 200, {"Content-Type": "application/xml"}, sitemap_index(
+                [self.base_url + child for child in children]
+            )
+        if path == "/sitemap-nested.xml":
+            return 200, {"Content-Type": "application/xml"}, sitemap_index(
+                [f"{self.base_url}/sitemap-1.xml.gz"]
+            )
+        if path == "/sitemap-1.xml.gz":
+            body = sitemap(self.page_urls[:half], self.lastmod).encode("utf-8")
+            return 200, {"Content-Type": "application/x-gzip"}, gzip.compress(body)
+        if path == "/sitemap-2.xml":
+            urls = self.page_urls[half:] + self.page_urls[:1]
+            return 200, {"Content-Type": "application/xml"}, sitemap(urls, self.lastmod)
+        if path.startswith("/page-"):
+            etag = f'"v1-{path[len("/page-"):]}"'
+            if headers.get("If-None-Match") == etag:
+                with self._lock:
+                    self.not_modified += 1
+                return 304, {"ETag": etag}, ""
+            html_headers = {"Content-Type": "text/html; charset=utf-8", "ETag": etag}
+            return 200, html_headers, wix_page(int(path[len("/page-"):]))
+        return 404, {"Content-Type": "text/plain"}, "not found"
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                with site._lock:
+                    site.requests += 1
+                time.sleep(site.latency)
+                status, headers, body = site.route(self.path, self.headers)
+                payload = body if isinstance(body, bytes) else body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler